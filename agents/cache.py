@@ -0,0 +1,238 @@
+"""
+Agent Cache - Content-addressed cache for agent run results
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+@dataclass
+class CachedRunResult:
+    """Stands in for an agent RunResult when served from cache"""
+    data: Any
+    cached: bool = True
+
+
+class CacheBackend(ABC):
+    """Interface for cache storage; values are JSON strings"""
+
+    # Whether get/set do IO that should be kept off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Stored value, or None if missing, expired or older than `max_age` seconds"""
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with optional TTL"""
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            age = time.time() - created
+            if self.ttl is not None and age > self.ttl:
+                del self.entries[key]
+                return None
+            if max_age is not None and age > max_age:
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache that survives restarts, evicting least recently used rows"""
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = None, table: str = "agent_cache"):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            if max_age is not None and now - created > max_age:
+                return None
+            self.conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl is not None:
+                self.conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl,))
+            self.conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.commit()
+
+
+def _model_name(agent: Any) -> str:
+    model = getattr(agent, "model", None)
+    return str(getattr(model, "name", model))
+
+
+def _result_type(agent: Any) -> Any:
+    return getattr(agent, "result_type", None) or getattr(agent, "_result_type", None)
+
+
+def _schema(result_type: Any) -> Any:
+    if isinstance(result_type, type) and issubclass(result_type, BaseModel):
+        return result_type.schema()
+    return getattr(result_type, "__name__", str(result_type))
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.dict()
+    return value
+
+
+def cache_key(agent: Any, prompt: str, params: Dict[str, Any]) -> str:
+    """Hash everything that determines an agent's answer"""
+    payload = {
+        "model": _model_name(agent),
+        "system_prompt": list(getattr(agent, "_system_prompts", ())),
+        "result_schema": _schema(_result_type(agent)),
+        "prompt": prompt,
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=lambda v: v.dict() if isinstance(v, BaseModel) else str(v))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class AgentCache:
+    """Serializes agent results into a backend and counts hits and misses"""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, agent: Any, key: str, max_age: Optional[float] = None) -> Optional[CachedRunResult]:
+        raw = self.backend.get(key, max_age)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        data = json.loads(raw)
+        result_type = _result_type(agent)
+        if isinstance(result_type, type) and issubclass(result_type, BaseModel) and isinstance(data, dict):
+            data = result_type.parse_obj(data)
+        return CachedRunResult(data=data)
+
+    def store(self, key: str, data: Any) -> None:
+        self.backend.set(key, json.dumps(_to_jsonable(data), default=str))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def build_cache(backend: str, path: str, max_entries: int, ttl: Optional[float]) -> AgentCache:
+    """Create a cache from configuration values ("memory", "sqlite" or "none")"""
+    if backend == "sqlite":
+        return AgentCache(SQLiteCache(path, max_entries=max_entries, ttl=ttl))
+    return AgentCache(MemoryCache(max_entries=max_entries, ttl=ttl), enabled=backend != "none")
+
+
+_agent_cache: Optional[AgentCache] = None
+
+
+def get_agent_cache() -> AgentCache:
+    """Process-wide cache built from settings on first use"""
+    global _agent_cache
+    if _agent_cache is None:
+        from config import settings
+        _agent_cache = build_cache(
+            settings.agent_cache_backend,
+            settings.agent_cache_path,
+            settings.agent_cache_max_entries,
+            settings.agent_cache_ttl,
+        )
+    return _agent_cache
+
+
+def set_agent_cache(cache: AgentCache) -> None:
+    """Replace the process-wide cache"""
+    global _agent_cache
+    _agent_cache = cache
@@ -0,0 +1,196 @@
+"""
+Checkpoints - Stage outputs saved under a run id so failed runs can resume
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+def to_jsonable(value: Any) -> Any:
+    """Plain JSON data for a stage output (pydantic models become dicts)"""
+    return json.loads(json.dumps(value, default=_encode))
+
+
+def _encode(value: Any) -> Any:
+    if hasattr(value, "dict"):
+        return value.dict()
+    return str(value)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts"""
+    payload = json.dumps([to_jsonable(part) for part in parts], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CheckpointStore(ABC):
+    """
+    Interface of a checkpoint backend; methods block.
+
+    Checkpoints older than `ttl` seconds are ignored by `load` and deleted
+    by `prune`, which backends run when they are opened: runs that failed
+    and were never retried would otherwise be kept forever.
+    """
+
+    ttl: Optional[float] = None
+
+    def _expired(self, record: Dict[str, Any]) -> bool:
+        return self.ttl is not None and time.time() - float(record.get("created_at") or 0) > self.ttl
+
+    @abstractmethod
+    def load(self, run_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        """The saved {"fingerprint", "output", "created_at"} of a stage, if any and not expired"""
+        ...
+
+    @abstractmethod
+    def save(self, run_id: str, stage: str, fingerprint: str, output: Any) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, run_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def prune(self) -> int:
+        """Delete expired checkpoints and return how many were removed"""
+        ...
+
+
+class FileCheckpointStore(CheckpointStore):
+    """One JSON file per stage under `directory/<run_id>/`"""
+
+    def __init__(self, directory: str, ttl: Optional[float] = None):
+        self.directory = directory
+        self.ttl = ttl
+        self.prune()
+
+    def _path(self, run_id: str, stage: str) -> str:
+        return os.path.join(self.directory, run_id, f"{stage}.json")
+
+    def load(self, run_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(run_id, stage), encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return None if self._expired(record) else record
+
+    def save(self, run_id: str, stage: str, fingerprint: str, output: Any) -> None:
+        path = self._path(run_id, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"fingerprint": fingerprint, "output": to_jsonable(output), "created_at": time.time()}
+        # Write then rename so a crash never leaves a truncated checkpoint
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(f"{path}.tmp", path)
+
+    def clear(self, run_id: str) -> None:
+        shutil.rmtree(os.path.join(self.directory, run_id), ignore_errors=True)
+
+    def prune(self) -> int:
+        """Delete the directories of runs whose newest checkpoint has expired"""
+        if self.ttl is None or not os.path.isdir(self.directory):
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            # Files are written once per stage, so the newest mtime is the last checkpoint
+            stamps = [stage.stat().st_mtime for stage in os.scandir(entry.path)] or [entry.stat().st_mtime]
+            if max(stamps) < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+class SupabaseCheckpointStore(CheckpointStore):
+    """
+    Checkpoints in a Supabase table, shared by workers on any machine.
+
+    The table needs run_id, stage, fingerprint, output (jsonb) and
+    created_at columns with a unique constraint on (run_id, stage).
+    """
+
+    def __init__(self, url: str, key: str, table: str = "pipeline_checkpoints", ttl: Optional[float] = None):
+        from tools.supabase_pool import get_supabase_client
+        self.client = get_supabase_client(url, key)
+        self.table = table
+        self.ttl = ttl
+        try:
+            self.prune()
+        except Exception as e:
+            # Cleanup is best effort; expired rows are still ignored by load
+            from tools.tracing import metrics
+            metrics.inc("checkpoint_prune_failures_total", error=type(e).__name__)
+
+    def load(self, run_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        rows = self.client.table(self.table).select("fingerprint, output, created_at") \
+            .eq("run_id", run_id).eq("stage", stage).execute().data
+        return rows[0] if rows and not self._expired(rows[0]) else None
+
+    def save(self, run_id: str, stage: str, fingerprint: str, output: Any) -> None:
+        self.client.table(self.table).upsert({
+            "run_id": run_id,
+            "stage": stage,
+            "fingerprint": fingerprint,
+            "output": to_jsonable(output),
+            "created_at": time.time()
+        }, on_conflict="run_id,stage").execute()
+
+    def clear(self, run_id: str) -> None:
+        self.client.table(self.table).delete().eq("run_id", run_id).execute()
+
+    def prune(self) -> int:
+        if self.ttl is None:
+            return 0
+        rows = self.client.table(self.table).delete().lt("created_at", time.time() - self.ttl).execute().data
+        return len(rows or [])
+
+
+def build_checkpoint_store(
+    backend: str,
+    directory: str,
+    supabase_url: str = "",
+    supabase_key: str = "",
+    ttl: Optional[float] = None
+) -> Optional[CheckpointStore]:
+    """Create a store for a backend name ("file", "supabase" or "none")"""
+    if backend == "none":
+        return None
+    if backend == "file":
+        return FileCheckpointStore(directory, ttl)
+    if backend == "supabase":
+        return SupabaseCheckpointStore(supabase_url, supabase_key, ttl=ttl)
+    raise ValueError(f"Unknown checkpoint backend '{backend}'")
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_configured = False
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Process-wide store built from settings on first use; None when disabled"""
+    global _checkpoint_store, _configured
+    if not _configured:
+        from config import settings
+        _checkpoint_store = build_checkpoint_store(
+            settings.checkpoint_backend,
+            settings.checkpoint_dir,
+            settings.supabase_url,
+            settings.supabase_key,
+            settings.checkpoint_ttl,
+        )
+        _configured = True
+    return _checkpoint_store
+
+
+def set_checkpoint_store(store: Optional[CheckpointStore]) -> None:
+    """Replace the process-wide store; None disables checkpoints"""
+    global _checkpoint_store, _configured
+    _checkpoint_store = store
+    _configured = True
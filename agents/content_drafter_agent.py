@@ -1,44 +1,211 @@
 """
-    Content Drafter Agent - Creates initial content drafts
-    """
-    from typing import List, Dict
-    from pydantic import BaseModel, Field
-    from pydantic_ai import Agent, RunContext
-
-    class DraftRequest(BaseModel):
-        """Input for creating content drafts"""
-        brief: Dict[str, Any] = Field(description="Content brief")
-        word_count: int = Field(1000, description="Target word count")
-        placeholder_format: str = Field("[PLACEHOLDER]", description="Format for placeholders")
-
-    class ContentDraft(BaseModel):
-        """Structured content draft"""
-        title: str = Field(description="Draft title")
-        content: str = Field(description="Draft content")
-        placeholders: List[str] = Field(description="List of placeholders needing completion")
-        word_count: int = Field(description="Actual word count")
-
-    drafter = Agent(
-        "openai:gpt-4",
-        system_prompt="""
-        You are the Content Drafter. Your responsibilities include:
-        1. Creating initial content drafts
-        2. Identifying areas needing additional information
-        3. Following provided style guidelines
-        4. Maintaining consistent tone and voice
-        """,
-        result_type=ContentDraft
+Content Drafter Agent - Creates initial content drafts
+"""
+import asyncio
+from typing import Any, List, Dict, AsyncIterator, Optional
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent, RunContext
+from agents.runner import run_agent, stream_agent
+from agents.sections import (
+    count_words, join_sections, merge_unique, plan_revision, regenerate_sections, section_budgets,
+    section_title, with_heading
+)
+from agents.token_budget import compact_params
+from tools.tracing import tracer
+
+# Target length from which briefs with several sections are drafted section by section
+SECTION_DRAFT_MIN_WORDS = 1500
+
+class DraftRequest(BaseModel):
+    """Input for creating content drafts"""
+    brief: Dict[str, Any] = Field(description="Content brief")
+    word_count: int = Field(1000, description="Target word count")
+    placeholder_format: str = Field("[PLACEHOLDER]", description="Format for placeholders")
+    by_section: Optional[bool] = Field(None, description="Draft brief sections in parallel; None decides by length")
+
+class ContentDraft(BaseModel):
+    """Structured content draft"""
+    title: str = Field(description="Draft title")
+    content: str = Field(description="Draft content")
+    placeholders: List[str] = Field(description="List of placeholders needing completion")
+    word_count: int = Field(description="Actual word count")
+
+class DraftRevisionRequest(BaseModel):
+    """Input for updating a draft after its brief was edited"""
+    brief: Dict[str, Any] = Field(description="Revised content brief")
+    previous_brief: Dict[str, Any] = Field(description="Brief the previous draft was created from")
+    previous_draft: ContentDraft = Field(description="Draft to update")
+    word_count: int = Field(1000, description="Target word count")
+    placeholder_format: str = Field("[PLACEHOLDER]", description="Format for placeholders")
+
+drafter = Agent(
+    "openai:gpt-4",
+    name="drafter",
+    system_prompt="""
+    You are the Content Drafter. Your responsibilities include:
+    1. Creating initial content drafts
+    2. Identifying areas needing additional information
+    3. Following provided style guidelines
+    4. Maintaining consistent tone and voice
+    """,
+    result_type=ContentDraft,
+    defer_model_check=True
+)
+
+@drafter.tool
+async def format_placeholder(ctx: RunContext, text: str) -> str:
+    """Format text as a placeholder"""
+    return f"{ctx.deps.placeholder_format}{text}{ctx.deps.placeholder_format}"
+
+def draft_params(request: DraftRequest) -> Dict[str, Any]:
+    """Prompt parameters for a one-completion draft; `by_section` only picks the mode"""
+    return compact_params("draft", request.dict(exclude={"by_section"}))
+
+async def create_draft(request: DraftRequest) -> ContentDraft:
+    """
+    Create initial content draft.
+
+    Long briefs with several sections are drafted section by section
+    (see `create_section_draft`), as in `stream_draft`.
+    """
+    if drafts_by_section(request):
+        return await create_section_draft(request)
+    result = await run_agent(
+        drafter,
+        f"Create content draft based on provided brief",
+        params=draft_params(request),
+        tools=[format_placeholder]
     )
+    return result.data
 
-    @drafter.tool
-    async def format_placeholder(ctx: RunContext, text: str) -> str:
-        """Format text as a placeholder"""
-        return f"{ctx.deps.placeholder_format}{text}{ctx.deps.placeholder_format}"
-
-    async def create_draft(request: DraftRequest) -> ContentDraft:
-        """Create initial content draft"""
-        return await drafter.run(
-            f"Create content draft based on provided brief",
-            params=request.dict(),
-            tools=[format_placeholder]
-        )
+def drafts_by_section(request: DraftRequest) -> bool:
+    """Whether the draft is written section by section rather than in one completion"""
+    sections = request.brief.get("sections") or []
+    if request.by_section is not None:
+        return request.by_section and bool(sections)
+    return len(sections) > 1 and request.word_count >= SECTION_DRAFT_MIN_WORDS
+
+async def stream_draft(request: DraftRequest) -> AsyncIterator[ContentDraft]:
+    """
+    Stream partial drafts as they are generated; the last one is complete.
+
+    Long briefs with several sections are drafted section by section
+    (see `stream_section_draft`).
+    """
+    if drafts_by_section(request):
+        async for partial in stream_section_draft(request):
+            yield partial
+        return
+    async for partial in stream_agent(
+        drafter,
+        f"Create content draft based on provided brief",
+        params=draft_params(request),
+        tools=[format_placeholder]
+    ):
+        yield partial
+
+async def draft_section(
+    brief: Dict[str, Any],
+    section: Dict[str, Any],
+    word_count: int,
+    placeholder_format: str = "[PLACEHOLDER]"
+) -> ContentDraft:
+    """Draft a single brief section with the article's shared context"""
+    style_guide = brief.get("style_guide") or {}
+    result = await run_agent(
+        drafter,
+        f"Draft the section '{section_title(section)}' of the article",
+        params={
+            "title": brief.get("title"),
+            "tone": brief.get("tone") or style_guide.get("tone"),
+            "keywords": brief.get("keywords"),
+            "style_guide": brief.get("style_guide"),
+            "section": section,
+            "word_count": word_count,
+            "placeholder_format": placeholder_format
+        },
+        tools=[format_placeholder]
+    )
+    return result.data
+
+async def stream_section_draft(request: DraftRequest) -> AsyncIterator[ContentDraft]:
+    """
+    Draft every brief section concurrently and stream the article as it
+    is assembled.
+
+    Each section gets the shared context (title, tone, style guide) and
+    its own word budget. A draft is yielded each time the next section
+    in order is ready, so the text grows front to back; the last one is
+    complete, with the sections' placeholders merged.
+    """
+    brief = request.brief
+    sections = brief.get("sections") or []
+    if not sections:
+        raise ValueError("Brief has no sections to draft")
+    title = brief.get("title") or ""
+    preamble = f"# {title}\n\n" if title else ""
+    tasks = [
+        asyncio.create_task(draft_section(brief, section, budget, request.placeholder_format))
+        for section, budget in zip(sections, section_budgets(sections, request.word_count))
+    ]
+    chunks: List[str] = []
+    placeholders: List[str] = []
+    try:
+        with tracer.span("draft.sections", sections=len(sections), word_count=request.word_count):
+            for section, task in zip(sections, tasks):
+                drafted = await task
+                chunks.append(with_heading(drafted.content, section_title(section)))
+                placeholders = merge_unique(placeholders, drafted.placeholders)
+                content = join_sections(preamble, chunks)
+                yield ContentDraft(
+                    title=title,
+                    content=content,
+                    placeholders=placeholders,
+                    word_count=count_words(content)
+                )
+    finally:
+        # A failed section (or a consumer that stops early) cancels the rest
+        for task in tasks:
+            task.cancel()
+
+async def create_section_draft(request: DraftRequest) -> ContentDraft:
+    """Draft the brief's sections in parallel and return the assembled draft"""
+    draft = None
+    async for draft in stream_section_draft(request):
+        pass
+    return draft
+
+async def revise_draft(request: DraftRevisionRequest) -> ContentDraft:
+    """
+    Update a draft after an edit to its brief.
+
+    Brief sections are diffed against the previous brief; only added or
+    changed sections are redrafted, concurrently, and spliced into the
+    previous draft. Word count is recomputed locally.
+    """
+    sections = request.brief.get("sections") or []
+    previous = request.previous_brief.get("sections") or []
+    plan = plan_revision(
+        [(section_title(s), s) for s in previous],
+        [(section_title(s), s) for s in sections],
+        request.previous_draft.content
+    )
+    budgets = section_budgets(sections, request.word_count)
+    drafts: Dict[int, ContentDraft] = {}
+
+    async def generate(index: int) -> str:
+        drafts[index] = await draft_section(request.brief, sections[index], budgets[index], request.placeholder_format)
+        return drafts[index].content
+
+    content = await regenerate_sections(plan, [section_title(s) for s in sections], generate, "draft")
+    # Placeholders written into the text are kept only while their text survives
+    kept = [
+        p for p in request.previous_draft.placeholders
+        if p in content or p not in request.previous_draft.content
+    ]
+    return ContentDraft(
+        title=request.brief.get("title") or request.previous_draft.title,
+        content=content,
+        placeholders=merge_unique(kept, *(drafts[i].placeholders for i in sorted(drafts))),
+        word_count=count_words(content)
+    )
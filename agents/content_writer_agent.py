@@ -1,48 +1,99 @@
 """
-    Content Writer Agent - Finalizes and polishes content
+Content Writer Agent - Finalizes and polishes content
+"""
+from typing import Any, List, Dict, AsyncIterator
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent
+from agents.runner import run_agent, stream_agent
+from agents.sections import chunk_title, count_words, extract_headings, plan_revision, regenerate_sections, split_sections
+from agents.token_budget import compact_params
+
+class FinalContentRequest(BaseModel):
+    """Input for finalizing content"""
+    draft: Dict[str, Any] = Field(description="Content draft")
+    seo_requirements: Dict[str, Any] = Field(description="SEO specifications")
+    style_guide: Dict[str, str] = Field(description="Style guidelines")
+
+class FinalContent(BaseModel):
+    """Structured final content"""
+    title: str = Field(description="Final title")
+    content: str = Field(description="Final content")
+    meta_description: str = Field(description="SEO meta description")
+    headings: List[str] = Field(description="Content headings")
+    word_count: int = Field(description="Final word count")
+    seo_score: float = Field(description="SEO optimization score")
+
+class FinalContentRevisionRequest(BaseModel):
+    """Input for updating final content after its draft was revised"""
+    draft: Dict[str, Any] = Field(description="Revised content draft")
+    previous_draft: Dict[str, Any] = Field(description="Draft the previous final content was created from")
+    previous_final: FinalContent = Field(description="Final content to update")
+    seo_requirements: Dict[str, Any] = Field(description="SEO specifications")
+    style_guide: Dict[str, str] = Field(description="Style guidelines")
+
+writer = Agent(
+    "openai:gpt-4",
+    name="writer",
+    system_prompt="""
+    You are the Content Writer. Your responsibilities include:
+    1. Polishing and finalizing content
+    2. Ensuring SEO best practices
+    3. Verifying style guide compliance
+    4. Adding necessary references and citations
+    """,
+    result_type=FinalContent,
+    defer_model_check=True
+)
+
+async def finalize_content(request: FinalContentRequest) -> FinalContent:
+    """Finalize and polish content"""
+    return await run_agent(
+        writer,
+        f"Finalize content based on provided draft",
+        params=compact_params("final", request.dict())
+    )
+
+async def stream_final_content(request: FinalContentRequest) -> AsyncIterator[FinalContent]:
+    """Stream partial final content as it is generated; the last one is complete"""
+    async for partial in stream_agent(
+        writer,
+        f"Finalize content based on provided draft",
+        params=compact_params("final", request.dict())
+    ):
+        yield partial
+
+async def finalize_section(section: str, seo_requirements: Dict[str, Any], style_guide: Dict[str, str]) -> str:
+    """Polish a single markdown section of a draft"""
+    result = await run_agent(
+        writer,
+        f"Finalize the section '{chunk_title(section)}' of the article",
+        params={"section": section, "seo_requirements": seo_requirements, "style_guide": style_guide}
+    )
+    return result.data.content
+
+async def revise_final_content(request: FinalContentRevisionRequest) -> FinalContent:
     """
-    from typing import List, Dict
-    from pydantic import BaseModel, Field
-    from pydantic_ai import Agent
-
-    class FinalContentRequest(BaseModel):
-        """Input for finalizing content"""
-        draft: Dict[str, Any] = Field(description="Content draft")
-        seo_requirements: Dict[str, Any] = Field(description="SEO specifications")
-        style_guide: Dict[str, str] = Field(description="Style guidelines")
-
-    class FinalContent(BaseModel):
-        """Structured final content"""
-        title: str = Field(description="Final title")
-        content: str = Field(description="Final content")
-        meta_description: str = Field(description="SEO meta description")
-        headings: List[str] = Field(description="Content headings")
-        word_count: int = Field(description="Final word count")
-        seo_score: float = Field(description="SEO optimization score")
-
-    writer = Agent(
-        "openai:gpt-4",
-        system_prompt="""
-        You are the Content Writer. Your responsibilities include:
-        1. Polishing and finalizing content
-        2. Ensuring SEO best practices
-        3. Verifying style guide compliance
-        4. Adding necessary references and citations
-        """,
-        result_type=FinalContent
+    Update final content after its draft was revised.
+
+    Draft sections are diffed against the previous draft; only changed
+    sections are polished again, concurrently, and spliced into the
+    previous final content. Headings and word count are recomputed
+    locally; the title, meta description and SEO score are kept.
+    """
+    _, sections = split_sections(request.draft.get("content", ""))
+    _, previous = split_sections(request.previous_draft.get("content", ""))
+    plan = plan_revision(
+        [(chunk_title(s), s.strip()) for s in previous],
+        [(chunk_title(s), s.strip()) for s in sections],
+        request.previous_final.content
     )
 
-    async def finalize_content(request: FinalContentRequest) -> FinalContent:
-        """Finalize and polish content"""
-        # Example of streaming response handling (commented out)
-        # async for chunk in writer.run_streaming(
-        #     f"Finalize content based on provided draft",
-        #     params=request.dict()
-        # ):
-        #     # Process chunks incrementally
-        #     print(f"Received chunk: {chunk}")
-        
-        return await writer.run(
-            f"Finalize content based on provided draft",
-            params=request.dict()
-        )
+    async def generate(index: int) -> str:
+        return await finalize_section(sections[index], request.seo_requirements, request.style_guide)
+
+    content = await regenerate_sections(plan, [chunk_title(s) for s in sections], generate, "final")
+    return request.previous_final.copy(update={
+        "content": content,
+        "headings": extract_headings(content),
+        "word_count": count_words(content)
+    })
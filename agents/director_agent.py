@@ -1,141 +1,402 @@
 """
-    Director Agent - Central orchestrator for the auto-blogging platform
+Director Agent - Central orchestrator for the auto-blogging platform
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Iterable
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent, RunContext
+from tools.supabase_tools import save_blog_post, get_user_settings, pin_user_settings, prefetch_user_settings, BlogPost, SupabaseDeps, SUPABASE_ERRORS
+from tools.web_search_tools import search_web
+from tools.publishing_tools import publish_to_wordpress, slugify, to_wordpress_post, WordPressDeps
+from tools.tracing import metrics, tracer
+from agents.checkpoints import fingerprint, get_checkpoint_store
+from agents.pipeline import Pipeline, Stage, StageCallback
+from agents.runner import run_agent, stream_agent
+from agents.token_budget import compact_params
+
+# Upper bound for a single workflow stage, in seconds
+DEFAULT_STAGE_TIMEOUT = 120.0
+
+# Oldest cached answer reused for stages that read changing data, in seconds:
+# preferences follow the user settings cache, research the web
+PREFERENCES_CACHE_TTL = 300.0
+RESEARCH_CACHE_TTL = 3600.0
+
+class BlogRequest(BaseModel):
+    """Structured input for blog creation"""
+    user_id: str = Field(description="ID of the requesting user")
+    topic: str = Field(description="Main topic of the blog post")
+    keywords: list[str] = Field(description="SEO keywords to target")
+    content_type: str = Field(description="Type of content to create")
+    publish: bool = Field(description="Whether to publish the content")
+
+class BlogResult(BaseModel):
+    """Structured output for blog creation"""
+    status: str = Field(description="Operation status")
+    message: str = Field(description="Result message")
+    content_url: Optional[str] = Field(description="URL of published content")
+    content_id: Optional[str] = Field(description="ID of stored content")
+    critical_path_time: Optional[float] = Field(None, description="Seconds spent on the slowest dependency chain")
+    resumed_stages: list[str] = Field(default_factory=list, description="Stages restored from checkpoints of an earlier attempt")
+    duplicates: list[Dict[str, Any]] = Field(default_factory=list, description="Stored posts this content near-duplicates")
+
+class BatchResult(BaseModel):
+    """Outcome of one request in a batch run"""
+    index: int = Field(description="Position of the request in the batch")
+    request: BlogRequest = Field(description="The originating request")
+    result: Optional[BlogResult] = Field(None, description="Result when the request succeeded")
+    error: Optional[str] = Field(None, description="Error message when the request failed")
+    duration: Optional[float] = Field(None, description="Seconds spent generating this post")
+
+class DirectorDependencies(BaseModel):
+    """Shared resources for the Director Agent"""
+    supabase_url: str
+    supabase_key: str
+    wordpress_url: Optional[str] = None
+    wordpress_creds: Optional[Dict[str, str]] = None
+    # "direct" calls the preferences, store and publish tools without the model;
+    # "llm" lets the director agent dispatch them (slower, useful for debugging)
+    execution_mode: str = "direct"
+
+director_agent = Agent(
+    "openai:gpt-4",
+    name="director",
+    system_prompt="""
+    You are an expert SEO Director AI agent. Your responsibilities include:
+    1. Analyzing user requests and creating detailed content plans
+    2. Coordinating research, writing, and editing processes
+    3. Ensuring content meets SEO best practices
+    4. Managing the publishing workflow
+    """,
+    deps_type=DirectorDependencies,
+    result_type=BlogResult,
+    defer_model_check=True
+)
+
+@director_agent.tool
+async def get_user_preferences(ctx: RunContext[DirectorDependencies], user_id: str) -> Dict[str, Any]:
+    """Retrieve user preferences from Supabase"""
+    return await get_user_settings(ctx, user_id)
+
+@director_agent.tool
+async def store_content(ctx: RunContext[DirectorDependencies], content: Dict[str, Any]) -> Dict[str, Any]:
+    """Store content in Supabase"""
+    return await save_blog_post(ctx, content)
+
+@director_agent.tool
+async def publish_content(ctx: RunContext[DirectorDependencies], content: Dict[str, Any]) -> Dict[str, Any]:
+    """Publish content to WordPress"""
+    if ctx.deps.wordpress_url and ctx.deps.wordpress_creds:
+        return await publish_to_wordpress(ctx, content)
+    return {"status": "skipped", "message": "WordPress credentials not configured"}
+
+class ToolContext(BaseModel):
+    """Stands in for RunContext when a tool is called directly instead of by the model"""
+    deps: Any
+
+def supabase_deps(deps: DirectorDependencies) -> SupabaseDeps:
+    return SupabaseDeps(url=deps.supabase_url, key=deps.supabase_key)
+
+def wordpress_deps(deps: DirectorDependencies) -> Optional[WordPressDeps]:
+    if not (deps.wordpress_url and deps.wordpress_creds):
+        return None
+    return WordPressDeps(
+        url=deps.wordpress_url,
+        username=deps.wordpress_creds.get("username", ""),
+        password=deps.wordpress_creds.get("password", "")
+    )
+
+def blog_post_from_outline(request: BlogRequest, outline: Any) -> BlogPost:
+    """Typed post for storage from the outline stage's output"""
+    fields = outline.dict() if hasattr(outline, "dict") else outline if isinstance(outline, dict) else {}
+    content = fields.get("content")
+    return BlogPost(
+        title=fields.get("title") or request.topic,
+        content=content if isinstance(content, str) else json.dumps(fields or str(outline), default=str),
+        author=request.user_id,
+        tags=request.keywords
+    )
+
+async def fetch_preferences_direct(request: BlogRequest, deps: DirectorDependencies) -> Dict[str, Any]:
+    """User preferences straight from the settings tool"""
+    return await get_user_settings(ToolContext(deps=supabase_deps(deps)), request.user_id)
+
+async def store_direct(request: BlogRequest, deps: DirectorDependencies, outline: Any) -> BlogResult:
+    """Save the post with the storage tool; a failed save fails the stage"""
+    post = blog_post_from_outline(request, outline)
+    stored = await save_blog_post(ToolContext(deps=supabase_deps(deps)), post)
+    if stored.get("status") != "success":
+        raise RuntimeError(f"Failed to store content: {stored.get('error')}")
+    return BlogResult(
+        status="success",
+        message="Content stored",
+        content_url=None,
+        content_id=str(stored["id"]),
+        duplicates=stored.get("duplicates", [])
+    )
+
+async def publish_direct(
+    request: BlogRequest,
+    deps: DirectorDependencies,
+    outline: Any,
+    stored: Optional[BlogResult] = None
+) -> BlogResult:
     """
-    from typing import Optional, Dict, Any
-    from pydantic import BaseModel, Field
-    from pydantic_ai import Agent, RunContext
-    from tools.supabase_tools import save_blog_post, get_user_settings
-    from tools.web_search_tools import search_web
-    from tools.publishing_tools import publish_to_wordpress
-
-    class BlogRequest(BaseModel):
-        """Structured input for blog creation"""
-        user_id: str = Field(description="ID of the requesting user")
-        topic: str = Field(description="Main topic of the blog post")
-        keywords: list[str] = Field(description="SEO keywords to target")
-        content_type: str = Field(description="Type of content to create")
-        publish: bool = Field(description="Whether to publish the content")
-
-    class BlogResult(BaseModel):
-        """Structured output for blog creation"""
-        status: str = Field(description="Operation status")
-        message: str = Field(description="Result message")
-        content_url: Optional[str] = Field(description="URL of published content")
-        content_id: Optional[str] = Field(description="ID of stored content")
-
-    class DirectorDependencies(BaseModel):
-        """Shared resources for the Director Agent"""
-        supabase_url: str
-        supabase_key: str
-        wordpress_url: Optional[str]
-        wordpress_creds: Optional[Dict[str, str]]
-
-    director_agent = Agent(
-        "openai:gpt-4",
-        system_prompt="""
-        You are an expert SEO Director AI agent. Your responsibilities include:
-        1. Analyzing user requests and creating detailed content plans
-        2. Coordinating research, writing, and editing processes
-        3. Ensuring content meets SEO best practices
-        4. Managing the publishing workflow
-        """,
-        deps_type=DirectorDependencies,
-        result_type=BlogResult
+    Publish the post with the WordPress tool, or skip without credentials.
+
+    Content the store step flagged as a near-duplicate of an existing
+    post is held back for review instead of being published.
+    """
+    if stored is not None and stored.duplicates:
+        titles = ", ".join(str(d.get("title")) for d in stored.duplicates)
+        return BlogResult(
+            status="flagged",
+            message=f"Not published: duplicates existing posts ({titles})",
+            content_url=None,
+            content_id=None,
+            duplicates=stored.duplicates
+        )
+    wordpress = wordpress_deps(deps)
+    if wordpress is None:
+        return BlogResult(
+            status="skipped",
+            message="WordPress credentials not configured",
+            content_url=None,
+            content_id=None
+        )
+    post = blog_post_from_outline(request, outline)
+    content = {**to_wordpress_post(post.dict()), "slug": slugify(post.title), "status": "publish"}
+    published = await publish_to_wordpress(ToolContext(deps=wordpress), content)
+    if published.status != "success":
+        raise RuntimeError(f"Failed to publish content: {published.error}")
+    return BlogResult(
+        status="success",
+        message="Content published",
+        content_url=published.url,
+        content_id=str(published.post_id) if published.post_id is not None else None
     )
 
-    @director_agent.tool
-    async def get_user_preferences(ctx: RunContext[DirectorDependencies], user_id: str) -> Dict[str, Any]:
-        """Retrieve user preferences from Supabase"""
-        return await get_user_settings(ctx, user_id)
-
-    @director_agent.tool
-    async def store_content(ctx: RunContext[DirectorDependencies], content: Dict[str, Any]) -> Dict[str, Any]:
-        """Store content in Supabase"""
-        return await save_blog_post(ctx, content)
-
-    @director_agent.tool
-    async def publish_content(ctx: RunContext[DirectorDependencies], content: Dict[str, Any]) -> Dict[str, Any]:
-        """Publish content to WordPress"""
-        if ctx.deps.wordpress_url and ctx.deps.wordpress_creds:
-            return await publish_to_wordpress(ctx, content)
-        return {"status": "skipped", "message": "WordPress credentials not configured"}
-
-    async def create_blog_post(request: BlogRequest, deps: DirectorDependencies) -> BlogResult:
-        """Orchestrate the blog creation workflow"""
-        # Step 1: Get user preferences
-        user_prefs = await director_agent.run(
+def build_blog_pipeline(
+    request: BlogRequest,
+    deps: DirectorDependencies,
+    stage_timeout: Optional[float] = None,
+    on_outline: Optional[Callable[[Any], None]] = None
+) -> Pipeline:
+    """
+    Declare the blog creation workflow as a dependency graph.
+
+    In "direct" execution mode the preferences, store and publish stages
+    call their tools with typed inputs; only research and the outline
+    go through the model. Publishing then waits for the store step so
+    near-duplicates it flags are not published. With `on_outline` the
+    outline is streamed and each partial result is passed to it.
+    """
+    direct = deps.execution_mode == "direct"
+
+    async def fetch_preferences(inputs: Dict[str, Any]) -> Any:
+        if direct:
+            return await fetch_preferences_direct(request, deps)
+        result = await run_agent(
+            director_agent,
             "Get user preferences for content creation",
+            route="director.preferences",
+            cache_ttl=PREFERENCES_CACHE_TTL,
             deps=deps,
             tools=[get_user_preferences],
             params={"user_id": request.user_id}
         )
+        return result.data
 
-        # Step 2: Conduct research
-        research_results = await director_agent.run(
+    async def research(inputs: Dict[str, Any]) -> Any:
+        result = await run_agent(
+            director_agent,
             f"Research topic: {request.topic} with keywords: {', '.join(request.keywords)}",
+            route="director.research",
+            cache_ttl=RESEARCH_CACHE_TTL,
             deps=deps,
             tools=[search_web],
             params={"query": f"{request.topic} {', '.join(request.keywords)}"}
         )
+        return result.data
 
-        # Step 3: Generate content outline
-        outline = await director_agent.run(
-            f"Create content outline for: {request.topic}",
-            deps=deps,
-            params={
-                "topic": request.topic,
-                "keywords": request.keywords,
-                "content_type": request.content_type
-            }
-        )
+    async def create_outline(inputs: Dict[str, Any]) -> Any:
+        prompt = f"Create content outline for: {request.topic}"
+        params = compact_params("outline", {
+            "topic": request.topic,
+            "keywords": request.keywords,
+            "content_type": request.content_type,
+            "preferences": inputs["preferences"],
+            "research": inputs["research"]
+        })
+        if on_outline is None:
+            result = await run_agent(director_agent, prompt, route="director.outline", deps=deps, params=params)
+            return result.data
+        outline = None
+        async for outline in stream_agent(director_agent, prompt, route="director.outline", deps=deps, params=params):
+            on_outline(outline)
+        return outline
 
-        # Step 4: Store content
-        storage_result = await director_agent.run(
+    async def store(inputs: Dict[str, Any]) -> Any:
+        if direct:
+            return await store_direct(request, deps, inputs["outline"])
+        result = await run_agent(
+            director_agent,
             "Store generated content",
+            route="director.store",
             deps=deps,
             tools=[store_content],
-            params={"content": outline.data}
+            bypass_cache=True,
+            params={"content": inputs["outline"]}
         )
+        return result.data
 
-        # Step 5: Publish if requested
-        publish_result = {"status": "skipped"}
-        if request.publish:
-            publish_result = await director_agent.run(
-                "Publish content",
-                deps=deps,
-                tools=[publish_content],
-                params={"content": outline.data}
-            )
-
-        return BlogResult(
-            status="success",
-            message="Blog post created successfully",
-            content_url=publish_result.get("url"),
-            content_id=storage_result.get("id")
+    async def publish(inputs: Dict[str, Any]) -> Any:
+        if direct:
+            return await publish_direct(request, deps, inputs["outline"], inputs["store"])
+        result = await run_agent(
+            director_agent,
+            "Publish content",
+            route="director.publish",
+            deps=deps,
+            tools=[publish_content],
+            bypass_cache=True,
+            params={"content": inputs["outline"]}
         )
+        return result.data
 
-    if __name__ == "__main__":
-        import asyncio
-        from config import settings
-
-        # Example usage
-        deps = DirectorDependencies(
-            supabase_url=settings.SUPABASE_URL,
-            supabase_key=settings.SUPABASE_KEY,
-            wordpress_url=settings.WORDPRESS_URL,
-            wordpress_creds={
-                "username": settings.WORDPRESS_USERNAME,
-                "password": settings.WORDPRESS_PASSWORD
-            }
-        )
+    return Pipeline([
+        Stage("preferences", fetch_preferences, output_type=None if direct else BlogResult),
+        Stage("research", research, output_type=BlogResult),
+        Stage("outline", create_outline, depends_on=("preferences", "research"), output_type=BlogResult),
+        Stage("store", store, depends_on=("outline",), output_type=BlogResult),
+        Stage("publish", publish, depends_on=("outline", "store") if direct else ("outline",), condition=lambda _: request.publish, output_type=BlogResult),
+    ], default_timeout=stage_timeout)
 
-        request = BlogRequest(
-            user_id="123",
-            topic="AI in Healthcare",
-            keywords=["AI", "healthcare", "machine learning"],
-            content_type="blog post",
-            publish=True
+async def create_blog_post(
+    request: BlogRequest,
+    deps: DirectorDependencies,
+    stage_timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT,
+    run_id: Optional[str] = None,
+    on_stage: Optional[StageCallback] = None,
+    resume: bool = False,
+    on_outline: Optional[Callable[[Any], None]] = None
+) -> BlogResult:
+    """
+    Orchestrate the blog creation workflow.
+
+    Stage outputs are checkpointed under `run_id`, so retrying a failed
+    run with the same id only reruns the stages that did not complete.
+    Without a `run_id` every call is a fresh, uncheckpointed run, unless
+    `resume` is set: then the id is derived from the request, picking up
+    an earlier attempt at the same request. `on_stage` receives each stage's progress
+    and `on_outline` the partial outlines while that stage streams.
+    """
+    # A fresh run's random id can never be retried, so it keeps no checkpoints
+    checkpoints = get_checkpoint_store() if run_id is not None or resume else None
+    if run_id is None:
+        run_id = fingerprint(request)[:32] if resume else uuid.uuid4().hex
+    # The root span: every stage, agent and tool span of the run shares its trace
+    with tracer.span("blog.create", run_id=run_id, topic=request.topic):
+        run = await build_blog_pipeline(request, deps, stage_timeout, on_outline).run(
+            {"request": request.dict()},
+            run_id=run_id,
+            checkpoints=checkpoints,
+            on_stage=on_stage
         )
+    stored = run.outputs["store"]
+    published = run.outputs["publish"]
+
+    return BlogResult(
+        status="success",
+        message=published.message if getattr(published, "status", None) == "flagged" else "Blog post created successfully",
+        content_url=getattr(published, "content_url", None),
+        content_id=getattr(stored, "content_id", None),
+        critical_path_time=run.critical_path_time,
+        resumed_stages=run.resumed,
+        duplicates=getattr(stored, "duplicates", [])
+    )
+
+async def generate_blogs(
+    requests: Iterable[BlogRequest],
+    deps: DirectorDependencies,
+    max_concurrency: int = 5,
+    stage_timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT
+) -> AsyncIterator[BatchResult]:
+    """
+    Create many blog posts concurrently.
+
+    At most `max_concurrency` posts are in flight at once; provider calls
+    additionally go through the shared rate limiter. Results are yielded
+    in completion order, and a failed post does not stop the batch.
+    """
+    requests = list(requests)
+    pending: asyncio.Queue = asyncio.Queue()
+    for item in enumerate(requests):
+        pending.put_nowait(item)
+    total = pending.qsize()
+
+    # One settings query for the whole batch, pinned so every post reads the
+    # prefetched entry; lookups fall back to per-user fetches if it fails
+    supabase_deps = SupabaseDeps(url=deps.supabase_url, key=deps.supabase_key)
+    user_ids = [request.user_id for request in requests]
+    with pin_user_settings(supabase_deps, user_ids):
+        try:
+            await prefetch_user_settings(supabase_deps, user_ids)
+        except SUPABASE_ERRORS as e:
+            metrics.inc("settings_prefetch_failures_total", error=type(e).__name__)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    index, request = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await create_blog_post(request, deps, stage_timeout)
+                    await finished.put(BatchResult(
+                        index=index, request=request, result=result, duration=time.perf_counter() - started
+                    ))
+                except Exception as e:
+                    await finished.put(BatchResult(
+                        index=index, request=request, error=str(e), duration=time.perf_counter() - started
+                    ))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, total))]
+        try:
+            for _ in range(total):
+                yield await finished.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+if __name__ == "__main__":
+    import asyncio
+    from config import settings
+
+    # Example usage
+    deps = DirectorDependencies(
+        supabase_url=settings.SUPABASE_URL,
+        supabase_key=settings.SUPABASE_KEY,
+        wordpress_url=settings.WORDPRESS_URL,
+        wordpress_creds={
+            "username": settings.WORDPRESS_USERNAME,
+            "password": settings.WORDPRESS_PASSWORD
+        }
+    )
+
+    request = BlogRequest(
+        user_id="123",
+        topic="AI in Healthcare",
+        keywords=["AI", "healthcare", "machine learning"],
+        content_type="blog post",
+        publish=True
+    )
 
-        result = asyncio.run(create_blog_post(request, deps))
-        print(result)
+    result = asyncio.run(create_blog_post(request, deps))
+    print(result)
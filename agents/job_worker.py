@@ -0,0 +1,111 @@
+"""
+Job Worker - Pulls blog requests from the job queue and runs the pipeline
+
+Start one or more worker processes next to the UI; each process runs
+`--concurrency` jobs at a time, and any number of processes (on any number
+of machines, with the Supabase backend) can share one queue.
+
+    python -m agents.job_worker --processes 4 --concurrency 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import signal
+from typing import Any, Dict, Optional
+
+from agents.director_agent import DEFAULT_STAGE_TIMEOUT, BlogRequest, DirectorDependencies, create_blog_post
+from tools.job_queue import Job, JobHandler, JobQueue, JobWorker, get_job_queue
+
+
+def enqueue_blog_post(request: BlogRequest, queue: Optional[JobQueue] = None, max_attempts: int = 3) -> str:
+    """Queue a blog request for the workers and return its job id"""
+    return (queue or get_job_queue()).enqueue(request.dict(), kind="blog", max_attempts=max_attempts)
+
+
+def job_status(job_id: str, queue: Optional[JobQueue] = None) -> Optional[Dict[str, Any]]:
+    """Current state of a job for polling clients; None if it does not exist"""
+    job = (queue or get_job_queue()).get(job_id)
+    return job.to_dict() if job is not None else None
+
+
+def blog_job_handler(deps: DirectorDependencies, stage_timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT) -> JobHandler:
+    """Handler that runs the blog pipeline for a queued BlogRequest"""
+    async def handle(job: Job) -> Dict[str, Any]:
+        # Checkpoints under the job id let a retried attempt resume
+        result = await create_blog_post(BlogRequest(**job.payload), deps, stage_timeout, run_id=job.id)
+        return result.dict()
+    return handle
+
+
+def deps_from_settings() -> DirectorDependencies:
+    from config import settings
+    return DirectorDependencies(
+        supabase_url=settings.supabase_url,
+        supabase_key=settings.supabase_key,
+        wordpress_url=settings.wordpress_url,
+        wordpress_creds={
+            "username": settings.wordpress_username,
+            "password": settings.wordpress_password
+        } if settings.wordpress_url else None,
+        execution_mode=settings.director_execution
+    )
+
+
+async def serve(concurrency: int) -> None:
+    """Run a worker in this process until SIGINT/SIGTERM, then finish in-flight jobs"""
+    from config import settings
+    from tools.blog_post_writer import replay_blog_post_spill, shutdown_blog_post_writers
+    from tools.http_clients import shutdown_http_clients
+    from tools.tracing import configure_tracing_from_settings
+
+    configure_tracing_from_settings(settings)
+    # Posts buffered when a previous worker exited are written before new jobs start
+    await replay_blog_post_spill(settings.supabase_url, settings.supabase_key)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = JobWorker(
+        get_job_queue(),
+        blog_job_handler(deps_from_settings()),
+        concurrency=concurrency,
+        lease_seconds=settings.job_lease_seconds,
+    )
+    try:
+        await worker.run(stop)
+    finally:
+        await shutdown_blog_post_writers()
+        await shutdown_http_clients()
+
+
+def _serve_process(concurrency: int) -> None:
+    asyncio.run(serve(concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs run at once by each process")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        _serve_process(args.concurrency)
+        return
+    processes = [
+        multiprocessing.Process(target=_serve_process, args=(args.concurrency,), name=f"blog-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children received the same SIGINT and drain their in-flight jobs
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
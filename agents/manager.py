@@ -1,19 +1,20 @@
 from pydantic_ai import Agent, RunContext
-    from pydantic import BaseModel
-    from typing import List
-    from config import settings
+from pydantic import BaseModel
+from typing import List, Dict, Any
+from config import settings
+from tools.web_search_tools import search_brave
 
-    class ResearchData(BaseModel):
-        sources: List[str]
-        key_points: List[str]
+class ResearchData(BaseModel):
+    sources: List[str]
+    key_points: List[str]
 
-    research_agent = Agent(
-        "openai:gpt-4",
-        system_prompt="You are a research manager. Gather and summarize information.",
-        result_type=ResearchData
-    )
+research_agent = Agent(
+    "openai:gpt-4",
+    system_prompt="You are a research manager. Gather and summarize information.",
+    result_type=ResearchData,
+    defer_model_check=True
+)
 
-    @research_agent.tool
-    async def search_web(ctx: RunContext, query: str) -> str:
-        # Implement web search functionality
-        return f"Search results for {query}"
+@research_agent.tool
+async def search_web(ctx: RunContext, query: str) -> Dict[str, Any]:
+    return await search_brave(query, settings.brave_api_key)
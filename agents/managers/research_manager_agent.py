@@ -1,28 +1,30 @@
 """
-    Research Manager Agent - Handles all research-related tasks
-    """
-    from pydantic_ai import Agent, RunContext
-    from pydantic import BaseModel
-    from typing import List
+Research Manager Agent - Handles all research-related tasks
+"""
+from pydantic_ai import Agent, RunContext
+from pydantic import BaseModel
+from typing import List, Dict, Any
+from config import settings
+from tools.web_search_tools import search_brave
 
-    class ResearchData(BaseModel):
-        sources: List[str]
-        key_points: List[str]
-        citations: List[str]
+class ResearchData(BaseModel):
+    sources: List[str]
+    key_points: List[str]
+    citations: List[str]
 
-    research_manager = Agent(
-        "openai:gpt-4",
-        system_prompt="""
-        You are the Research Manager. Your role is to:
-        1. Gather relevant information
-        2. Validate sources
-        3. Summarize key points
-        """,
-        result_type=ResearchData
-    )
+research_manager = Agent(
+    "openai:gpt-4",
+    system_prompt="""
+    You are the Research Manager. Your role is to:
+    1. Gather relevant information
+    2. Validate sources
+    3. Summarize key points
+    """,
+    result_type=ResearchData,
+    defer_model_check=True
+)
 
-    @research_manager.tool
-    async def search_web(ctx: RunContext, query: str) -> str:
-        """Search the web for relevant information"""
-        # Implementation would use a web search API
-        return f"Search results for {query}"
+@research_manager.tool
+async def search_web(ctx: RunContext, query: str) -> Dict[str, Any]:
+    """Search the web for relevant information"""
+    return await search_brave(query, settings.brave_api_key)
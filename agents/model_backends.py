@@ -0,0 +1,153 @@
+"""
+Model Backends - Offline, deterministic stand-in for the OpenAI model
+"""
+import asyncio
+import hashlib
+import random
+import typing
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+WORDS = (
+    "research shows teams adopting new tools improve outcomes when data quality "
+    "governance and clear metrics guide every decision across the organization"
+).split()
+
+
+@dataclass
+class FakeRunResult:
+    """Mimics the `.data` attribute of an agent RunResult"""
+    data: Any
+
+
+class FakeStreamedRun:
+    """Mimics a streamed run: partial results followed by the full one"""
+
+    def __init__(self, data: Any, steps: int, delay: float):
+        self.data = data
+        self.steps = steps
+        self.delay = delay
+
+    async def stream(self) -> AsyncIterator[Any]:
+        for step in range(1, self.steps + 1):
+            await asyncio.sleep(self.delay)
+            yield _truncate(self.data, step / self.steps)
+
+    async def get_data(self) -> Any:
+        return self.data
+
+
+def _truncate(data: Any, fraction: float) -> Any:
+    if not isinstance(data, BaseModel) or fraction >= 1:
+        return data
+    update = {
+        name: value[: int(len(value) * fraction)]
+        for name, value in data.dict().items()
+        if isinstance(value, str)
+    }
+    return data.copy(update=update)
+
+
+class FakeModel:
+    """
+    Returns schema-valid results for any agent without network access.
+
+    Each call sleeps for `latency` seconds plus up to `jitter` either way,
+    drawn from a generator seeded by the prompt, so runs are reproducible.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, seed: int = 0, stream_steps: int = 5):
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.stream_steps = stream_steps
+        self.calls = 0
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _delay(self, rng: random.Random) -> float:
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+    async def run(self, agent: Any, prompt: str, **kwargs: Any) -> FakeRunResult:
+        self.calls += 1
+        rng = self._rng(prompt)
+        await asyncio.sleep(self._delay(rng))
+        return FakeRunResult(build_value(_result_type(agent), prompt, rng))
+
+    @asynccontextmanager
+    async def run_stream(self, agent: Any, prompt: str, **kwargs: Any) -> AsyncIterator[FakeStreamedRun]:
+        self.calls += 1
+        rng = self._rng(prompt)
+        delay = self._delay(rng)
+        data = build_value(_result_type(agent), prompt, rng)
+        yield FakeStreamedRun(data, self.stream_steps, delay / self.stream_steps)
+
+
+def _result_type(agent: Any) -> Any:
+    return getattr(agent, "result_type", None) or getattr(agent, "_result_type", None) or str
+
+
+def _text(name: str, prompt: str, rng: random.Random) -> str:
+    if name in ("content", "body", "introduction", "conclusion"):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(150, 300)))
+    return f"{name.replace('_', ' ').capitalize()} for {prompt[:60]}"
+
+
+def build_value(annotation: Any, prompt: str, rng: random.Random, name: str = "value") -> Any:
+    """Synthesize a value matching `annotation`, recursing into models and containers"""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Union:
+        return build_value(next(a for a in args if a is not type(None)), prompt, rng, name)
+    if origin in (list, typing.List):
+        return [build_value(args[0] if args else str, prompt, rng, name) for _ in range(3)]
+    if origin in (dict, typing.Dict):
+        value_type = args[1] if len(args) == 2 else str
+        return {f"{name}_{i}": build_value(value_type, prompt, rng, name) for i in range(2)}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation(**{
+            field: build_value(info.annotation, prompt, rng, field)
+            for field, info in annotation.__fields__.items()
+        })
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is int:
+        return rng.randint(1, 2000)
+    if annotation is float:
+        return round(rng.uniform(0, 100), 2)
+    if annotation in (str, Any):
+        return _text(name, prompt, rng)
+    return None
+
+
+_model_backend: Optional[FakeModel] = None
+_resolved = False
+
+
+def get_model_backend() -> Optional[FakeModel]:
+    """
+    The backend selected by `settings.llm_backend`, or None for the real model.
+
+    Setting `llm_backend` to "fake" swaps every agent run for FakeModel, using
+    `fake_model_latency` and `fake_model_jitter`.
+    """
+    global _model_backend, _resolved
+    if not _resolved:
+        from config import settings
+        if settings.llm_backend == "fake":
+            _model_backend = FakeModel(settings.fake_model_latency, settings.fake_model_jitter)
+        _resolved = True
+    return _model_backend
+
+
+def set_model_backend(backend: Optional[FakeModel]) -> None:
+    """Select a backend explicitly (None restores the real model)"""
+    global _model_backend, _resolved
+    _model_backend = backend
+    _resolved = True
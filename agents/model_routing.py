@@ -0,0 +1,180 @@
+"""
+Model Routing - Per-agent and per-stage model tiers with fallback and cost stats
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from tools.tracing import metrics
+
+try:
+    from pydantic_ai.exceptions import UnexpectedModelBehavior
+except ImportError:  # older pydantic-ai releases
+    UnexpectedModelBehavior = ValidationError
+
+# Errors meaning the model's answer did not validate against the agent's result_type
+VALIDATION_ERRORS = (ValidationError, UnexpectedModelBehavior)
+
+# Model tiers, smallest first; fallback moves up this order
+TIER_ORDER = ("small", "medium", "large")
+
+DEFAULT_TIERS: Dict[str, str] = {
+    "small": "openai:gpt-4o-mini",
+    "medium": "openai:gpt-4o",
+    "large": "openai:gpt-4",
+}
+
+# USD per million (input, output) tokens, for the cost estimates in the stats
+TIER_PRICES: Dict[str, Tuple[float, float]] = {
+    "small": (0.15, 0.60),
+    "medium": (2.50, 10.00),
+    "large": (30.00, 60.00),
+}
+
+# Tier per route: an agent name, or "agent.stage" for a single call site.
+# Tool dispatches and mechanical stages go to the small tier; the outline,
+# brief and final copy keep GPT-4.
+DEFAULT_ROUTES: Dict[str, str] = {
+    "director.preferences": "small",
+    "director.research": "small",
+    "director.outline": "large",
+    "director.store": "small",
+    "director.publish": "small",
+    "keywords": "small",
+    "research_manager": "medium",
+    "brief_manager": "large",
+    "drafter": "medium",
+    "writer": "large",
+}
+
+
+@dataclass
+class TierStats:
+    """Calls, validation fallbacks, latency, tokens and estimated cost of one tier"""
+    calls: int = 0
+    fallbacks: int = 0
+    seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "avg_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class ModelRouter:
+    """
+    Maps routes to model tiers and tracks per-tier latency and cost.
+
+    A route resolves by exact match ("director.store"), then by agent name
+    ("director"). Unrouted agents keep their own model. When an answer fails
+    `result_type` validation, the call is retried on the next larger tier.
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, str]] = None, routes: Optional[Dict[str, str]] = None):
+        self.tiers = {**DEFAULT_TIERS, **(tiers or {})}
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.stats: Dict[str, TierStats] = {}
+        self.lock = threading.Lock()
+
+    def tier_for(self, route: str) -> Optional[str]:
+        tier = self.routes.get(route)
+        if tier is None and "." in route:
+            tier = self.routes.get(route.split(".", 1)[0])
+        return tier
+
+    def chain(self, route: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(tier, model) pairs to try in order; [(None, None)] keeps the agent's model"""
+        tier = self.tier_for(route)
+        if tier not in TIER_ORDER:
+            return [(None, None)]
+        return [(name, self.tiers[name]) for name in TIER_ORDER[TIER_ORDER.index(tier):]]
+
+    def record(
+        self,
+        tier: Optional[str],
+        seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        fell_back: bool = False
+    ) -> None:
+        """Add one call to the tier's stats and metrics"""
+        tier = tier or "default"
+        input_price, output_price = TIER_PRICES.get(tier, (0.0, 0.0))
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        with self.lock:
+            stats = self.stats.setdefault(tier, TierStats())
+            stats.calls += 1
+            stats.fallbacks += int(fell_back)
+            stats.seconds += seconds
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost += cost
+        metrics.inc("model_calls_total", tier=tier)
+        metrics.inc("model_latency_seconds_total", seconds, tier=tier)
+        metrics.inc("model_cost_usd_total", cost, tier=tier)
+        if fell_back:
+            metrics.inc("model_fallbacks_total", tier=tier)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-tier calls, fallbacks, average latency, tokens and estimated cost"""
+        with self.lock:
+            return {tier: stats.to_dict() for tier, stats in self.stats.items()}
+
+    def summary_table(self) -> str:
+        """The report as a fixed-width table, one row per tier"""
+        header = f"{'tier':<10}{'calls':>7}{'fallbacks':>11}{'avg s':>9}{'in tokens':>12}{'out tokens':>12}{'cost $':>10}"
+        rows = [header, "-" * len(header)]
+        for tier, stats in sorted(self.report().items()):
+            rows.append(
+                f"{tier:<10}{stats['calls']:>7}{stats['fallbacks']:>11}{stats['avg_seconds']:>9.3f}"
+                f"{stats['input_tokens']:>12}{stats['output_tokens']:>12}{stats['cost_usd']:>10.4f}"
+            )
+        return "\n".join(rows)
+
+
+def parse_mapping(spec: str) -> Dict[str, str]:
+    """Parse comma-separated `name=value` pairs, e.g. "drafter=small,writer=medium" """
+    mapping: Dict[str, str] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = entry.partition("=")
+        if not name.strip() or not value.strip():
+            raise ValueError(f"Invalid mapping entry '{entry}'")
+        mapping[name.strip()] = value.strip()
+    return mapping
+
+
+def build_router(tiers: str = "", routes: str = "") -> ModelRouter:
+    """Create a router from configuration overrides of the default tiers and routes"""
+    route_overrides = parse_mapping(routes)
+    unknown = set(route_overrides.values()) - set(TIER_ORDER)
+    if unknown:
+        raise ValueError(f"Unknown model tier(s): {', '.join(sorted(unknown))}")
+    return ModelRouter(parse_mapping(tiers), route_overrides)
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router built from settings on first use"""
+    global _model_router
+    if _model_router is None:
+        from config import settings
+        _model_router = build_router(settings.model_tiers, settings.model_routes)
+    return _model_router
+
+
+def set_model_router(router: ModelRouter) -> None:
+    """Replace the process-wide router"""
+    global _model_router
+    _model_router = router
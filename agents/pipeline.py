@@ -0,0 +1,223 @@
+"""
+Pipeline - Runs workflow stages as a dependency graph with asyncio
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from agents.checkpoints import CheckpointStore, fingerprint
+from tools.tracing import tracer
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+StageCallback = Callable[["StageResult"], None]
+
+
+class PipelineError(Exception):
+    """Raised when a stage fails or exceeds its timeout"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error!r}")
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """A single unit of work and the stages it depends on"""
+    name: str
+    func: StageFunc
+    depends_on: Sequence[str] = ()
+    timeout: Optional[float] = None
+    condition: Optional[Callable[[Dict[str, Any]], bool]] = None
+    # Checkpointed outputs are reparsed into this type when a run resumes
+    output_type: Optional[Any] = None
+    checkpoint: bool = True
+
+
+@dataclass
+class StageResult:
+    """Outcome and timing of one stage"""
+    name: str
+    status: str
+    output: Any = None
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class PipelineResult:
+    """Outputs and timings of a pipeline run"""
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_time: float = 0.0
+    wall_time: float = 0.0
+
+    @property
+    def outputs(self) -> Dict[str, Any]:
+        return {name: result.output for name, result in self.stages.items()}
+
+    @property
+    def resumed(self) -> List[str]:
+        """Stages whose output was restored from a checkpoint"""
+        return [name for name, result in self.stages.items() if result.status == "resumed"]
+
+
+class Pipeline:
+    """
+    A set of stages with explicit dependencies.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. A stage receives a dict holding the
+    initial context plus the outputs of its dependencies.
+
+    With a checkpoint store and run id, each successful stage output is
+    saved, and a rerun under the same id restores it instead of running the
+    stage again. A checkpoint is only used while its fingerprint (stage
+    name, context and dependency outputs) still matches, so changed inputs
+    invalidate it and everything downstream.
+    """
+
+    def __init__(self, stages: Sequence[Stage], default_timeout: Optional[float] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.default_timeout = default_timeout
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: List[str]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.stages[name].depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    async def run(
+        self,
+        context: Optional[Dict[str, Any]] = None,
+        run_id: Optional[str] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        on_stage: Optional[StageCallback] = None
+    ) -> PipelineResult:
+        """
+        Run all stages and return their outputs with timing information.
+
+        `on_stage` is called with a "running" result when a stage starts and
+        with its final result (success, resumed, skipped, error or timeout)
+        when it ends, e.g. to show progress while the run is in flight.
+        """
+        if checkpoints is not None and run_id is None:
+            raise ValueError("A run_id is required to use checkpoints")
+        context = dict(context or {})
+        result = PipelineResult()
+        tasks: Dict[str, asyncio.Task] = {}
+        start = time.perf_counter()
+
+        def record(stage_result: StageResult) -> None:
+            result.stages[stage_result.name] = stage_result
+            if on_stage is not None:
+                on_stage(stage_result)
+
+        async def execute(stage: Stage) -> Any:
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            inputs = dict(context)
+            inputs.update({dep: result.stages[dep].output for dep in stage.depends_on})
+
+            started = time.perf_counter()
+            if any(result.stages[dep].status == "skipped" for dep in stage.depends_on) or (
+                stage.condition is not None and not stage.condition(inputs)
+            ):
+                record(StageResult(stage.name, "skipped", None, started, started))
+                return None
+
+            checkpointed = checkpoints is not None and stage.checkpoint
+            if checkpointed:
+                stage_fingerprint = fingerprint(
+                    stage.name, context, [result.stages[dep].output for dep in stage.depends_on]
+                )
+                saved = await asyncio.to_thread(checkpoints.load, run_id, stage.name)
+                if saved is not None and saved["fingerprint"] == stage_fingerprint:
+                    output = self._restore(stage, saved["output"])
+                    record(StageResult(stage.name, "resumed", output, started, time.perf_counter()))
+                    return output
+
+            timeout = stage.timeout if stage.timeout is not None else self.default_timeout
+            if on_stage is not None:
+                on_stage(StageResult(stage.name, "running", None, started, started))
+            try:
+                with tracer.span(f"stage.{stage.name}"):
+                    output = await asyncio.wait_for(stage.func(inputs), timeout)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError as e:
+                record(StageResult(stage.name, "timeout", None, started, time.perf_counter()))
+                raise PipelineError(stage.name, e) from e
+            except Exception as e:
+                record(StageResult(stage.name, "error", None, started, time.perf_counter()))
+                raise PipelineError(stage.name, e) from e
+
+            record(StageResult(stage.name, "success", output, started, time.perf_counter()))
+            if checkpointed:
+                await asyncio.to_thread(checkpoints.save, run_id, stage.name, stage_fingerprint, output)
+            return output
+
+        for name in self.order:
+            tasks[name] = asyncio.create_task(execute(self.stages[name]), name=f"stage:{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except PipelineError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        if checkpoints is not None:
+            # The run is complete; nothing is left to resume
+            await asyncio.to_thread(checkpoints.clear, run_id)
+        result.wall_time = time.perf_counter() - start
+        result.critical_path, result.critical_path_time = self._critical_path(result.stages)
+        return result
+
+    @staticmethod
+    def _restore(stage: Stage, output: Any) -> Any:
+        output_type = stage.output_type
+        if isinstance(output, dict) and isinstance(output_type, type) and hasattr(output_type, "parse_obj"):
+            return output_type.parse_obj(output)
+        return output
+
+    def _critical_path(self, stages: Dict[str, StageResult]) -> "tuple[List[str], float]":
+        """Walk back from the last stage to finish through its slowest dependency"""
+        if not stages:
+            return [], 0.0
+        current = max(stages.values(), key=lambda s: s.finished_at)
+        path = [current.name]
+        total = current.duration
+        while self.stages[current.name].depends_on:
+            current = max(
+                (stages[dep] for dep in self.stages[current.name].depends_on),
+                key=lambda s: s.finished_at,
+            )
+            path.append(current.name)
+            total += current.duration
+        path.reverse()
+        return path, total
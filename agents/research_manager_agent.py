@@ -1,113 +1,207 @@
 """
-    Research Manager Agent - Handles all research-related tasks
+Research Manager Agent - Handles all research-related tasks
+"""
+import asyncio
+import hashlib
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent, RunContext
+from tools.web_search_tools import search_web, search_brave
+from tools.tracing import tracer
+from tools.vector_index import TOPIC, VectorIndex, get_vector_index
+
+class ResearchRequest(BaseModel):
+    """Structured input for research tasks"""
+    topic: str = Field(description="Main research topic")
+    keywords: List[str] = Field(description="Keywords to focus on")
+    max_results: Optional[int] = Field(5, description="Maximum results to return")
+
+class ResearchResult(BaseModel):
+    """Structured output for research tasks"""
+    topic: str = Field(description="Research topic")
+    sources: List[str] = Field(description="List of sources used")
+    key_points: List[str] = Field(description="Key findings from research")
+    competitor_analysis: Optional[Dict[str, Any]] = Field(description="Competitor analysis data")
+    keyword_analysis: Optional[Dict[str, Any]] = Field(description="Keyword research data")
+    reused_from: Optional[str] = Field(None, description="Earlier topic whose research was reused")
+    prior_work: List[Dict[str, Any]] = Field(default_factory=list, description="Earlier topics near-duplicating this one")
+
+class ResearchDependencies(BaseModel):
+    """Shared resources for research"""
+    web_search_api_key: Optional[str]
+    supabase_url: str
+    supabase_key: str
+
+research_manager = Agent(
+    "openai:gpt-4",
+    name="research_manager",
+    system_prompt="""
+    You are the Research Manager Agent. Your responsibilities include:
+    1. Conducting comprehensive research on given topics
+    2. Analyzing and synthesizing information from multiple sources
+    3. Coordinating with sub-agents for specialized research
+    4. Presenting findings in a structured format
+    """,
+    deps_type=ResearchDependencies,
+    result_type=ResearchResult,
+    defer_model_check=True
+)
+
+@research_manager.tool
+async def conduct_web_search(ctx: RunContext[ResearchDependencies], query: str) -> Dict[str, Any]:
+    """Conduct web search using available tools"""
+    return await search_web(ctx, query)
+
+async def keyword_analysis(ctx: RunContext[ResearchDependencies], keywords: List[str]) -> Dict[str, Any]:
+    """Stub for KeywordAgent integration"""
+    # TODO: Implement actual KeywordAgent integration
+    return {
+        "primary_keyword": keywords[0] if keywords else "N/A",
+        "secondary_keywords": keywords[1:] if len(keywords) > 1 else [],
+        "search_volume": "N/A",
+        "competition": "N/A"
+    }
+
+async def competitor_analysis(ctx: RunContext[ResearchDependencies], topic: str) -> Dict[str, Any]:
+    """Stub for CompetitorResearchAgent integration"""
+    # TODO: Implement actual CompetitorResearchAgent integration
+    return {
+        "top_competitors": [],
+        "content_gaps": [],
+        "opportunities": []
+    }
+
+# Search angles added to the topic besides the per-keyword queries
+RESEARCH_ANGLES = ["statistics", "trends", "challenges"]
+
+# Upper bound on concurrent web searches for one research request
+MAX_PARALLEL_SEARCHES = 4
+
+def expand_queries(request: ResearchRequest) -> List[str]:
+    """Expand a request into the combined query plus per-keyword and per-angle queries"""
+    queries = [f"{request.topic} {' '.join(request.keywords)}"]
+    queries += [f"{request.topic} {keyword}" for keyword in request.keywords]
+    queries += [f"{request.topic} {angle}" for angle in RESEARCH_ANGLES]
+    return list(dict.fromkeys(query.strip() for query in queries))
+
+def rank_sources(responses: List[Dict[str, Any]]) -> List[str]:
+    """Merge search responses, dedupe by URL and rank by how often and how high each appears"""
+    scores: Dict[str, float] = {}
+    for response in responses:
+        results = response.get("web", {}).get("results") or response.get("results", [])
+        for position, item in enumerate(results):
+            url = item.get("url")
+            if url:
+                scores[url] = scores.get(url, 0.0) + 1.0 / (position + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+async def gather_sources(request: ResearchRequest, deps: ResearchDependencies) -> List[str]:
+    """Run all sub-queries concurrently and return ranked, deduplicated source URLs"""
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_SEARCHES)
+
+    async def search(query: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await search_brave(query, deps.web_search_api_key)
+
+    responses = await asyncio.gather(*(search(query) for query in expand_queries(request)))
+    return rank_sources([r for r in responses if r.get("status") != "error"])
+
+def keyword_set(keywords: List[str]) -> List[str]:
+    return sorted({k.strip().lower() for k in keywords if k.strip()})
+
+def find_prior_work(index: VectorIndex, request: ResearchRequest) -> List[Dict[str, Any]]:
     """
-    from typing import List, Optional, Dict
-    from pydantic import BaseModel, Field
-    from pydantic_ai import Agent, RunContext
-    from tools.web_search_tools import search_web
-
-    class ResearchRequest(BaseModel):
-        """Structured input for research tasks"""
-        topic: str = Field(description="Main research topic")
-        keywords: List[str] = Field(description="Keywords to focus on")
-        max_results: Optional[int] = Field(5, description="Maximum results to return")
-
-    class ResearchResult(BaseModel):
-        """Structured output for research tasks"""
-        topic: str = Field(description="Research topic")
-        sources: List[str] = Field(description="List of sources used")
-        key_points: List[str] = Field(description="Key findings from research")
-        competitor_analysis: Optional[Dict[str, Any]] = Field(description="Competitor analysis data")
-        keyword_analysis: Optional[Dict[str, Any]] = Field(description="Keyword research data")
-
-    class ResearchDependencies(BaseModel):
-        """Shared resources for research"""
-        web_search_api_key: Optional[str]
-        supabase_url: str
-        supabase_key: str
-
-    research_manager = Agent(
-        "openai:gpt-4",
-        system_prompt="""
-        You are the Research Manager Agent. Your responsibilities include:
-        1. Conducting comprehensive research on given topics
-        2. Analyzing and synthesizing information from multiple sources
-        3. Coordinating with sub-agents for specialized research
-        4. Presenting findings in a structured format
-        """,
-        deps_type=ResearchDependencies,
-        result_type=ResearchResult
-    )
+    Earlier topics at least `reuse_threshold` similar to this one.
 
-    @research_manager.tool
-    async def conduct_web_search(ctx: RunContext[ResearchDependencies], query: str) -> Dict[str, Any]:
-        """Conduct web search using available tools"""
-        return await search_web(ctx, query)
-
-    async def keyword_analysis(ctx: RunContext[ResearchDependencies], keywords: List[str]) -> Dict[str, Any]:
-        """Stub for KeywordAgent integration"""
-        # TODO: Implement actual KeywordAgent integration
-        return {
-            "primary_keyword": keywords[0] if keywords else "N/A",
-            "secondary_keywords": keywords[1:] if len(keywords) > 1 else [],
-            "search_volume": "N/A",
-            "competition": "N/A"
+    Only the topic text is compared; keywords shared by different topics
+    would otherwise pull them together.
+    """
+    return [
+        {
+            "topic": match.metadata.get("topic"),
+            "keywords": match.metadata.get("keywords", []),
+            "score": round(match.score, 3),
+            "result": match.metadata.get("result")
         }
+        for match in index.search(request.topic, k=3, kind=TOPIC, threshold=index.reuse_threshold)
+    ]
 
-    async def competitor_analysis(ctx: RunContext[ResearchDependencies], topic: str) -> Dict[str, Any]:
-        """Stub for CompetitorResearchAgent integration"""
-        # TODO: Implement actual CompetitorResearchAgent integration
-        return {
-            "top_competitors": [],
-            "content_gaps": [],
-            "opportunities": []
-        }
+def index_research(index: VectorIndex, request: ResearchRequest, result: ResearchResult) -> None:
+    """Add the topic with its result; written out with the next batch"""
+    topic_id = hashlib.sha1(f"{request.topic.lower()}\n{keyword_set(request.keywords)}".encode()).hexdigest()
+    index.add(
+        f"{TOPIC}:{topic_id}",
+        request.topic,
+        TOPIC,
+        {"topic": request.topic, "keywords": keyword_set(request.keywords), "result": result.dict(exclude={"prior_work"})}
+    )
 
-    async def conduct_research(request: ResearchRequest, deps: ResearchDependencies) -> ResearchResult:
-        """Orchestrate the research workflow"""
-        # Step 1: Conduct web search
-        search_results = await research_manager.run(
-            f"Search for information about: {request.topic}",
-            deps=deps,
-            tools=[conduct_web_search],
-            params={"query": f"{request.topic} {', '.join(request.keywords)}"}
-        )
+async def conduct_research(request: ResearchRequest, deps: ResearchDependencies, reuse: bool = False) -> ResearchResult:
+    """
+    Orchestrate the research workflow.
 
-        # Step 2: Perform keyword analysis
-        keyword_data = await keyword_analysis(deps, request.keywords)
-
-        # Step 3: Perform competitor analysis
-        competitor_data = await competitor_analysis(deps, request.topic)
-
-        # Step 4: Aggregate results
-        return ResearchResult(
-            topic=request.topic,
-            sources=search_results.data.get("results", [])[:request.max_results],
-            key_points=[
-                "Key point 1 based on research",
-                "Key point 2 based on research",
-                "Key point 3 based on research"
-            ],
-            competitor_analysis=competitor_data,
-            keyword_analysis=keyword_data
+    Earlier near-duplicate topics found in the vector index are listed in
+    `prior_work` next to the fresh research. With `reuse=True` the stored
+    research of such a topic is returned instead (marked `reused_from`),
+    but only if it was researched with the same keywords.
+    """
+    index = get_vector_index()
+    prior_work: List[Dict[str, Any]] = []
+    if index is not None:
+        prior_work = await asyncio.to_thread(find_prior_work, index, request)
+        if reuse:
+            same = next((
+                p for p in prior_work
+                if p["result"] and p["keywords"] == keyword_set(request.keywords)
+            ), None)
+            if same is not None:
+                return ResearchResult(**{
+                    **same["result"],
+                    "reused_from": same["topic"],
+                    "prior_work": [{k: v for k, v in p.items() if k != "result"} for p in prior_work]
+                })
+
+    # Searches, keyword analysis and competitor analysis are independent
+    with tracer.span("research.conduct", topic=request.topic):
+        sources, keyword_data, competitor_data = await asyncio.gather(
+            gather_sources(request, deps),
+            keyword_analysis(deps, request.keywords),
+            competitor_analysis(deps, request.topic)
         )
 
-    if __name__ == "__main__":
-        import asyncio
-        from config import settings
+    # Aggregate results
+    result = ResearchResult(
+        topic=request.topic,
+        sources=sources[:request.max_results],
+        key_points=[
+            "Key point 1 based on research",
+            "Key point 2 based on research",
+            "Key point 3 based on research"
+        ],
+        competitor_analysis=competitor_data,
+        keyword_analysis=keyword_data,
+        prior_work=[{k: v for k, v in p.items() if k != "result"} for p in prior_work]
+    )
+    if index is not None:
+        await asyncio.to_thread(index_research, index, request, result)
+    return result
 
-        # Example usage
-        deps = ResearchDependencies(
-            web_search_api_key=settings.BRAVE_API_KEY,
-            supabase_url=settings.SUPABASE_URL,
-            supabase_key=settings.SUPABASE_KEY
-        )
+if __name__ == "__main__":
+    import asyncio
+    from config import settings
 
-        request = ResearchRequest(
-            topic="AI in Healthcare",
-            keywords=["AI", "healthcare", "machine learning"],
-            max_results=3
-        )
+    # Example usage
+    deps = ResearchDependencies(
+        web_search_api_key=settings.BRAVE_API_KEY,
+        supabase_url=settings.SUPABASE_URL,
+        supabase_key=settings.SUPABASE_KEY
+    )
+
+    request = ResearchRequest(
+        topic="AI in Healthcare",
+        keywords=["AI", "healthcare", "machine learning"],
+        max_results=3
+    )
 
-        result = asyncio.run(conduct_research(request, deps))
-        print(result)
+    result = asyncio.run(conduct_research(request, deps))
+    print(result)
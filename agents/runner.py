@@ -0,0 +1,180 @@
+"""
+Agent Runner - Single entry point for running agents
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from agents.cache import AgentCache, cache_key, get_agent_cache
+from agents.model_backends import get_model_backend
+from agents.model_routing import VALIDATION_ERRORS, get_model_router
+from tools.rate_limits import estimate_tokens, rate_limiter
+from tools.resilience import resilience
+from tools.tracing import tracer
+
+
+def _prepare(
+    agent: Any,
+    prompt: str,
+    cache: Optional[AgentCache],
+    model: Optional[str],
+    kwargs: Dict[str, Any]
+) -> Tuple[AgentCache, str]:
+    cache = cache or get_agent_cache()
+    params = kwargs.get("params", {})
+    tools = [getattr(tool, "__name__", str(tool)) for tool in kwargs.get("tools", [])]
+    extra = {"params": params, "tools": tools}
+    if model is not None:
+        # Routed runs are keyed by the model that will answer them
+        extra["model"] = model
+    return cache, cache_key(agent, prompt, extra)
+
+
+def _agent_name(agent: Any) -> str:
+    result_type = getattr(agent, "result_type", None)
+    return getattr(agent, "name", None) or getattr(result_type, "__name__", type(agent).__name__)
+
+
+def _usage(result: Any, prompt_payload: str, data: Any) -> Tuple[int, int]:
+    """Input and output token counts, from provider usage when available, else estimated"""
+    usage = getattr(result, "usage", None) or getattr(result, "cost", None)
+    usage = usage() if callable(usage) else usage
+    input_tokens = getattr(usage, "request_tokens", None)
+    output_tokens = getattr(usage, "response_tokens", None)
+    if input_tokens is None:
+        input_tokens = estimate_tokens(prompt_payload)
+    if output_tokens is None:
+        output_tokens = estimate_tokens(json.dumps(data.dict() if hasattr(data, "dict") else data, default=str))
+    return input_tokens, output_tokens
+
+
+async def _cache_call(cache: AgentCache, method: Callable[..., Any], *args: Any) -> Any:
+    """Run a cache operation, in a worker thread if the backend does blocking IO"""
+    if cache.backend.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+def _model_kwargs(model: Optional[str], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {**kwargs, "model": model} if model is not None else kwargs
+
+
+async def run_agent(
+    agent: Any,
+    prompt: str,
+    *,
+    cache: Optional[AgentCache] = None,
+    bypass_cache: bool = False,
+    cache_ttl: Optional[float] = None,
+    route: Optional[str] = None,
+    **kwargs: Any
+) -> Any:
+    """
+    Run an agent through the response cache, the shared rate limits and
+    the "openai" retry and circuit breaker policy.
+
+    The cache key covers the agent's model, system prompt and result schema,
+    the prompt and `params`; dependencies are not part of the key. Set
+    `bypass_cache` for runs with side effects or to force a fresh answer,
+    and `cache_ttl` to accept only cached answers younger than that many
+    seconds, for runs that read data which changes (settings, the web).
+
+    The model comes from the router's tier for `route` (by default the
+    agent's name); an answer that fails result validation is retried on
+    the next larger tier.
+    """
+    name = _agent_name(agent)
+    router = get_model_router()
+    chain = router.chain(route or name)
+    cache, key = _prepare(agent, prompt, cache, chain[0][1], kwargs)
+    payload = f"{prompt} {kwargs.get('params', {})}"
+
+    with tracer.span("agent.run", agent=name, route=route or name, payload_bytes=len(payload)) as span:
+        if cache.enabled and not bypass_cache:
+            cached = await _cache_call(cache, cache.load, agent, key, cache_ttl)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+        backend = get_model_backend()
+        for attempt, (tier, model) in enumerate(chain):
+            run_kwargs = _model_kwargs(model, kwargs)
+
+            async def call() -> Any:
+                await rate_limiter.acquire_openai(payload)
+                return await agent.run(prompt, **run_kwargs)
+
+            started = time.monotonic()
+            try:
+                if backend is not None:
+                    result = await backend.run(agent, prompt, **run_kwargs)
+                else:
+                    # Runs with side effects (bypass_cache) are not retried after a timeout
+                    result = await resilience.call("openai", call, idempotent=not bypass_cache)
+            except VALIDATION_ERRORS:
+                # resilience.call raises these without a retry or a breaker failure,
+                # so a small tier missing often never blocks the larger ones
+                if attempt == len(chain) - 1:
+                    raise
+                router.record(tier, time.monotonic() - started, estimate_tokens(payload), fell_back=True)
+                continue
+            input_tokens, output_tokens = _usage(result, payload, result.data)
+            router.record(tier, time.monotonic() - started, input_tokens, output_tokens)
+            span.set(model_tier=tier, fallbacks=attempt, input_tokens=input_tokens, output_tokens=output_tokens)
+            break
+        if cache.enabled:
+            await _cache_call(cache, cache.store, key, result.data)
+        return result
+
+
+async def stream_agent(
+    agent: Any,
+    prompt: str,
+    *,
+    cache: Optional[AgentCache] = None,
+    bypass_cache: bool = False,
+    cache_ttl: Optional[float] = None,
+    route: Optional[str] = None,
+    **kwargs: Any
+) -> AsyncIterator[Any]:
+    """
+    Stream partially validated results of an agent run as they arrive.
+
+    The last item yielded is the complete, validated result. A cache hit
+    yields the stored result once; a completed stream is stored like a
+    regular run. Streams use the routed tier's model but do not fall back,
+    since partial results have already been yielded.
+    """
+    name = _agent_name(agent)
+    router = get_model_router()
+    tier, model = router.chain(route or name)[0]
+    cache, key = _prepare(agent, prompt, cache, model, kwargs)
+    payload = f"{prompt} {kwargs.get('params', {})}"
+    kwargs = _model_kwargs(model, kwargs)
+
+    with tracer.span("agent.stream", agent=name, route=route or name, payload_bytes=len(payload)) as span:
+        if cache.enabled and not bypass_cache:
+            cached = await _cache_call(cache, cache.load, agent, key, cache_ttl)
+            if cached is not None:
+                span.set(cache_hit=True)
+                yield cached.data
+                return
+
+        started = time.monotonic()
+        backend = get_model_backend()
+        if backend is not None:
+            stream = backend.run_stream(agent, prompt, **kwargs)
+        else:
+            await rate_limiter.acquire_openai(payload)
+            stream = agent.run_stream(prompt, **kwargs)
+        async with stream as result:
+            async for partial in result.stream():
+                yield partial
+            data = await result.get_data()
+        input_tokens, output_tokens = _usage(result, payload, data)
+        router.record(tier, time.monotonic() - started, input_tokens, output_tokens)
+        span.set(model_tier=tier, input_tokens=input_tokens, output_tokens=output_tokens)
+        if cache.enabled:
+            await _cache_call(cache, cache.store, key, data)
+        yield data
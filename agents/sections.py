@@ -0,0 +1,188 @@
+"""
+Sections - Split, diff and stitch markdown documents section by section
+
+Briefs describe an article as a list of section dicts and drafts render
+each as a markdown chunk under its own heading. Matching the two lets the
+drafter and writer regenerate only the sections whose input changed and
+splice them into the existing text, recomputing word counts and headings
+locally instead of asking the model again.
+"""
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from tools.tracing import metrics, tracer
+
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+WORD = re.compile(r"\S+")
+
+# Keys a brief section may use for its heading, in order of preference
+TITLE_KEYS = ("heading", "title", "name")
+
+
+def section_title(section: Dict[str, Any]) -> str:
+    for key in TITLE_KEYS:
+        if section.get(key):
+            return str(section[key])
+    return ""
+
+
+def normalize(title: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+
+
+def count_words(text: str) -> int:
+    return len(WORD.findall(text))
+
+
+def extract_headings(text: str) -> List[str]:
+    return [match.group(2) for match in HEADING.finditer(text)]
+
+
+def section_level(text: str) -> int:
+    """
+    Heading level that separates sections: the shallowest level below the
+    document title, so a "# Title" and "### sub-points" stay inside chunks.
+    """
+    levels = [len(match.group(1)) for match in HEADING.finditer(text)]
+    deeper = [level for level in levels if level > 1]
+    if deeper:
+        return min(deeper)
+    return min(levels) if levels else 2
+
+
+def split_sections(text: str, level: Optional[int] = None) -> Tuple[str, List[str]]:
+    """The text before the first section heading and one chunk per section, heading included"""
+    level = level or section_level(text)
+    starts = [match.start() for match in HEADING.finditer(text) if len(match.group(1)) == level]
+    if not starts:
+        return text, []
+    bounds = starts + [len(text)]
+    return text[:starts[0]], [text[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+
+
+def chunk_title(chunk: str) -> str:
+    match = HEADING.match(chunk)
+    return match.group(2) if match else ""
+
+
+def with_heading(text: str, title: str, level: int = 2) -> str:
+    """Generated section text, prefixed with its heading unless the model already wrote one"""
+    text = text.strip()
+    if title and not HEADING.match(text):
+        text = f"{'#' * level} {title}\n\n{text}"
+    return text
+
+
+def join_sections(preamble: str, chunks: Sequence[str]) -> str:
+    parts = [preamble.strip()] + [chunk.strip() for chunk in chunks]
+    return "\n\n".join(part for part in parts if part) + "\n"
+
+
+@dataclass
+class RevisionPlan:
+    """
+    How to rebuild a document for a new list of sections.
+
+    `chunks[i]` is the existing text reused for section i, or None when
+    the section changed and has to be regenerated.
+    """
+    preamble: str
+    chunks: List[Optional[str]]
+    level: int
+
+    @property
+    def changed(self) -> List[int]:
+        return [i for i, chunk in enumerate(self.chunks) if chunk is None]
+
+
+def plan_revision(
+    previous: Sequence[Tuple[str, Any]],
+    current: Sequence[Tuple[str, Any]],
+    document: str
+) -> RevisionPlan:
+    """
+    Diff `current` (title, value) sections against `previous` and align
+    them with the chunks of `document`, which was generated from `previous`.
+
+    Sections are matched by normalized title, falling back to position
+    when titles are missing. A section is reused only if its value is
+    unchanged and its chunk can be found in the document; added, edited
+    and unlocatable sections are marked for regeneration, removed ones
+    are dropped.
+    """
+    level = section_level(document)
+    preamble, chunks = split_sections(document, level)
+    if not chunks:
+        # Nothing to align with: every section is regenerated and the old text dropped
+        preamble = ""
+    by_title: Dict[str, str] = {}
+    for chunk in chunks:
+        by_title.setdefault(normalize(chunk_title(chunk)), chunk)
+
+    def located(index: int, title: str) -> Optional[str]:
+        if title and normalize(title) in by_title:
+            return by_title[normalize(title)]
+        return chunks[index] if len(chunks) == len(previous) else None
+
+    unused = list(range(len(previous)))
+    plan: List[Optional[str]] = []
+    for position, (title, value) in enumerate(current):
+        match = next((i for i in unused if title and normalize(previous[i][0]) == normalize(title)), None)
+        if match is None and not title and position in unused and not previous[position][0]:
+            match = position
+        if match is None:
+            plan.append(None)
+            continue
+        unused.remove(match)
+        plan.append(located(match, previous[match][0]) if previous[match][1] == value else None)
+    return RevisionPlan(preamble, plan, level)
+
+
+async def regenerate_sections(
+    plan: RevisionPlan,
+    titles: Sequence[str],
+    generate: Callable[[int], Awaitable[str]],
+    kind: str
+) -> str:
+    """
+    Regenerate the plan's changed sections concurrently and stitch the
+    document back together, in section order.
+
+    `generate(i)` returns the text for section i; a missing heading is added.
+    """
+    changed = plan.changed
+    with tracer.span("sections.regenerate", kind=kind, sections=len(plan.chunks), regenerated=len(changed)):
+        texts = await asyncio.gather(*(generate(i) for i in changed))
+    chunks = list(plan.chunks)
+    for i, text in zip(changed, texts):
+        chunks[i] = with_heading(text, titles[i], plan.level)
+    metrics.inc("sections_regenerated_total", len(changed), kind=kind)
+    metrics.inc("sections_reused_total", len(chunks) - len(changed), kind=kind)
+    return join_sections(plan.preamble, chunks)
+
+
+def section_budgets(sections: Sequence[Dict[str, Any]], total: int) -> List[int]:
+    """
+    Word budget per section: a section's own "word_count" if it has one,
+    otherwise an even share of what the others leave of `total`.
+    """
+    explicit: List[Optional[int]] = []
+    for section in sections:
+        try:
+            explicit.append(max(1, int(section.get("word_count"))))
+        except (TypeError, ValueError):
+            explicit.append(None)
+    open_count = explicit.count(None)
+    share = max(1, (total - sum(n for n in explicit if n)) // open_count) if open_count else 0
+    return [n if n is not None else share for n in explicit]
+
+
+def merge_unique(*lists: Sequence[str]) -> List[str]:
+    """Concatenate lists, keeping the first occurrence of each item"""
+    seen: Dict[str, None] = {}
+    for items in lists:
+        for item in items:
+            seen.setdefault(item, None)
+    return list(seen)
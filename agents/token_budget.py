@@ -0,0 +1,239 @@
+"""
+Token Budget - Per-stage prompt accounting and compaction of forwarded payloads
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.rate_limits import estimate_tokens
+from tools.tracing import metrics, tracer
+
+# Fields kept for each source taken from a raw search response
+SOURCE_FIELDS = ("title", "url", "description")
+
+# Progressively harsher (characters per string, items per list) limits tried until a payload fits
+TRIM_LEVELS: List[Tuple[int, int]] = [(1200, 20), (600, 12), (300, 8), (160, 5), (80, 3)]
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class StagePolicy:
+    """Which parameter a stage forwards from the previous one and how far it may be compacted"""
+    key: str
+    # Fields of the forwarded payload the stage's agent uses; None keeps all of them
+    fields: Optional[Tuple[str, ...]] = None
+    # Fields that are never shortened (e.g. the draft text being polished)
+    protected: Tuple[str, ...] = ()
+    # Prompt budget in tokens for all parameters; 0 only strips and dedupes
+    budget: int = 3000
+
+
+DEFAULT_POLICIES: Dict[str, StagePolicy] = {
+    "outline": StagePolicy("research", budget=3000),
+    "brief": StagePolicy(
+        "research_data",
+        ("topic", "key_points", "sources", "keyword_analysis", "competitor_analysis"),
+        budget=3000,
+    ),
+    "draft": StagePolicy("brief", ("title", "sections", "keywords", "style_guide"), ("sections",), budget=2000),
+    "final": StagePolicy("draft", ("title", "content", "placeholders"), ("content",), budget=6000),
+}
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken is optional (and needs its BPE file); fall back to the estimate
+        return None
+
+
+def count_tokens(value: Any) -> int:
+    """Tokens in a prompt fragment, exact with tiktoken installed, else estimated"""
+    text = value if isinstance(value, str) else json.dumps(value, default=str, separators=(",", ":"))
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding is not None else estimate_tokens(text)
+
+
+def summarize_text(text: str, max_chars: int) -> str:
+    """Extractive summary: the leading distinct sentences that fit in `max_chars`"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    kept: List[str] = []
+    seen = set()
+    size = 0
+    for sentence in SENTENCE_END.split(text):
+        if sentence.lower() in seen:
+            continue
+        if size + len(sentence) > max_chars:
+            break
+        seen.add(sentence.lower())
+        kept.append(sentence)
+        size += len(sentence) + 1
+    if not kept:
+        return text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return " ".join(kept)
+
+
+def search_results(value: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """The results of a raw Brave response reduced to title, URL and description"""
+    web = value.get("web")
+    results = web.get("results") if isinstance(web, dict) else value.get("results")
+    if not isinstance(results, list) or not all(isinstance(item, dict) and item.get("url") for item in results):
+        return None
+    return [{field: item[field] for field in SOURCE_FIELDS if item.get(field)} for item in results]
+
+
+def _identity(value: Any) -> str:
+    if isinstance(value, dict) and value.get("url"):
+        return str(value["url"]).rstrip("/").lower()
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+def prune(value: Any) -> Any:
+    """Collapse search responses, drop empty values and dedupe lists without losing content"""
+    if hasattr(value, "dict"):
+        value = value.dict()
+    if isinstance(value, dict):
+        results = search_results(value)
+        if results is not None:
+            return prune(results)
+        pruned = {key: prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        items: Dict[str, Any] = {}
+        for item in map(prune, value):
+            if item not in (None, "", [], {}):
+                items.setdefault(_identity(item), item)
+        return list(items.values())
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def shrink(value: Any, max_chars: int, max_items: int, protected: Tuple[str, ...] = ()) -> Any:
+    """Summarize long strings and keep the first (highest ranked) items of long lists"""
+    if isinstance(value, dict):
+        return {
+            key: item if key in protected else shrink(item, max_chars, max_items, protected)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [shrink(item, max_chars, max_items, protected) for item in value[:max_items]]
+    if isinstance(value, str):
+        return summarize_text(value, max_chars)
+    return value
+
+
+class TokenBudget:
+    """
+    Compacts the payload each stage forwards to the next agent.
+
+    Fields the receiving agent does not use are dropped, search responses
+    are reduced to their sources and duplicates removed. If the prompt is
+    still over the stage's budget, sources are summarized and cut down in
+    rank order until it fits. Tokens before and after are recorded per
+    stage, on the `prompt.compact` span and as metrics.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, StagePolicy]] = None):
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def compact(self, stage: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return `params` with the stage's forwarded payload compacted to its budget"""
+        policy = self.policies.get(stage)
+        if policy is None or params.get(policy.key) is None:
+            return params
+
+        with tracer.span("prompt.compact", stage=stage) as span:
+            before = count_tokens(params)
+            payload = params[policy.key]
+            if hasattr(payload, "dict"):
+                payload = payload.dict()
+            if policy.fields is not None and isinstance(payload, dict):
+                payload = {field: payload[field] for field in policy.fields if field in payload}
+            payload = prune(payload)
+
+            compacted = {**params, policy.key: payload}
+            after = count_tokens(compacted)
+            for max_chars, max_items in TRIM_LEVELS:
+                if not policy.budget or after <= policy.budget:
+                    break
+                compacted = {**params, policy.key: shrink(payload, max_chars, max_items, policy.protected)}
+                after = count_tokens(compacted)
+
+            span.set(
+                tokens_before=before,
+                tokens_after=after,
+                tokens_saved=before - after,
+                over_budget=bool(policy.budget) and after > policy.budget,
+            )
+            self._record(stage, before, after)
+            return compacted
+
+    def _record(self, stage: str, before: int, after: int) -> None:
+        stats = self.stats.setdefault(stage, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["calls"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        metrics.inc("prompt_tokens_total", after, stage=stage)
+        metrics.inc("prompt_tokens_saved_total", before - after, stage=stage)
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Per-stage calls, tokens before and after compaction, and tokens saved"""
+        return {
+            stage: {**stats, "tokens_saved": stats["tokens_before"] - stats["tokens_after"]}
+            for stage, stats in self.stats.items()
+        }
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """Parse comma-separated `stage=tokens` overrides, e.g. "brief=2500,final=8000" """
+    budgets: Dict[str, int] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        stage, _, tokens = entry.partition("=")
+        if stage.strip() not in DEFAULT_POLICIES or not tokens.strip().isdigit():
+            raise ValueError(f"Invalid token budget '{entry}'")
+        budgets[stage.strip()] = int(tokens)
+    return budgets
+
+
+def build_token_budget(spec: str = "") -> TokenBudget:
+    """Create a budget with the default policies and the given per-stage overrides"""
+    overrides = parse_budgets(spec)
+    return TokenBudget({
+        stage: StagePolicy(policy.key, policy.fields, policy.protected, overrides.get(stage, policy.budget))
+        for stage, policy in DEFAULT_POLICIES.items()
+    })
+
+
+_token_budget: Optional[TokenBudget] = None
+
+
+def get_token_budget() -> TokenBudget:
+    """Process-wide budget built from settings on first use"""
+    global _token_budget
+    if _token_budget is None:
+        from config import settings
+        _token_budget = build_token_budget(settings.token_budgets)
+    return _token_budget
+
+
+def set_token_budget(budget: TokenBudget) -> None:
+    """Replace the process-wide budget"""
+    global _token_budget
+    _token_budget = budget
+
+
+def compact_params(stage: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact a stage's agent parameters with the process-wide budget"""
+    return get_token_budget().compact(stage, params)
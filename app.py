@@ -1,30 +1,75 @@
 import streamlit as st
-    from agents.director import director_agent, BlogOutline
-    from agents.manager import research_agent
-    from agents.sub_agents import drafting_agent
-    from db import save_blog_post
+import time
+from collections import OrderedDict
+from agents.director import director_agent, BlogOutline
+from agents.manager import research_agent
+from agents.sub_agents import drafting_agent
+from db import save_blog_post
+from streamlit_runner import agent_task, get_result_store, get_runner
 
-    st.title("Auto-Blogging Platform")
+st.title("Auto-Blogging Platform")
 
-    topic = st.text_input("Enter blog topic:")
-    if topic:
-        outline = director_agent.run_sync(f"Create outline for: {topic}")
-        research = research_agent.run_sync(f"Research: {topic}")
-        draft = drafting_agent.run_sync(f"Write blog post about: {topic}")
+# Agents shown for a topic: (agent, prompt template, heading)
+AGENTS = {
+    "outline": (director_agent, "Create outline for: {topic}", "Blog Outline"),
+    "research": (research_agent, "Research: {topic}", "Research Data"),
+    "draft": (drafting_agent, "Write blog post about: {topic}", "Draft Content"),
+}
 
-        st.write("## Blog Outline")
-        st.json(outline.data.dict())
+# Topics whose results a session keeps on screen and can publish
+MAX_SESSION_TOPICS = 5
 
-        st.write("## Research Data")
-        st.json(research.data.dict())
+# Per session: the runs and results shown for each recent topic, newest last
+session = st.session_state.setdefault("topics", OrderedDict())
+store = get_result_store()
 
-        st.write("## Draft Content")
-        st.json(draft.data.dict())
+topic = st.text_input("Enter blog topic:")
+if topic:
+    shown = session.setdefault(topic, {"handles": {}, "results": {}, "fresh": set()})
+    session.move_to_end(topic)
+    while len(session) > MAX_SESSION_TOPICS:
+        session.popitem(last=False)
 
+    # Runs are shared across reruns and sessions; only a missing one calls the model,
+    # and a regenerated one skips the response cache as well
+    for name, (agent, prompt, _) in AGENTS.items():
+        if name not in shown["handles"]:
+            fresh = name in shown["fresh"]
+            shown["handles"][name] = store.get_or_submit(name, topic, agent_task(agent, prompt.format(topic=topic), fresh))
+            shown["fresh"].discard(name)
+
+    for name, (_, _, heading) in AGENTS.items():
+        handle = shown["handles"][name]
+        st.write(f"## {heading}")
+        if handle.status == "succeeded":
+            shown["results"][name] = handle.result()
+            st.json(shown["results"][name])
+        elif handle.status == "running":
+            st.caption("Generating...")
+        else:
+            st.error(f"Generation failed: {handle.error()}")
+        if handle.done() and st.button(f"Regenerate {name}", key=f"regenerate-{name}"):
+            store.invalidate(name, topic)
+            del shown["handles"][name]
+            shown["results"].pop(name, None)
+            shown["fresh"].add(name)
+            st.rerun()
+
+    if st.button("Regenerate all"):
+        for name in AGENTS:
+            store.invalidate(name, topic)
+        session[topic] = {"handles": {}, "results": {}, "fresh": set(AGENTS)}
+        st.rerun()
+
+    if all(name in shown["results"] for name in AGENTS):
         if st.button("Publish"):
-            save_blog_post({
-                "title": outline.data.title,
-                "content": draft.data.dict(),
-                "research": research.data.dict()
-            })
+            # Saves exactly what is displayed above; nothing is regenerated
+            get_runner().run(save_blog_post({
+                "title": shown["results"]["outline"]["title"],
+                "content": shown["results"]["draft"],
+                "research": shown["results"]["research"]
+            }))
             st.success("Blog post published!")
+    elif any(handle.status == "running" for handle in shown["handles"].values()):
+        time.sleep(0.5)
+        st.rerun()
@@ -0,0 +1,85 @@
+"""
+Benchmark - Per-call httpx clients versus the pooled client registry
+
+Starts a local stub HTTP server and compares request latency when a new
+AsyncClient is opened for every call (the previous tool behaviour) with the
+shared HTTPClientRegistry.
+
+    python -m benchmarks.bench_http_clients --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks.common import percentile
+from tools.http_clients import HTTPClientRegistry
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"results": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def per_call_client(url, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            (await client.get(url)).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def pooled_client(url, n):
+    registry = HTTPClientRegistry()
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        (await registry.get("stub").get(url)).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    await registry.aclose()
+    return samples
+
+
+def report(name, samples):
+    print(
+        f"{name:<16} p50={statistics.median(samples) * 1000:7.2f}ms "
+        f"p95={percentile(samples, 95) * 1000:7.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/res/v1/web/search"
+
+    try:
+        report("per-call client", asyncio.run(per_call_client(url, args.requests)))
+        report("pooled client", asyncio.run(pooled_client(url, args.requests)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
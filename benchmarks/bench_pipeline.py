@@ -0,0 +1,119 @@
+"""
+Benchmark - Orchestration throughput and latency with the offline model
+
+Runs create_blog_post, conduct_research and generate_blogs against FakeModel
+at several sizes and prints throughput, p50/p95/p99 latency and peak RSS.
+Nothing leaves the machine: the model is faked, searches use the dummy
+fallback, and the response cache and checkpoints are disabled so every run
+does full work.
+
+    python -m benchmarks.bench_pipeline --sizes 1 10 100 1000 --latency 0.5
+
+The per-tier model routing stats (calls, latency, tokens and estimated
+cost) follow the table. With --trace, a per-span summary (stage, agent and
+tool timings, cache hits and tokens) is printed as well.
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from agents.cache import build_cache, set_agent_cache
+from agents.checkpoints import set_checkpoint_store
+from agents.director_agent import BlogRequest, DirectorDependencies, create_blog_post, generate_blogs
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import get_model_router
+from agents.research_manager_agent import ResearchDependencies, ResearchRequest, conduct_research
+from benchmarks.common import summarize
+from tools.rate_limits import DEFAULT_LIMITS, rate_limiter
+from tools.tracing import configure_tracing, metrics
+from tools.vector_index import set_vector_index
+
+# Model-dispatched tool steps, so storing a post never reaches Supabase
+DEPS = DirectorDependencies(
+    supabase_url="bench", supabase_key="bench", wordpress_url=None, wordpress_creds=None, execution_mode="llm"
+)
+RESEARCH_DEPS = ResearchDependencies(web_search_api_key=None, supabase_url="bench", supabase_key="bench")
+
+
+def blog_request(i: int) -> BlogRequest:
+    return BlogRequest(
+        user_id=f"user-{i % 10}",
+        topic=f"Benchmark topic {i}",
+        keywords=["AI", "healthcare"],
+        content_type="blog post",
+        publish=True,
+    )
+
+
+async def timed(call: Callable[[], Awaitable[object]]) -> float:
+    started = time.perf_counter()
+    await call()
+    return time.perf_counter() - started
+
+
+async def bench_create_blog_post(n: int) -> List[float]:
+    return await asyncio.gather(*(timed(lambda i=i: create_blog_post(blog_request(i), DEPS)) for i in range(n)))
+
+
+async def bench_conduct_research(n: int) -> List[float]:
+    def research(i: int):
+        return conduct_research(ResearchRequest(topic=f"Benchmark topic {i}", keywords=["AI", "health"]), RESEARCH_DEPS)
+    return await asyncio.gather(*(timed(lambda i=i: research(i)) for i in range(n)))
+
+
+def bench_batch(concurrency: int) -> Callable[[int], Awaitable[List[float]]]:
+    async def run(n: int) -> List[float]:
+        return [item.duration async for item in generate_blogs(
+            [blog_request(i) for i in range(n)], DEPS, max_concurrency=concurrency
+        )]
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Fake model jitter in seconds")
+    parser.add_argument("--concurrency", type=int, default=50, help="max_concurrency for generate_blogs")
+    parser.add_argument("--trace", action="store_true", help="Print per-span metrics after the run")
+    args = parser.parse_args()
+
+    if args.trace:
+        configure_tracing([metrics])
+
+    set_model_backend(FakeModel(latency=args.latency, jitter=args.jitter))
+    set_agent_cache(build_cache("none", "", 0, None))
+    set_checkpoint_store(None)
+    # Research reuse would turn repeated benchmark topics into index hits
+    set_vector_index(None)
+    # Measure orchestration, not provider quotas
+    rate_limiter.configure({name: 1e9 for name in DEFAULT_LIMITS})
+
+    scenarios: Dict[str, Callable[[int], Awaitable[List[float]]]] = {
+        "create_blog_post": bench_create_blog_post,
+        "conduct_research": bench_conduct_research,
+        "generate_blogs": bench_batch(args.concurrency),
+    }
+
+    print(f"{'scenario':<18}{'posts':>7}{'posts/s':>10}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'peak RSS MB':>13}")
+    for name, scenario in scenarios.items():
+        for size in args.sizes:
+            started = time.perf_counter()
+            latencies = asyncio.run(scenario(size))
+            stats = summarize(latencies, time.perf_counter() - started)
+            print(
+                f"{name:<18}{size:>7}{stats['throughput']:>10.2f}{stats['p50']:>9.3f}"
+                f"{stats['p95']:>9.3f}{stats['p99']:>9.3f}{stats['peak_rss_mb']:>13.1f}"
+            )
+
+    print()
+    print(get_model_router().summary_table())
+
+    if args.trace:
+        print()
+        print(metrics.summary_table())
+
+
+if __name__ == "__main__":
+    main()
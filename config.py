@@ -1,12 +1,68 @@
 import os
+from typing import Optional
+try:
+    from pydantic_settings import BaseSettings
+except ImportError:  # pydantic v1
     from pydantic import BaseSettings
 
-    class Settings(BaseSettings):
-        supabase_url: str
-        supabase_key: str
-        openai_api_key: str
+class Settings(BaseSettings):
+    supabase_url: str
+    supabase_key: str
+    openai_api_key: str
+    brave_api_key: Optional[str] = None
+    wordpress_url: Optional[str] = None
+    wordpress_username: Optional[str] = None
+    wordpress_password: Optional[str] = None
 
-        class Config:
-            env_file = ".env"
+    # "openai" or "fake" (offline, deterministic results for tests and benchmarks)
+    llm_backend: str = "openai"
+    fake_model_latency: float = 0.5
+    fake_model_jitter: float = 0.1
 
-    settings = Settings()
+    # Agent response cache: "memory", "sqlite" or "none"
+    agent_cache_backend: str = "memory"
+    agent_cache_path: str = ".cache/agent_runs.sqlite"
+    agent_cache_max_entries: int = 10000
+    agent_cache_ttl: Optional[float] = 7 * 24 * 3600
+
+    # Brave search results, kept in memory and on disk across runs
+    search_cache_path: str = ".cache/search_results.sqlite"
+    search_cache_ttl: Optional[float] = 24 * 3600
+
+    # Comma-separated span sinks: "jsonl", "metrics", "otel"; empty disables tracing
+    tracing: str = ""
+    tracing_path: str = ".cache/traces.jsonl"
+
+    # Generation jobs: "sqlite" (single machine) or "supabase" (shared "blog_jobs" table)
+    job_queue_backend: str = "sqlite"
+    job_queue_path: str = ".cache/jobs.sqlite"
+    job_lease_seconds: float = 300.0
+
+    # Pipeline stage checkpoints for resuming failed runs: "file", "supabase" or "none"
+    checkpoint_backend: str = "file"
+    checkpoint_dir: str = ".cache/checkpoints"
+    # Seconds a failed run stays resumable; older checkpoints are deleted when the store opens
+    checkpoint_ttl: Optional[float] = 7 * 24 * 3600
+
+    # Per-stage prompt budgets in tokens, e.g. "brief=2500,final=8000"; 0 disables trimming
+    token_budgets: str = ""
+
+    # Model routing overrides: "route=tier" pairs (tiers: small, medium, large) and
+    # "tier=model" pairs, e.g. MODEL_ROUTES="drafter=small" MODEL_TIERS="small=openai:gpt-4o-mini"
+    model_routes: str = ""
+    model_tiers: str = ""
+
+    # Director tool steps (preferences, store, publish): "direct" or "llm" (model-dispatched)
+    director_execution: str = "direct"
+
+    # Local embedding index of past topics and stored posts, e.g. ".cache/vector_index"; empty disables it
+    vector_index_dir: str = ""
+    vector_index_lsh_bits: int = 0
+    # Cosine similarity above which an earlier topic is surfaced as prior work / a post is flagged as a duplicate
+    topic_reuse_threshold: float = 0.95
+    duplicate_post_threshold: float = 0.9
+
+    class Config:
+        env_file = ".env"
+
+settings = Settings()
@@ -1,7 +1,10 @@
-from supabase import create_client
-    from config import settings
+from config import settings
+from tools.supabase_pool import get_supabase_client
+from tools.blog_post_writer import get_blog_post_writer
 
-    supabase = create_client(settings.supabase_url, settings.supabase_key)
+def get_supabase():
+    return get_supabase_client(settings.supabase_url, settings.supabase_key)
 
-    def save_blog_post(content: dict):
-        return supabase.table("blog_posts").insert(content).execute()
+async def save_blog_post(content: dict):
+    """Store a post through the shared writer, batched with concurrent saves"""
+    return await get_blog_post_writer(settings.supabase_url, settings.supabase_key).save(content)
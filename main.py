@@ -1,27 +1,60 @@
 """
-    Main entry point for the application
-    """
-    from agents.director_agent import director_agent
-    from agents.managers.research_manager_agent import research_manager
-    from tools.supabase_tools import save_blog_post
-
-    async def generate_blog(topic: str):
-        # Step 1: Create outline
-        outline = await director_agent.run(f"Create outline for: {topic}")
-        
-        # Step 2: Conduct research
-        research = await research_manager.run(f"Research: {topic}")
-        
-        # Step 3: Save to database
-        await save_blog_post({
+Main entry point for the application
+"""
+from typing import Any, Dict, Optional
+from agents.director_agent import director_agent, DEFAULT_STAGE_TIMEOUT
+from agents.managers.research_manager_agent import research_manager
+from agents.pipeline import Pipeline, Stage
+from agents.runner import run_agent
+from db import save_blog_post
+from tools.http_clients import shutdown_http_clients
+from tools.blog_post_writer import replay_blog_post_spill, shutdown_blog_post_writers
+from tools.tracing import configure_tracing_from_settings, metrics, tracer
+
+async def generate_blog(topic: str, stage_timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT):
+    async def create_outline(inputs: Dict[str, Any]):
+        return await run_agent(director_agent, f"Create outline for: {topic}")
+
+    async def conduct_research(inputs: Dict[str, Any]):
+        return await run_agent(research_manager, f"Research: {topic}")
+
+    async def save(inputs: Dict[str, Any]):
+        # Batched with concurrent saves by the shared blog_posts writer
+        return await save_blog_post({
             "topic": topic,
-            "outline": outline.data.dict(),
-            "research": research.data.dict()
+            "outline": inputs["outline"].data.dict(),
+            "research": inputs["research"].data.dict()
         })
 
-        return {"status": "success", "outline": outline, "research": research}
+    # Outline and research are independent, saving needs both
+    run = await Pipeline([
+        Stage("outline", create_outline),
+        Stage("research", conduct_research),
+        Stage("save", save, depends_on=("outline", "research")),
+    ], default_timeout=stage_timeout).run()
+
+    return {
+        "status": "success",
+        "outline": run.outputs["outline"],
+        "research": run.outputs["research"],
+        "critical_path_time": run.critical_path_time
+    }
+
+if __name__ == "__main__":
+    import asyncio
+    from config import settings
+
+    configure_tracing_from_settings(settings)
+
+    async def run():
+        try:
+            await replay_blog_post_spill(settings.supabase_url, settings.supabase_key)
+            return await generate_blog("AI in Healthcare")
+        finally:
+            await shutdown_blog_post_writers()
+            await shutdown_http_clients()
 
-    if __name__ == "__main__":
-        import asyncio
-        result = asyncio.run(generate_blog("AI in Healthcare"))
-        print(result)
+    result = asyncio.run(run())
+    print(result)
+    if metrics in tracer.sinks:
+        print(metrics.summary_table())
@@ -1,82 +1,133 @@
 """
-    Streamlit UI for testing the multi-agent system
-    """
-    import streamlit as st
-    from pydantic_ai import RunContext
-    from agents.director_agent import director_agent, BlogRequest, DirectorDependencies
-    from config import settings
-    import asyncio
+Streamlit UI for testing the multi-agent system
+"""
+import streamlit as st
+from pydantic_ai import RunContext
+from agents.director_agent import BlogRequest, DirectorDependencies
+from config import settings
+from tools.tracing import configure_tracing_from_settings
+from agents.job_worker import enqueue_blog_post
+from tools.job_queue import get_job_queue
+from streamlit_runner import blog_post_task, get_runner
+import time
+
+configure_tracing_from_settings(settings)
+
+# Page configuration
+st.set_page_config(page_title="Auto-Blogging Platform", layout="wide")
+st.title("Auto-Blogging Platform")
+
+# Sidebar for user input
+with st.sidebar:
+    st.header("Content Parameters")
+    user_id = st.text_input("User ID", "user_123")
+    topic = st.text_input("Topic", "AI in Healthcare")
+    keywords = st.text_input("Keywords (comma separated)", "AI, healthcare, machine learning")
+    content_type = st.selectbox("Content Type", ["blog post", "article", "white paper"])
+    publish = st.checkbox("Publish Content", value=False)
+    background = st.checkbox(
+        "Run in background",
+        value=True,
+        help="Queue the post for the workers (python -m agents.job_worker); it survives page refreshes"
+    )
 
-    # Page configuration
-    st.set_page_config(page_title="Auto-Blogging Platform", layout="wide")
-    st.title("Auto-Blogging Platform")
+# Main content area
+if st.button("Generate Content"):
+    try:
+        # Prepare dependencies
+        deps = DirectorDependencies(
+            supabase_url=settings.SUPABASE_URL,
+            supabase_key=settings.SUPABASE_KEY,
+            wordpress_url=settings.WORDPRESS_URL,
+            wordpress_creds={
+                "username": settings.WORDPRESS_USERNAME,
+                "password": settings.WORDPRESS_PASSWORD
+            },
+            execution_mode=settings.director_execution
+        )
 
-    # Sidebar for user input
-    with st.sidebar:
-        st.header("Content Parameters")
-        user_id = st.text_input("User ID", "user_123")
-        topic = st.text_input("Topic", "AI in Healthcare")
-        keywords = st.text_input("Keywords (comma separated)", "AI, healthcare, machine learning")
-        content_type = st.selectbox("Content Type", ["blog post", "article", "white paper"])
-        publish = st.checkbox("Publish Content", value=False)
+        # Create request
+        request = BlogRequest(
+            user_id=user_id,
+            topic=topic,
+            keywords=[k.strip() for k in keywords.split(",")],
+            content_type=content_type,
+            publish=publish
+        )
 
-    # Main content area
-    if st.button("Generate Content"):
-        with st.spinner("Creating your content..."):
-            try:
-                # Prepare dependencies
-                deps = DirectorDependencies(
-                    supabase_url=settings.SUPABASE_URL,
-                    supabase_key=settings.SUPABASE_KEY,
-                    wordpress_url=settings.WORDPRESS_URL,
-                    wordpress_creds={
-                        "username": settings.WORDPRESS_USERNAME,
-                        "password": settings.WORDPRESS_PASSWORD
-                    }
-                )
+        if background:
+            job_id = enqueue_blog_post(request)
+            st.info(f"Queued job {job_id}")
+        else:
+            # Runs on the shared background loop; later reruns only poll the handle,
+            # which streams the outline's text as it is generated
+            st.session_state["generation"] = get_runner().submit(
+                blog_post_task(request, deps), name=request.topic
+            )
 
-                # Create request
-                request = BlogRequest(
-                    user_id=user_id,
-                    topic=topic,
-                    keywords=[k.strip() for k in keywords.split(",")],
-                    content_type=content_type,
-                    publish=publish
-                )
+    except Exception as e:
+        st.error(f"Error generating content: {str(e)}")
+        st.json({"status": "error", "message": str(e)})
 
-                # Run the Director Agent
-                result = asyncio.run(director_agent.run_sync(
-                    f"Create content for: {topic}",
-                    deps=deps,
-                    params=request.dict()
-                ))
+# The inline generation of this session, rendered from its progress on every rerun
+generation = st.session_state.get("generation")
+if generation is not None:
+    progress = generation.progress
+    st.subheader("Stages")
+    for name, status in progress.get("stages", {}).items():
+        st.markdown(f"- **{name}**: {status}")
+    st.subheader("Content")
+    st.markdown(progress.get("content", ""))
 
-                # Display results
-                st.success("Content generated successfully!")
-                st.subheader("Results")
-                st.json(result.data.dict())
+    if generation.status == "running":
+        st.info(f"Generating ({progress.get('stage', 'starting')}, {generation.elapsed():.0f}s)")
+    elif generation.status == "succeeded":
+        result = generation.result()
+        st.success("Content generated successfully!")
+        st.subheader("Results")
+        st.json(result)
+        if result.get("content_url"):
+            st.markdown(f"**Published URL:** [{result['content_url']}]({result['content_url']})")
+    elif generation.error() is not None:
+        st.error(f"Error generating content: {generation.error()}")
+        st.json({"status": "error", "message": str(generation.error())})
 
-                if result.data.content_url:
-                    st.markdown(f"**Published URL:** [{result.data.content_url}]({result.data.content_url})")
+# The user's recent jobs, read from the queue so they survive page refreshes
+jobs = [job.to_dict() for job in get_job_queue().list(limit=50) if job.payload.get("user_id") == user_id][:10]
+if jobs:
+    st.subheader("Jobs")
+    for job in jobs:
+        label = f"{job['payload']['topic']} - {job['status']} (attempt {job['attempts']}/{job['max_attempts']})"
+        with st.expander(label, expanded=job["status"] == "succeeded"):
+            if job["result"]:
+                st.json(job["result"])
+                if job["result"].get("content_url"):
+                    st.markdown(f"**Published URL:** [{job['result']['content_url']}]({job['result']['content_url']})")
+            if job["error"]:
+                st.error(job["error"])
 
-            except Exception as e:
-                st.error(f"Error generating content: {str(e)}")
-                st.json({"status": "error", "message": str(e)})
+# Future authentication note
+st.markdown("""
+### Future Authentication
+To add user authentication:
+1. Use Supabase auth in the sidebar
+2. Store user session in st.session_state
+3. Pass auth token to agents via dependencies
+""")
 
-    # Future authentication note
-    st.markdown("""
-    ### Future Authentication
-    To add user authentication:
-    1. Use Supabase auth in the sidebar
-    2. Store user session in st.session_state
-    3. Pass auth token to agents via dependencies
-    """)
+# Error handling reference
+st.markdown("""
+### Error Handling
+The UI handles errors by:
+1. Catching exceptions with try/except
+2. Displaying structured error messages
+3. Following PydanticAI's error handling patterns
+""")
 
-    # Error handling reference
-    st.markdown("""
-    ### Error Handling
-    The UI handles errors by:
-    1. Catching exceptions with try/except
-    2. Displaying structured error messages
-    3. Following PydanticAI's error handling patterns
-    """)
+# Poll until the inline generation and every queued job have finished
+if generation is not None and generation.status == "running":
+    time.sleep(0.5)
+    st.rerun()
+if any(job["status"] in ("queued", "running") for job in jobs):
+    time.sleep(2)
+    st.rerun()
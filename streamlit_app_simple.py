@@ -1,43 +1,51 @@
 import streamlit as st
-    from agents.director_agent import BlogRequest, DirectorDependencies
-    import asyncio
+from agents.director_agent import BlogRequest, DirectorDependencies
+from agents.model_backends import FakeModel, set_model_backend
+from streamlit_runner import blog_post_task, get_runner
+import time
 
-    st.title("Auto-Blogging Platform (WebContainer Demo)")
+st.title("Auto-Blogging Platform (WebContainer Demo)")
 
-    # Simplified UI
-    topic = st.text_input("Enter blog topic:", "AI in Healthcare")
-    if st.button("Generate Content"):
-        with st.spinner("Creating content..."):
-            try:
-                # Create test request
-                request = BlogRequest(
-                    user_id="webcontainer_user",
-                    topic=topic,
-                    keywords=["AI", "healthcare"],
-                    content_type="blog post",
-                    publish=False
-                )
+# Offline demo: the real pipeline streams from the fake model, and the tool
+# steps are model-dispatched so nothing reaches Supabase or WordPress
+set_model_backend(FakeModel())
 
-                # Create test dependencies
-                deps = DirectorDependencies(
-                    supabase_url="test_url",
-                    supabase_key="test_key"
-                )
+# Simplified UI
+topic = st.text_input("Enter blog topic:", "AI in Healthcare")
+if st.button("Generate Content"):
+    try:
+        # Create test request
+        request = BlogRequest(
+            user_id="webcontainer_user",
+            topic=topic,
+            keywords=["AI", "healthcare"],
+            content_type="blog post",
+            publish=False
+        )
 
-                # Simulate result
-                st.success("Demo content created successfully!")
-                st.json({
-                    "status": "success",
-                    "message": "This is a demo result",
-                    "content": {
-                        "title": f"Exploring {topic}",
-                        "sections": [
-                            "Introduction to the topic",
-                            "Current trends and developments",
-                            "Future outlook"
-                        ]
-                    }
-                })
+        # Create test dependencies
+        deps = DirectorDependencies(
+            supabase_url="test_url",
+            supabase_key="test_key",
+            execution_mode="llm"
+        )
 
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        st.session_state["generation"] = get_runner().submit(blog_post_task(request, deps), name=topic)
+
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+
+# Rendered from the run's progress on every rerun, so the text grows as it streams
+generation = st.session_state.get("generation")
+if generation is not None:
+    progress = generation.progress
+    st.markdown(progress.get("content", ""))
+    if generation.status == "running":
+        st.info(f"Creating content ({progress.get('stage', 'starting')})...")
+        time.sleep(0.5)
+        st.rerun()
+    elif generation.status == "succeeded":
+        st.success("Demo content created successfully!")
+        st.json(generation.result())
+    else:
+        st.error(f"Error: {generation.error()}")
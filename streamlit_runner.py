@@ -0,0 +1,257 @@
+"""
+Streamlit Runner - Shared background event loop for the Streamlit apps
+
+Streamlit reruns the whole script on every interaction, and each rerun
+used to start its own event loop with asyncio.run. The runner keeps one
+loop alive on a daemon thread for the whole process: scripts submit
+coroutines, keep the returned handle in st.session_state and poll it on
+later reruns, so a rerun never blocks on or restarts a generation. Shared
+async resources (HTTP clients, Supabase writers) live on that loop too.
+"""
+import asyncio
+import atexit
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+RUNNING, SUCCEEDED, FAILED, CANCELLED = "running", "succeeded", "failed", "cancelled"
+
+
+class TaskHandle:
+    """
+    A submitted coroutine, safe to keep in st.session_state across reruns.
+
+    The coroutine reports progress with `update(...)`; the script reads it
+    with `progress` and renders it on the next rerun.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._progress: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def update(self, **progress: Any) -> None:
+        """Record progress from the running coroutine"""
+        with self._lock:
+            self._progress.update(progress)
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._progress)
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    @property
+    def status(self) -> str:
+        if not self.done():
+            return RUNNING
+        if self.future.cancelled():
+            return CANCELLED
+        return FAILED if self.future.exception() is not None else SUCCEEDED
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """The coroutine's return value, waiting up to `timeout` seconds; re-raises its error"""
+        return self.future.result(timeout)
+
+    def error(self) -> Optional[BaseException]:
+        if not self.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def cancel(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+
+class BackgroundRunner:
+    """Runs coroutines on one event loop owned by a daemon thread"""
+
+    def __init__(self, name: str = "streamlit-runner"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, make: Callable[[TaskHandle], Awaitable[Any]], name: str = "") -> TaskHandle:
+        """
+        Start `make(handle)` on the background loop and return its handle at once.
+
+        `make` receives the handle so the coroutine can report progress.
+        """
+        handle = TaskHandle(name)
+
+        async def run() -> Any:
+            try:
+                return await make(handle)
+            finally:
+                handle.finished = time.time()
+
+        handle.future = asyncio.run_coroutine_threadsafe(run(), self.loop)
+        return handle
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the background loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def shutdown(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None, timeout: float = 10.0) -> None:
+        """Run `cleanup` on the loop (e.g. closing shared clients), then stop it"""
+        if not self.loop.is_running():
+            return
+        if cleanup is not None:
+            try:
+                self.run(cleanup(), timeout)
+            except (CancelledError, Exception):
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        if not self.thread.is_alive():
+            self.loop.close()
+
+
+class ResultStore:
+    """
+    Process-wide memo of background runs keyed by (name, topic).
+
+    Works like st.cache_data for coroutines: the first request for a key
+    submits the run, every later request (from any rerun or session) gets
+    the same handle, and concurrent requests share one run. At most
+    `max_entries` runs are kept, least recently used first out, each for
+    up to `ttl` seconds. Failed and cancelled runs are dropped so the next
+    request retries.
+    """
+
+    def __init__(self, runner: Optional[BackgroundRunner] = None, max_entries: int = 128, ttl: Optional[float] = None):
+        self.runner = runner
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.handles: "OrderedDict[Tuple[str, str], TaskHandle]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, topic: str) -> Tuple[str, str]:
+        return name, " ".join(topic.split()).lower()
+
+    def _usable(self, handle: TaskHandle) -> bool:
+        if handle.status in (FAILED, CANCELLED):
+            return False
+        return self.ttl is None or time.time() - handle.started <= self.ttl
+
+    def get_or_submit(self, name: str, topic: str, make: Callable[[TaskHandle], Awaitable[Any]]) -> TaskHandle:
+        """The stored run for the key, or a new run of `make` if there is none"""
+        key = self.key(name, topic)
+        with self.lock:
+            handle = self.handles.get(key)
+            if handle is not None and self._usable(handle):
+                self.hits += 1
+                self.handles.move_to_end(key)
+                return handle
+            self.misses += 1
+            handle = (self.runner or get_runner()).submit(make, name=topic)
+            self.handles[key] = handle
+            self.handles.move_to_end(key)
+            while len(self.handles) > self.max_entries:
+                self.handles.popitem(last=False)
+            return handle
+
+    def invalidate(self, name: str, topic: str) -> None:
+        """Forget the stored run so the next request regenerates it"""
+        with self.lock:
+            self.handles.pop(self.key(name, topic), None)
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+
+_runner: Optional[BackgroundRunner] = None
+_result_store: Optional[ResultStore] = None
+_runner_lock = threading.Lock()
+
+
+async def _close_shared_clients() -> None:
+    from tools.blog_post_writer import shutdown_blog_post_writers
+    from tools.http_clients import shutdown_http_clients
+    await shutdown_blog_post_writers()
+    await shutdown_http_clients()
+
+
+def agent_task(agent: Any, prompt: str, fresh: bool = False) -> Callable[[TaskHandle], Awaitable[dict]]:
+    """
+    A submittable run of one agent returning its result as a dict.
+
+    Runs go through run_agent for the response cache, rate limits, retries
+    and model routing. `fresh` skips the cached answer, as Regenerate must,
+    and replaces it with the new one.
+    """
+    async def run(handle: TaskHandle) -> dict:
+        from agents.runner import run_agent
+        result = await run_agent(agent, prompt, bypass_cache=fresh)
+        return result.data.dict()
+    return run
+
+
+def blog_post_task(request: Any, deps: Any) -> Callable[[TaskHandle], Awaitable[dict]]:
+    """
+    A submittable run of the blog pipeline that reports into its handle.
+
+    The handle's progress holds the current `stage`, every stage's status
+    under `stages`, and under `content` the post text as the outline
+    streams in: the same text that is stored and published.
+    """
+    async def run(handle: TaskHandle) -> dict:
+        from agents.director_agent import blog_post_from_outline, create_blog_post
+        stages: Dict[str, str] = {}
+
+        def on_stage(stage: Any) -> None:
+            stages[stage.name] = stage.status
+            handle.update(stage=stage.name, stages=dict(stages))
+            if stage.name == "outline" and stage.output is not None:
+                # Complete, or restored from a checkpoint without streaming
+                on_outline(stage.output)
+
+        def on_outline(outline: Any) -> None:
+            handle.update(content=blog_post_from_outline(request, outline).content)
+
+        result = await create_blog_post(request, deps, on_stage=on_stage, on_outline=on_outline)
+        return result.dict()
+    return run
+
+
+def get_runner() -> BackgroundRunner:
+    """
+    Process-wide runner, started on first use.
+
+    Streamlit keeps imported modules across reruns and sessions, so every
+    script run shares this loop. Shared clients are closed at exit.
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = BackgroundRunner()
+            atexit.register(_runner.shutdown, _close_shared_clients)
+        return _runner
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide result store on the shared runner, kept for a day per entry"""
+    global _result_store
+    with _runner_lock:
+        if _result_store is None:
+            _result_store = ResultStore(max_entries=128, ttl=24 * 3600)
+        return _result_store
@@ -0,0 +1,7 @@
+-- Key the write-behind writer upserts blog posts on (tools/blog_post_writer.py).
+-- A hash of the row's content, so a retried or replayed save updates the stored
+-- post instead of inserting it twice. Rows saved before this migration keep NULL.
+alter table blog_posts add column if not exists idempotency_key text;
+
+create unique index if not exists blog_posts_idempotency_key_idx
+    on blog_posts (idempotency_key);
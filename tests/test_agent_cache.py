@@ -0,0 +1,193 @@
+"""
+Unit tests for the agent response cache
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock
+from pydantic import BaseModel
+from agents.cache import AgentCache, CacheBackend, MemoryCache, SQLiteCache, cache_key
+from agents.model_backends import set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from agents.runner import run_agent, stream_agent
+
+
+class Outline(BaseModel):
+    title: str
+    sections: list[str]
+
+
+class FakeStream:
+    def __init__(self, partials):
+        self.partials = partials
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream(self):
+        for partial in self.partials:
+            yield partial
+
+    async def get_data(self):
+        return self.partials[-1]
+
+
+class FakeAgent:
+    model = "openai:gpt-4"
+    _system_prompts = ("You are a content director.",)
+    result_type = Outline
+
+    def __init__(self):
+        self.run = AsyncMock()
+        self.run.return_value.data = Outline(title="AI", sections=["Intro"])
+
+
+class TestAgentCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        set_model_backend(None)
+        set_model_router(ModelRouter())
+
+    async def test_second_run_is_served_from_cache(self):
+        """Test that an identical run does not call the model again"""
+        agent = FakeAgent()
+        cache = AgentCache(MemoryCache())
+
+        first = await run_agent(agent, "Create outline", cache=cache, params={"topic": "AI"})
+        second = await run_agent(agent, "Create outline", cache=cache, params={"topic": "AI"})
+
+        agent.run.assert_called_once()
+        self.assertEqual(second.data, first.data)
+        self.assertIsInstance(second.data, Outline)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    async def test_bypass_and_changed_params_miss(self):
+        """Test that bypass and different params trigger fresh runs"""
+        agent = FakeAgent()
+        cache = AgentCache(MemoryCache())
+
+        await run_agent(agent, "Create outline", cache=cache, params={"topic": "AI"})
+        await run_agent(agent, "Create outline", cache=cache, params={"topic": "ML"})
+        await run_agent(agent, "Create outline", cache=cache, params={"topic": "AI"}, bypass_cache=True)
+
+        self.assertEqual(agent.run.call_count, 3)
+
+    async def test_stream_yields_partials_then_caches(self):
+        """Test that streaming yields partial results and a rerun hits the cache"""
+        agent = FakeAgent()
+        partials = [Outline(title="A", sections=[]), Outline(title="AI", sections=["Intro"])]
+        agent.run_stream = lambda prompt, **kwargs: FakeStream(partials)
+        cache = AgentCache(MemoryCache())
+
+        streamed = [p async for p in stream_agent(agent, "Create outline", cache=cache)]
+        replayed = [p async for p in stream_agent(agent, "Create outline", cache=cache)]
+
+        self.assertEqual([p.title for p in streamed], ["A", "AI", "AI"])
+        self.assertEqual(replayed, [partials[-1]])
+
+    def test_key_depends_on_system_prompt(self):
+        """Test that changing the system prompt changes the key"""
+        agent = FakeAgent()
+        other = FakeAgent()
+        other._system_prompts = ("You are an editor.",)
+        self.assertNotEqual(cache_key(agent, "p", {}), cache_key(other, "p", {}))
+
+    async def test_cache_ttl_refreshes_stale_answers(self):
+        """Test that a run with cache_ttl calls the model again once the cached answer is older"""
+        agent = FakeAgent()
+        cache = AgentCache(MemoryCache())
+
+        await run_agent(agent, "Get user preferences", cache=cache, cache_ttl=60)
+        await run_agent(agent, "Get user preferences", cache=cache, cache_ttl=60)
+        self.assertEqual(agent.run.await_count, 1)
+
+        time.sleep(0.02)
+        await run_agent(agent, "Get user preferences", cache=cache, cache_ttl=0.01)
+        self.assertEqual(agent.run.await_count, 2)
+
+    async def test_stream_honours_cache_ttl(self):
+        """Test that a streamed run with cache_ttl streams again once the cached answer is older"""
+        agent = FakeAgent()
+        streams = []
+
+        def run_stream(prompt, **kwargs):
+            streams.append(prompt)
+            return FakeStream([Outline(title="AI", sections=["Intro"])])
+
+        agent.run_stream = run_stream
+        cache = AgentCache(MemoryCache())
+
+        [p async for p in stream_agent(agent, "Research", cache=cache, cache_ttl=60)]
+        [p async for p in stream_agent(agent, "Research", cache=cache, cache_ttl=60)]
+        self.assertEqual(len(streams), 1)
+
+        time.sleep(0.02)
+        [p async for p in stream_agent(agent, "Research", cache=cache, cache_ttl=0.01)]
+        self.assertEqual(len(streams), 2)
+
+    async def test_blocking_backends_run_off_the_event_loop(self):
+        """Test that SQLite reads and writes happen in a worker thread"""
+        threads = []
+
+        class RecordingSQLiteCache(SQLiteCache):
+            def get(self, key, max_age=None):
+                threads.append(threading.get_ident())
+                return super().get(key, max_age)
+
+            def set(self, key, value):
+                threads.append(threading.get_ident())
+                super().set(key, value)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = RecordingSQLiteCache(os.path.join(tmp, "cache.sqlite"))
+            await run_agent(FakeAgent(), "Create outline", cache=AgentCache(backend))
+            backend.conn.close()
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_backends_must_implement_the_interface(self):
+        """Test that the abstract backend cannot be instantiated"""
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+    def test_memory_lru_and_ttl(self):
+        """Test LRU eviction and TTL expiry of the memory backend"""
+        backend = MemoryCache(max_entries=2)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.get("a")
+        backend.set("c", "3")
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), "1")
+
+        expiring = MemoryCache(ttl=0.01)
+        expiring.set("a", "1")
+        time.sleep(0.02)
+        self.assertIsNone(expiring.get("a"))
+
+    def test_sqlite_persists_and_evicts(self):
+        """Test that the SQLite backend survives reopening and bounds its size"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            backend = SQLiteCache(path, max_entries=2)
+            backend.set("a", "1")
+            backend.set("b", "2")
+            backend.set("c", "3")
+
+            reopened = SQLiteCache(path, max_entries=2)
+            self.assertIsNone(reopened.get("a"))
+            self.assertEqual(reopened.get("c"), "3")
+
+            time.sleep(0.02)
+            self.assertIsNone(reopened.get("c", max_age=0.01))
+            self.assertEqual(reopened.get("c"), "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
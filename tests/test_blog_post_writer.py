@@ -0,0 +1,176 @@
+"""
+Unit tests for write-behind blog post batching
+"""
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from tools import blog_post_writer
+from tools.blog_post_writer import BlogPostWriter, get_blog_post_writer
+from tools.resilience import resilience
+
+
+def fake_client(fail=False):
+    """Client whose blog_posts table upserts by idempotency_key like Postgres would"""
+    client = MagicMock()
+    upserts = []
+    table = {}
+
+    def upsert(rows, on_conflict=None):
+        upserts.append(rows)
+        query = MagicMock()
+        keys = [row[on_conflict] for row in rows]
+        if fail:
+            query.execute.side_effect = ConnectionError("Supabase unreachable")
+        elif len(set(keys)) != len(keys):
+            query.execute.side_effect = RuntimeError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+        else:
+            records = []
+            for row in rows:
+                stored = table.setdefault(row[on_conflict], {"id": f"id-{len(table)}", "created_at": "now"})
+                stored.update(row)
+                records.append(dict(stored))
+            query.execute.return_value.data = records
+        return query
+
+    client.table.return_value.upsert.side_effect = upsert
+    return client, upserts, table
+
+
+class TestBlogPostWriter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.tmp.name, "spill.jsonl")
+        self.policy = resilience.policy("supabase")
+        resilience.configure("supabase", base_delay=0.001, max_delay=0.001)
+
+    async def asyncTearDown(self):
+        resilience.policies["supabase"] = self.policy
+        resilience.breakers.pop("supabase", None)
+        self.tmp.cleanup()
+
+    async def test_full_batch_is_one_upsert(self):
+        """Test that reaching max_batch flushes one multi-row upsert"""
+        client, upserts, _ = fake_client()
+        writer = BlogPostWriter(lambda: client, max_batch=3, max_delay_ms=10_000, spill_path=self.spill_path)
+
+        records = await asyncio.gather(*(writer.save({"title": f"Post {i}"}) for i in range(3)))
+
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual([r["title"] for r in records], ["Post 0", "Post 1", "Post 2"])
+        self.assertEqual(len({r["id"] for r in records}), 3)
+        await writer.aclose()
+
+    async def test_partial_batch_flushes_after_delay(self):
+        """Test that a lone row is written once the delay expires"""
+        client, upserts, _ = fake_client()
+        writer = BlogPostWriter(lambda: client, max_batch=50, max_delay_ms=10, spill_path=self.spill_path)
+
+        record = await writer.save({"title": "Only post"})
+
+        self.assertEqual(record["title"], "Only post")
+        self.assertEqual(len(upserts), 1)
+        await writer.aclose()
+
+    async def test_saving_the_same_post_twice_stores_one_row(self):
+        """Test that a retried save upserts on the idempotency key instead of duplicating"""
+        client, _, table = fake_client()
+        writer = BlogPostWriter(lambda: client, max_batch=1, spill_path=self.spill_path)
+
+        first = await writer.save({"title": "Post", "content": "Body"})
+        again = await writer.save({"title": "Post", "content": "Body"})
+
+        self.assertEqual(len(table), 1)
+        self.assertEqual(first["id"], again["id"])
+        await writer.aclose()
+
+    async def test_identical_rows_in_one_batch_are_sent_once(self):
+        """Test that two identical saves in one batch share one upserted row"""
+        client, upserts, table = fake_client()
+        writer = BlogPostWriter(lambda: client, max_batch=3, max_delay_ms=10_000, spill_path=self.spill_path)
+
+        records = await asyncio.gather(
+            writer.save({"title": "Post", "content": "Body"}),
+            writer.save({"title": "Post", "content": "Body"}),
+            writer.save({"title": "Other", "content": "Body"}),
+        )
+
+        self.assertEqual([len(rows) for rows in upserts], [2])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(records[0]["id"], records[1]["id"])
+        self.assertNotEqual(records[0]["id"], records[2]["id"])
+        await writer.aclose()
+
+    async def test_failed_batch_is_spilled_raised_and_replayed(self):
+        """Test that a write failing after retries is spilled, raised, and written once on replay"""
+        failing, upserts, _ = fake_client(fail=True)
+        writer = BlogPostWriter(lambda: failing, max_batch=1, spill_path=self.spill_path)
+
+        with self.assertRaises(ConnectionError):
+            await writer.save({"title": "Lost post"})
+        self.assertEqual(len(upserts), resilience.policy("supabase").max_attempts)
+        with open(self.spill_path) as spill:
+            self.assertEqual(json.loads(spill.readline())["row"]["title"], "Lost post")
+
+        # The caller retries once Supabase is back; the replay then upserts the same row again
+        healthy, _, table = fake_client()
+        writer.client_factory = lambda: healthy
+        await writer.save({"title": "Lost post"})
+        self.assertEqual(await writer.replay_spilled(), 1)
+        self.assertEqual([row["title"] for row in table.values()], ["Lost post"])
+        await writer.aclose()
+
+    async def test_buffered_rows_are_spilled_at_exit_and_replayed(self):
+        """Test that rows never sent are spilled by the exit hook and replayed once"""
+        client, upserts, table = fake_client()
+        writer = BlogPostWriter(lambda: client, max_batch=50, max_delay_ms=10_000, spill_path=self.spill_path)
+        pending = asyncio.ensure_future(writer.save({"title": "Unsent post"}))
+        await asyncio.sleep(0)
+
+        blog_post_writer._spill_all_writers()
+        pending.cancel()
+        self.assertEqual(upserts, [])
+
+        self.assertEqual(await writer.replay_spilled(), 1)
+        self.assertEqual(await writer.replay_spilled(), 0)
+        self.assertEqual([row["title"] for row in table.values()], ["Unsent post"])
+        await writer.aclose()
+
+    async def test_failed_replay_keeps_the_spill(self):
+        """Test that rows stay spilled when the replay cannot write them"""
+        failing, _, _ = fake_client(fail=True)
+        writer = BlogPostWriter(lambda: failing, spill_path=self.spill_path)
+        writer._spill([{"title": "Lost post", "idempotency_key": "k"}])
+
+        with self.assertRaises(ConnectionError):
+            await writer.replay_spilled()
+
+        with open(self.spill_path) as spill:
+            self.assertEqual([json.loads(line)["row"]["title"] for line in spill], ["Lost post"])
+        self.assertEqual(os.listdir(self.tmp.name), ["spill.jsonl"])
+        await writer.aclose()
+
+
+class TestWriterRegistry(unittest.TestCase):
+    def test_writers_are_dropped_with_their_loop(self):
+        """Test that a closed loop's writers are released and a new loop gets its own"""
+        async def get():
+            return get_blog_post_writer("url", "key")
+
+        loop = asyncio.new_event_loop()
+        first = loop.run_until_complete(get())
+        loop.close()
+        second = asyncio.run(get())
+
+        self.assertIsNot(first, second)
+        self.assertNotIn(loop, blog_post_writer._writers)
+        del loop, first, second
+        gc.collect()
+        self.assertEqual(len(blog_post_writer._writers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for resumable pipeline checkpoints
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from pydantic import BaseModel
+from agents.checkpoints import FileCheckpointStore, fingerprint
+from agents.pipeline import Pipeline, PipelineError, Stage
+
+
+class Draft(BaseModel):
+    title: str
+    words: int
+
+
+class TestCheckpoints(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FileCheckpointStore(self.directory.name)
+        self.calls = []
+        self.publish_fails = True
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def pipeline(self) -> Pipeline:
+        async def research(inputs):
+            self.calls.append("research")
+            return {"sources": [inputs["topic"]]}
+
+        async def draft(inputs):
+            self.calls.append("draft")
+            return Draft(title=inputs["research"]["sources"][0], words=800)
+
+        async def publish(inputs):
+            self.calls.append("publish")
+            if self.publish_fails:
+                raise ConnectionError("WordPress unavailable")
+            return {"url": f"https://blog/{inputs['draft'].title}"}
+
+        return Pipeline([
+            Stage("research", research),
+            Stage("draft", draft, depends_on=("research",), output_type=Draft),
+            Stage("publish", publish, depends_on=("draft",)),
+        ])
+
+    async def test_retry_resumes_after_last_completed_stage(self):
+        """Test that a retry restores completed stages and reruns only the failed one"""
+        with self.assertRaises(PipelineError):
+            await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+        self.assertEqual(self.calls, ["research", "draft", "publish"])
+
+        self.calls.clear()
+        self.publish_fails = False
+        result = await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+
+        self.assertEqual(self.calls, ["publish"])
+        self.assertEqual(result.resumed, ["research", "draft"])
+        self.assertEqual(result.outputs["draft"], Draft(title="ai", words=800))
+        self.assertEqual(result.outputs["publish"], {"url": "https://blog/ai"})
+
+    async def test_changed_inputs_invalidate_checkpoints(self):
+        """Test that a different context reruns every stage"""
+        with self.assertRaises(PipelineError):
+            await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+
+        self.calls.clear()
+        self.publish_fails = False
+        result = await self.pipeline().run({"topic": "robots"}, run_id="run-1", checkpoints=self.store)
+
+        self.assertEqual(self.calls, ["research", "draft", "publish"])
+        self.assertEqual(result.resumed, [])
+
+    async def test_changed_upstream_output_invalidates_downstream(self):
+        """Test that a stage reruns when a dependency's checkpointed output changed"""
+        with self.assertRaises(PipelineError):
+            await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+        research_fingerprint = fingerprint("research", {"topic": "ai"}, [])
+        self.store.save("run-1", "research", research_fingerprint, {"sources": ["edited"]})
+
+        self.calls.clear()
+        self.publish_fails = False
+        result = await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+
+        self.assertEqual(self.calls, ["draft", "publish"])
+        self.assertEqual(result.resumed, ["research"])
+        self.assertEqual(result.outputs["draft"].title, "edited")
+
+    async def test_success_clears_checkpoints(self):
+        """Test that a completed run leaves nothing to resume"""
+        self.publish_fails = False
+        await self.pipeline().run({"topic": "ai"}, run_id="run-1", checkpoints=self.store)
+
+        self.assertIsNone(self.store.load("run-1", "research"))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "run-1")))
+
+    async def test_expired_checkpoints_are_ignored_and_pruned_on_open(self):
+        """Test that an abandoned run's checkpoints expire and are deleted when the store opens"""
+        for run_id in ("abandoned", "recent"):
+            with self.assertRaises(PipelineError):
+                await self.pipeline().run({"topic": "ai"}, run_id=run_id, checkpoints=self.store)
+        old = time.time() - 3600
+        for name in os.listdir(os.path.join(self.directory.name, "abandoned")):
+            os.utime(os.path.join(self.directory.name, "abandoned", name), (old, old))
+
+        self.store.ttl = 1800
+        with patch("time.time", return_value=time.time() + 3600):
+            self.assertIsNone(self.store.load("recent", "research"))
+
+        reopened = FileCheckpointStore(self.directory.name, ttl=1800)
+        self.assertEqual(os.listdir(self.directory.name), ["recent"])
+        self.assertIsNotNone(reopened.load("recent", "research"))
+
+    async def test_checkpoints_require_run_id(self):
+        """Test that checkpoints without a run id are rejected"""
+        with self.assertRaises(ValueError):
+            await self.pipeline().run({"topic": "ai"}, checkpoints=self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
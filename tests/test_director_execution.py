@@ -0,0 +1,165 @@
+"""
+Unit tests for direct execution of the director's tool steps
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+from agents.cache import build_cache, set_agent_cache
+from agents.checkpoints import FileCheckpointStore, set_checkpoint_store
+from agents.director_agent import BlogRequest, DirectorDependencies, create_blog_post, generate_blogs
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from agents.pipeline import PipelineError
+from agents.token_budget import TokenBudget, set_token_budget
+from tools.publishing_tools import PublishResult
+from tools.tracing import metrics
+
+
+def deps(mode: str) -> DirectorDependencies:
+    return DirectorDependencies(
+        supabase_url="https://db.example",
+        supabase_key="key",
+        wordpress_url="https://blog.example",
+        wordpress_creds={"username": "admin", "password": "secret"},
+        execution_mode=mode,
+    )
+
+
+class TestDirectorExecution(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.model = FakeModel(latency=0, jitter=0)
+        set_model_backend(self.model)
+        set_model_router(ModelRouter())
+        set_agent_cache(build_cache("none", "", 0, None))
+        set_checkpoint_store(None)
+        set_token_budget(TokenBudget())
+        self.request = BlogRequest(
+            user_id="user-1", topic="AI in Healthcare", keywords=["AI", "health"],
+            content_type="blog post", publish=True
+        )
+
+    def tearDown(self):
+        set_model_backend(None)
+
+    async def test_direct_mode_skips_the_model_for_tool_steps(self):
+        """Test that preferences, store and publish call their tools with typed inputs"""
+        settings = AsyncMock(return_value={"tone": "friendly"})
+        save = AsyncMock(return_value={"status": "success", "id": 42, "created_at": "now"})
+        publish = AsyncMock(return_value=PublishResult(status="success", url="https://blog.example/ai", post_id=7))
+
+        with patch("agents.director_agent.get_user_settings", settings), \
+                patch("agents.director_agent.save_blog_post", save), \
+                patch("agents.director_agent.publish_to_wordpress", publish):
+            result = await create_blog_post(self.request, deps("direct"), run_id="direct")
+
+        # Only research and the outline reach the model
+        self.assertEqual(self.model.calls, 2)
+        self.assertEqual(result.content_id, "42")
+        self.assertEqual(result.content_url, "https://blog.example/ai")
+        self.assertEqual(settings.call_args.args[0].deps.url, "https://db.example")
+        post = save.call_args.args[1]
+        self.assertEqual((post.title, post.author, post.tags), ("AI in Healthcare", "user-1", ["AI", "health"]))
+        published = publish.call_args.args[1]
+        self.assertEqual((published["slug"], published["status"]), ("ai-in-healthcare", "publish"))
+        self.assertEqual(publish.call_args.args[0].deps.username, "admin")
+
+    async def test_failed_store_fails_the_stage(self):
+        """Test that a storage error surfaces instead of being reported as success"""
+        save = AsyncMock(return_value={"status": "error", "error": "insert failed"})
+
+        with patch("agents.director_agent.get_user_settings", AsyncMock(return_value={})), \
+                patch("agents.director_agent.save_blog_post", save), \
+                patch("agents.director_agent.publish_to_wordpress", AsyncMock()):
+            with self.assertRaises(PipelineError) as raised:
+                await create_blog_post(self.request, deps("direct"), run_id="failed")
+
+        self.assertIn("insert failed", str(raised.exception))
+
+    async def test_duplicate_content_is_not_published(self):
+        """Test that a post flagged as a near-duplicate on save is held back from publishing"""
+        duplicates = [{"id": 7, "title": "AI in Healthcare", "score": 0.97}]
+        save = AsyncMock(return_value={"status": "success", "id": 42, "created_at": "now", "duplicates": duplicates})
+        publish = AsyncMock()
+
+        with patch("agents.director_agent.get_user_settings", AsyncMock(return_value={})), \
+                patch("agents.director_agent.save_blog_post", save), \
+                patch("agents.director_agent.publish_to_wordpress", publish):
+            result = await create_blog_post(self.request, deps("direct"), run_id="duplicate")
+
+        publish.assert_not_awaited()
+        self.assertEqual(result.content_id, "42")
+        self.assertIsNone(result.content_url)
+        self.assertEqual(result.duplicates, duplicates)
+        self.assertIn("duplicates existing posts", result.message)
+
+    async def test_llm_mode_dispatches_through_the_model(self):
+        """Test that the LLM-verified mode keeps one model call per stage"""
+        await create_blog_post(self.request, deps("llm"), run_id="llm")
+
+        self.assertEqual(self.model.calls, 5)
+
+    async def test_repeated_requests_are_fresh_runs_unless_resumed(self):
+        """Test that a failed request is rerun from scratch and only reuses its checkpoints on resume"""
+        save = AsyncMock(return_value={"status": "success", "id": 42, "created_at": "now"})
+        unavailable = ConnectionError("WordPress unavailable")
+        publish = AsyncMock(side_effect=[unavailable, unavailable, PublishResult(status="success", url="u", post_id=7)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            set_checkpoint_store(FileCheckpointStore(directory))
+            with patch("agents.director_agent.get_user_settings", AsyncMock(return_value={})), \
+                    patch("agents.director_agent.save_blog_post", save), \
+                    patch("agents.director_agent.publish_to_wordpress", publish):
+                with self.assertRaises(PipelineError):
+                    await create_blog_post(self.request, deps("direct"), resume=True)
+                with self.assertRaises(PipelineError):
+                    await create_blog_post(self.request, deps("direct"))
+                self.assertEqual(save.await_count, 2)
+                # The fresh run cannot be retried, so only the resumable run left checkpoints
+                self.assertEqual(len(os.listdir(directory)), 1)
+
+                result = await create_blog_post(self.request, deps("direct"), resume=True)
+
+        self.assertEqual(save.await_count, 2)
+        self.assertEqual(sorted(result.resumed_stages), ["outline", "preferences", "research", "store"])
+
+    async def test_failed_settings_prefetch_is_counted_and_the_batch_continues(self):
+        """Test that an unreachable settings table is recorded and posts fall back to per-user lookups"""
+        prefetch = AsyncMock(side_effect=ConnectionError("Supabase unreachable"))
+        failures = ("settings_prefetch_failures_total", (("error", "ConnectionError"),))
+        before = metrics.counters[failures]
+
+        with patch("agents.director_agent.prefetch_user_settings", prefetch), \
+                patch("agents.director_agent.get_user_settings", AsyncMock(return_value={})), \
+                patch("agents.director_agent.save_blog_post", AsyncMock(return_value={"status": "success", "id": 1, "created_at": "now"})), \
+                patch("agents.director_agent.publish_to_wordpress", AsyncMock(return_value=PublishResult(status="success", url="u", post_id=1))):
+            results = [r async for r in generate_blogs([self.request], deps("direct"))]
+
+        self.assertEqual(metrics.counters[failures], before + 1)
+        self.assertEqual([r.error for r in results], [None])
+
+    async def test_invalid_supabase_config_does_not_abort_the_batch(self):
+        """Test that a client that cannot be built counts as a failed prefetch"""
+        failures = ("settings_prefetch_failures_total", (("error", "SupabaseException"),))
+        before = metrics.counters[failures]
+        bad = deps("direct").copy(update={"supabase_url": "not a url"})
+
+        with patch("agents.director_agent.get_user_settings", AsyncMock(return_value={})), \
+                patch("agents.director_agent.save_blog_post", AsyncMock(return_value={"status": "success", "id": 1, "created_at": "now"})), \
+                patch("agents.director_agent.publish_to_wordpress", AsyncMock(return_value=PublishResult(status="success", url="u", post_id=1))):
+            results = [r async for r in generate_blogs([self.request], bad)]
+
+        self.assertEqual(metrics.counters[failures], before + 1)
+        self.assertEqual([r.error for r in results], [None])
+
+    async def test_unexpected_prefetch_errors_are_raised(self):
+        """Test that a bug in the prefetch is not swallowed"""
+        prefetch = AsyncMock(side_effect=KeyError("user_id"))
+
+        with patch("agents.director_agent.prefetch_user_settings", prefetch):
+            with self.assertRaises(KeyError):
+                [r async for r in generate_blogs([self.request], deps("direct"))]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+"""
+Unit tests for the pooled HTTP client registry
+"""
+import asyncio
+import unittest
+from tools.http_clients import HTTPClientRegistry
+
+
+class TestHTTPClientRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_clients_are_reused_per_name(self):
+        """Test that the same named client is returned until closed"""
+        registry = HTTPClientRegistry(http2=False)
+        brave = registry.get("brave")
+
+        self.assertIs(registry.get("brave"), brave)
+        self.assertIsNot(registry.get("wordpress"), brave)
+
+        await registry.aclose()
+        self.assertTrue(brave.is_closed)
+        self.assertIsNot(registry.get("brave"), brave)
+        await registry.aclose()
+
+    def test_each_event_loop_gets_its_own_client(self):
+        """Test that clients are not shared across event loops"""
+        registry = HTTPClientRegistry(http2=False)
+
+        async def get_client():
+            return registry.get("brave")
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Unit tests for the job queue and worker
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from tools.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobWorker, SQLiteJobQueue
+
+
+class TestSQLiteJobQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "jobs.sqlite")
+        self.queue = SQLiteJobQueue(self.path, retry_base=0.0)
+
+    def tearDown(self):
+        self.queue.conn.close()
+        self.directory.cleanup()
+
+    async def test_claim_leases_each_job_once(self):
+        """Test that concurrent claims from two connections never share a job"""
+        other = SQLiteJobQueue(self.path)
+        ids = {self.queue.enqueue({"topic": f"t{i}"}) for i in range(20)}
+
+        claims = await asyncio.gather(*(
+            asyncio.to_thread(queue.claim, f"w{i}", 60, 3)
+            for i, queue in enumerate([self.queue, other] * 5)
+        ))
+        claimed = [job.id for jobs in claims for job in jobs]
+        other.conn.close()
+
+        self.assertEqual(len(claimed), len(set(claimed)))
+        self.assertEqual(set(claimed), ids)
+        self.assertEqual(self.queue.counts()[RUNNING], 20)
+
+    async def test_expired_lease_is_reclaimed(self):
+        """Test that a job becomes visible again when its worker stops renewing"""
+        job_id = self.queue.enqueue({"topic": "t"})
+        self.assertEqual(len(self.queue.claim("crashed", 0.05)), 1)
+        self.assertEqual(self.queue.claim("w2", 60), [])
+
+        time.sleep(0.1)
+        jobs = self.queue.claim("w2", 60)
+
+        self.assertEqual([job.id for job in jobs], [job_id])
+        self.assertEqual(jobs[0].attempts, 2)
+        self.assertFalse(self.queue.heartbeat(job_id, "crashed", 60))
+        self.assertFalse(self.queue.complete(job_id, "crashed", {}))
+        self.assertTrue(self.queue.complete(job_id, "w2", {"ok": True}))
+        self.assertEqual(self.queue.get(job_id).result, {"ok": True})
+
+    async def test_job_that_crashes_its_worker_gives_up(self):
+        """Test that a job whose worker dies on every attempt ends up failed instead of re-leased forever"""
+        job_id = self.queue.enqueue({"topic": "t"}, max_attempts=2)
+
+        # Each worker claims the job and dies without completing or failing it
+        for worker in ("crashed-1", "crashed-2"):
+            self.assertEqual([job.id for job in self.queue.claim(worker, 0.05)], [job_id])
+            time.sleep(0.1)
+
+        self.assertEqual(self.queue.claim("w3", 60), [])
+        job = self.queue.get(job_id)
+        self.assertEqual((job.status, job.attempts), (FAILED, 2))
+        self.assertIsNone(job.lease_owner)
+        self.assertIn("Lease expired", job.error)
+
+    async def test_failures_retry_then_give_up(self):
+        """Test that failed attempts are requeued until max_attempts"""
+        job_id = self.queue.enqueue({"topic": "t"}, max_attempts=2)
+
+        self.queue.claim("w", 60)
+        self.assertEqual(self.queue.fail(job_id, "w", "boom").status, QUEUED)
+        self.queue.claim("w", 60)
+        job = self.queue.fail(job_id, "w", "boom again")
+
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "boom again")
+        self.assertEqual(self.queue.claim("w", 60), [])
+
+
+class TestJobWorker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = SQLiteJobQueue(os.path.join(self.directory.name, "jobs.sqlite"), retry_base=0.0)
+
+    def tearDown(self):
+        self.queue.conn.close()
+        self.directory.cleanup()
+
+    async def test_worker_runs_jobs_concurrently(self):
+        """Test that a worker completes queued jobs up to its concurrency"""
+        running = []
+        peak = []
+
+        async def handler(job):
+            running.append(job.id)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.remove(job.id)
+            return {"topic": job.payload["topic"]}
+
+        ids = [self.queue.enqueue({"topic": f"t{i}"}) for i in range(6)]
+        worker = JobWorker(self.queue, handler, concurrency=3, poll_interval=0.01)
+
+        processed = await worker.run(max_jobs=6)
+
+        self.assertEqual(processed, 6)
+        self.assertEqual(max(peak), 3)
+        for i, job_id in enumerate(ids):
+            job = self.queue.get(job_id)
+            self.assertEqual(job.status, SUCCEEDED)
+            self.assertEqual(job.result, {"topic": f"t{i}"})
+
+    async def test_failed_job_is_retried(self):
+        """Test that an exception records the error and the job runs again"""
+        calls = []
+
+        async def flaky(job):
+            calls.append(job.attempts)
+            if len(calls) == 1:
+                raise ConnectionError("provider down")
+            return {"ok": True}
+
+        job_id = self.queue.enqueue({"topic": "t"})
+        worker = JobWorker(self.queue, flaky, concurrency=1, poll_interval=0.01)
+
+        await worker.run(max_jobs=2)
+
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(self.queue.get(job_id).status, SUCCEEDED)
+
+    async def test_lost_lease_cancels_the_attempt(self):
+        """Test that a worker stops a job another worker has taken over"""
+        cancelled = asyncio.Event()
+
+        async def slow(job):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        job_id = self.queue.enqueue({"topic": "t"})
+        worker = JobWorker(self.queue, slow, lease_seconds=0.06, worker_id="w1")
+        job = self.queue.claim("w1", 0.06)[0]
+        # Another worker has taken the job over
+        self.queue.conn.execute("UPDATE jobs SET lease_owner = 'w2' WHERE id = ?", (job_id,))
+
+        await asyncio.wait_for(worker.process(job), 1)
+
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(self.queue.get(job_id).lease_owner, "w2")
+
+
+if __name__ == "__main__":
+    unittest.main()
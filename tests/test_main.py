@@ -0,0 +1,72 @@
+"""
+Unit tests for the main entry point's blog workflow
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from pydantic import BaseModel
+from tools.blog_post_writer import BlogPostWriter
+from tools.tracing import configure_tracing
+
+with patch.dict(os.environ, {"SUPABASE_URL": "https://db.example", "SUPABASE_KEY": "key", "OPENAI_API_KEY": "sk-test"}):
+    import main
+
+
+class Outline(BaseModel):
+    title: str
+
+
+class Research(BaseModel):
+    key_points: list[str]
+
+
+def fake_client():
+    client = MagicMock()
+    upserts = []
+
+    def upsert(rows, on_conflict=None):
+        upserts.append(rows)
+        query = MagicMock()
+        query.execute.return_value.data = [{"id": f"id-{i}", "created_at": "now", **row} for i, row in enumerate(rows)]
+        return query
+
+    client.table.return_value.upsert.side_effect = upsert
+    return client, upserts
+
+
+class TestGenerateBlog(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        configure_tracing([])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_save_stage_stores_outline_and_research(self):
+        """Test that the save stage writes one blog_posts row built from both upstream stages"""
+        client, upserts = fake_client()
+        writer = BlogPostWriter(lambda: client, max_delay_ms=1, spill_path=os.path.join(self.tmp.name, "spill.jsonl"))
+
+        async def fake_run_agent(agent, prompt, **kwargs):
+            await asyncio.sleep(0)
+            if prompt.startswith("Research"):
+                return SimpleNamespace(data=Research(key_points=["Diagnosis"]))
+            return SimpleNamespace(data=Outline(title="AI in Healthcare"))
+
+        with patch("main.run_agent", fake_run_agent), patch("db.get_blog_post_writer", return_value=writer):
+            result = await main.generate_blog("AI in Healthcare", stage_timeout=5)
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(upserts), 1)
+        row = upserts[0][0]
+        self.assertEqual(row["topic"], "AI in Healthcare")
+        self.assertEqual(row["outline"], {"title": "AI in Healthcare"})
+        self.assertEqual(row["research"], {"key_points": ["Diagnosis"]})
+        await writer.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
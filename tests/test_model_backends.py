@@ -0,0 +1,74 @@
+"""
+Unit tests for the offline fake model backend
+"""
+import time
+import unittest
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from agents.cache import AgentCache, MemoryCache
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from agents.runner import run_agent, stream_agent
+
+
+class Brief(BaseModel):
+    title: str
+    sections: List[Dict[str, str]]
+    notes: Optional[Dict[str, Any]] = Field(description="Optional notes")
+
+
+class Draft(BaseModel):
+    title: str
+    content: str
+    placeholders: List[str]
+    word_count: int
+    seo_score: float
+
+
+class FakeAgent:
+    def __init__(self, result_type):
+        self.result_type = result_type
+
+
+class TestFakeModel(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        set_model_router(ModelRouter())
+
+    def tearDown(self):
+        set_model_backend(None)
+
+    async def test_results_are_schema_valid_and_deterministic(self):
+        """Test that results validate and repeat for the same prompt"""
+        model = FakeModel(latency=0, jitter=0)
+
+        first = await model.run(FakeAgent(Brief), "Create brief")
+        second = await model.run(FakeAgent(Brief), "Create brief")
+
+        self.assertIsInstance(first.data, Brief)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(Brief.parse_obj(first.data.dict()), first.data)
+        self.assertIsInstance(first.data.sections[0], dict)
+
+    async def test_latency_is_applied(self):
+        """Test that calls take the configured latency"""
+        model = FakeModel(latency=0.05, jitter=0.01)
+        started = time.perf_counter()
+        await model.run(FakeAgent(Draft), "Create draft")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.04)
+
+    async def test_runner_uses_selected_backend(self):
+        """Test that run_agent and stream_agent go through the fake backend"""
+        model = FakeModel(latency=0, jitter=0)
+        set_model_backend(model)
+        cache = AgentCache(MemoryCache(), enabled=False)
+
+        result = await run_agent(FakeAgent(Draft), "Create draft", cache=cache)
+        partials = [p async for p in stream_agent(FakeAgent(Draft), "Create draft", cache=cache)]
+
+        self.assertEqual(model.calls, 2)
+        self.assertLess(len(partials[0].content), len(partials[-1].content))
+        self.assertEqual(partials[-1], result.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Unit tests for tiered model routing
+"""
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from pydantic import BaseModel, ValidationError
+from agents.cache import build_cache
+from agents.model_backends import set_model_backend
+from agents.model_routing import ModelRouter, build_router, set_model_router
+from agents.runner import run_agent
+from tools.resilience import resilience
+
+
+class Outline(BaseModel):
+    title: str
+
+
+def validation_error() -> ValidationError:
+    try:
+        Outline()
+    except ValidationError as e:
+        return e
+
+
+class FakeAgent:
+    model = "openai:gpt-4"
+    _system_prompts = ("You are a content director.",)
+    result_type = Outline
+
+    def __init__(self, name: str, failures: int = 0):
+        self.name = name
+        self.models = []
+        self.failures = failures
+        self.run = AsyncMock(side_effect=self._run)
+
+    async def _run(self, prompt, model=None, **kwargs):
+        self.models.append(model)
+        await asyncio.sleep(0)
+        if len(self.models) <= self.failures:
+            raise validation_error()
+        return SimpleNamespace(data=Outline(title=prompt))
+
+
+class TestModelRouting(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        set_model_backend(None)
+        self.router = ModelRouter()
+        set_model_router(self.router)
+        self.cache = build_cache("memory", "", 100, None)
+
+    async def test_routes_resolve_by_stage_then_agent(self):
+        """Test that stage routes win over agent routes and unrouted agents keep their model"""
+        router = ModelRouter(routes={"director": "medium", "director.store": "small"})
+
+        self.assertEqual(router.chain("director.store")[0], ("small", "openai:gpt-4o-mini"))
+        self.assertEqual(router.chain("director.analyze")[0], ("medium", "openai:gpt-4o"))
+        self.assertEqual(router.chain("unknown"), [(None, None)])
+
+    async def test_mechanical_stage_uses_small_model(self):
+        """Test that a routed run is sent with the tier's model and counted in its stats"""
+        agent = FakeAgent("director")
+
+        await run_agent(agent, "Store generated content", cache=self.cache, route="director.store")
+
+        self.assertEqual(agent.models, ["openai:gpt-4o-mini"])
+        report = self.router.report()
+        self.assertEqual(report["small"]["calls"], 1)
+        self.assertGreater(report["small"]["cost_usd"], 0)
+
+    async def test_validation_failure_falls_back_to_larger_tier(self):
+        """Test that an invalid answer is retried on the next larger model"""
+        agent = FakeAgent("keywords", failures=1)
+
+        result = await run_agent(agent, "Find keywords", cache=self.cache)
+
+        self.assertEqual(result.data.title, "Find keywords")
+        self.assertEqual(agent.models, ["openai:gpt-4o-mini", "openai:gpt-4o"])
+        report = self.router.report()
+        self.assertEqual(report["small"]["fallbacks"], 1)
+        self.assertEqual(report["medium"]["calls"], 1)
+
+    async def test_validation_misses_do_not_open_the_model_breaker(self):
+        """Test that a burst of small-tier validation failures through resilience.call still falls back"""
+        breaker = resilience.breaker("openai")
+        breaker.record_success()
+        agents = [FakeAgent("keywords", failures=1) for _ in range(breaker.failure_threshold + 2)]
+
+        # Concurrent runs fail validation on the small tier back to back before any fallback lands
+        results = await asyncio.gather(*(
+            run_agent(agent, f"Find keywords {i}", cache=self.cache) for i, agent in enumerate(agents)
+        ))
+
+        self.assertEqual([r.data.title for r in results], [f"Find keywords {i}" for i in range(len(agents))])
+        self.assertTrue(all(a.models == ["openai:gpt-4o-mini", "openai:gpt-4o"] for a in agents))
+        self.assertEqual(breaker.state, "closed")
+
+    async def test_largest_tier_failure_is_raised(self):
+        """Test that validation errors surface once no larger tier is left"""
+        agent = FakeAgent("writer", failures=5)
+
+        with self.assertRaises(ValidationError):
+            await run_agent(agent, "Finalize content", cache=self.cache)
+        self.assertEqual(agent.models, ["openai:gpt-4"])
+
+    async def test_overrides_from_settings(self):
+        """Test that configured routes and tiers override the defaults"""
+        router = build_router("small=openai:gpt-3.5-turbo", "writer=small")
+
+        self.assertEqual(router.chain("writer")[0], ("small", "openai:gpt-3.5-turbo"))
+        with self.assertRaises(ValueError):
+            build_router(routes="writer=huge")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for the pipeline engine
+"""
+import asyncio
+import time
+import unittest
+from agents.pipeline import Pipeline, PipelineError, Stage
+
+
+def sleeper(name, delay, log):
+    async def run(inputs):
+        log.append(f"start:{name}")
+        await asyncio.sleep(delay)
+        log.append(f"end:{name}")
+        return name
+    return run
+
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_independent_stages_run_concurrently(self):
+        """Test that stages without shared dependencies overlap"""
+        log = []
+        pipeline = Pipeline([
+            Stage("preferences", sleeper("preferences", 0.1, log)),
+            Stage("research", sleeper("research", 0.1, log)),
+            Stage("outline", sleeper("outline", 0.05, log), depends_on=("preferences", "research")),
+        ])
+
+        started = time.perf_counter()
+        result = await pipeline.run()
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(log[:2], ["start:preferences", "start:research"])
+        self.assertEqual(result.outputs["outline"], "outline")
+        self.assertEqual(result.critical_path[-1], "outline")
+        self.assertEqual(len(result.critical_path), 2)
+        self.assertGreaterEqual(result.critical_path_time, 0.15)
+
+    async def test_dependency_outputs_are_passed(self):
+        """Test that a stage receives its dependencies' outputs and the context"""
+        async def combine(inputs):
+            return f"{inputs['topic']}:{inputs['a']}"
+
+        pipeline = Pipeline([
+            Stage("a", sleeper("a", 0, [])),
+            Stage("b", combine, depends_on=("a",)),
+        ])
+        result = await pipeline.run({"topic": "AI"})
+
+        self.assertEqual(result.outputs["b"], "AI:a")
+
+    async def test_stage_progress_is_reported(self):
+        """Test that on_stage sees each stage start and finish in dependency order"""
+        events = []
+        pipeline = Pipeline([
+            Stage("outline", sleeper("outline", 0, [])),
+            Stage("store", sleeper("store", 0, []), depends_on=("outline",)),
+            Stage("publish", sleeper("publish", 0, []), depends_on=("outline",), condition=lambda _: False),
+        ])
+
+        await pipeline.run(on_stage=lambda stage: events.append((stage.name, stage.status, stage.output)))
+
+        self.assertEqual(events[:2], [("outline", "running", None), ("outline", "success", "outline")])
+        self.assertIn(("store", "success", "store"), events)
+        self.assertIn(("publish", "skipped", None), events)
+        self.assertLess(events.index(("store", "running", None)), events.index(("store", "success", "store")))
+
+    async def test_condition_skips_stage_and_dependents(self):
+        """Test that a false condition skips the stage and everything after it"""
+        pipeline = Pipeline([
+            Stage("publish", sleeper("publish", 0, []), condition=lambda _: False),
+            Stage("notify", sleeper("notify", 0, []), depends_on=("publish",)),
+        ])
+        result = await pipeline.run()
+
+        self.assertEqual(result.stages["publish"].status, "skipped")
+        self.assertEqual(result.stages["notify"].status, "skipped")
+        self.assertIsNone(result.outputs["notify"])
+
+    async def test_stage_timeout(self):
+        """Test that a slow stage raises PipelineError"""
+        pipeline = Pipeline([
+            Stage("slow", sleeper("slow", 1, []), timeout=0.01),
+            Stage("after", sleeper("after", 0, []), depends_on=("slow",)),
+        ])
+
+        with self.assertRaises(PipelineError) as raised:
+            await pipeline.run()
+        self.assertEqual(raised.exception.stage, "slow")
+        self.assertIsInstance(raised.exception.error, asyncio.TimeoutError)
+
+    def test_invalid_graphs(self):
+        """Test that unknown dependencies and cycles are rejected"""
+        noop = sleeper("noop", 0, [])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", noop, depends_on=("missing",))])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", noop, depends_on=("b",)), Stage("b", noop, depends_on=("a",))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for bulk WordPress publishing
+"""
+import asyncio
+import json
+import unittest
+import httpx
+from tools.http_clients import HTTPClientRegistry
+from tools.publishing_tools import PublishItem, WordPressDeps, media_slug, publish_many
+from tools.wordpress_auth import wordpress_tokens
+
+
+class FakeWordPress:
+    """In-memory WordPress REST API behind an httpx mock transport"""
+
+    def __init__(self, fail_slugs=()):
+        self.posts = []
+        self.media = []
+        self.auth_calls = 0
+        self.downloads = 0
+        self.fail_slugs = set(fail_slugs)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        await asyncio.sleep(0.001)
+        if request.url.host == "cdn.example":
+            self.downloads += 1
+            return httpx.Response(200, content=b"image-bytes")
+        if path == "/wp-json/jwt-auth/v1/token":
+            self.auth_calls += 1
+            return httpx.Response(200, json={"token": "token"})
+        if path == "/wp-json/wp/v2/media":
+            if request.method == "GET":
+                slug = request.url.params["slug"]
+                return httpx.Response(200, json=[m for m in self.media if m["slug"] == slug])
+            media = {
+                "id": 100 + len(self.media),
+                "slug": request.url.params["slug"],
+                "source_url": f"https://blog.example/uploads/{len(self.media)}.png",
+            }
+            self.media.append(media)
+            return httpx.Response(201, json=media)
+        if path == "/wp-json/wp/v2/posts":
+            if request.method == "GET":
+                slug = request.url.params["slug"]
+                return httpx.Response(200, json=[p for p in self.posts if p["slug"] == slug])
+            body = json.loads(request.content)
+            if body["slug"] in self.fail_slugs:
+                return httpx.Response(400, json={"message": "invalid"})
+            post = {**body, "id": len(self.posts) + 1, "link": f"https://blog.example/{body['slug']}"}
+            self.posts.append(post)
+            return httpx.Response(201, json=post)
+        if path.startswith("/wp-json/wp/v2/posts/"):
+            post_id = int(path.rsplit("/", 1)[1])
+            found = [p for p in self.posts if p["id"] == post_id]
+            return httpx.Response(200, json=found[0]) if found else httpx.Response(404, json={})
+        return httpx.Response(404, json={})
+
+
+class MockRegistry(HTTPClientRegistry):
+    def __init__(self, site: FakeWordPress):
+        super().__init__()
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(site.handle))
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        return self.client
+
+
+class TestPublishMany(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        wordpress_tokens.tokens.clear()
+        self.site = FakeWordPress(fail_slugs={"broken"})
+        self.deps = WordPressDeps(
+            url="https://blog.example", username="admin", password="secret", http_clients=MockRegistry(self.site)
+        )
+
+    def items(self):
+        return [
+            PublishItem(
+                content={"title": f"Post {i}", "content": "<img src='https://cdn.example/chart.png'>",
+                         "meta_description": "summary"},
+                featured_image=f"https://cdn.example/hero-{i}.png",
+                media=["https://cdn.example/chart.png"],
+            )
+            for i in range(5)
+        ] + [PublishItem(content={"title": "Broken", "content": "x"})]
+
+    async def test_publishes_posts_with_media(self):
+        """Test that posts, featured images and inline media are published in input order"""
+        results = await publish_many(self.deps, self.items(), max_concurrency=3)
+
+        self.assertEqual([r.status for r in results], ["success"] * 5 + ["error"])
+        self.assertEqual([r.slug for r in results[:5]], [f"post-{i}" for i in range(5)])
+        self.assertEqual(self.site.auth_calls, 1)
+        # Five hero images plus one shared inline image
+        self.assertEqual(len(self.site.media), 6)
+        post = self.site.posts[0]
+        self.assertEqual(post["featured_media"], results[0].media_ids["https://cdn.example/hero-0.png"])
+        self.assertNotIn("cdn.example", post["content"])
+        self.assertEqual(post["excerpt"], "summary")
+
+    async def test_retry_does_not_duplicate(self):
+        """Test that republishing a batch reuses existing posts and media"""
+        first = await publish_many(self.deps, self.items())
+        downloads = self.site.downloads
+
+        items = self.items()
+        items[0].remote_id = first[0].post_id
+        second = await publish_many(self.deps, items)
+
+        self.assertEqual([r.status for r in second], ["exists"] * 5 + ["error"])
+        self.assertEqual([r.post_id for r in second[:5]], [r.post_id for r in first[:5]])
+        self.assertEqual(len(self.site.posts), 5)
+        self.assertEqual(len(self.site.media), 6)
+        self.assertEqual(self.site.downloads, downloads)
+
+    async def test_media_slug_is_stable(self):
+        """Test that a media source always maps to the same slug"""
+        self.assertEqual(media_slug("https://cdn.example/a/Hero Image.PNG"), media_slug("https://cdn.example/a/Hero Image.PNG"))
+        self.assertTrue(media_slug("https://cdn.example/a/Hero Image.PNG").startswith("hero-image-"))
+        self.assertNotEqual(media_slug("https://cdn.example/a/x.png"), media_slug("https://cdn.example/b/x.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
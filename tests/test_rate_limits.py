@@ -0,0 +1,42 @@
+"""
+Unit tests for the shared rate limiter
+"""
+import time
+import unittest
+from tools.rate_limits import RateLimiter, TokenBucket
+
+
+class TestRateLimits(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_within_capacity_does_not_wait(self):
+        """Test that a full bucket serves a burst immediately"""
+        bucket = TokenBucket(rate_per_minute=600, capacity=5)
+        started = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+    async def test_empty_bucket_waits_for_refill(self):
+        """Test that exceeding capacity waits for the refill rate"""
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        await bucket.acquire()
+        waited = await bucket.acquire()
+        self.assertGreater(waited, 0.05)
+
+    async def test_limiter_uses_configured_buckets(self):
+        """Test named buckets, overrides and unknown names"""
+        limiter = RateLimiter({"brave_search": 6000})
+        await limiter.acquire("brave_search")
+        self.assertEqual(limiter.bucket("brave_search").capacity, 6000)
+        with self.assertRaises(KeyError):
+            await limiter.acquire("unknown")
+
+    async def test_openai_reserves_tokens(self):
+        """Test that an OpenAI call draws from both request and token buckets"""
+        limiter = RateLimiter()
+        await limiter.acquire_openai("x" * 400)
+        self.assertLess(limiter.bucket("openai_tokens").tokens, limiter.limits["openai_tokens"] - 1000)
+        self.assertLess(limiter.bucket("openai_requests").tokens, limiter.limits["openai_requests"])
+
+
+if __name__ == "__main__":
+    unittest.main()
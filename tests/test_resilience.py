@@ -0,0 +1,168 @@
+"""
+Unit tests for retries, timeouts, hedging and circuit breakers
+"""
+import asyncio
+import unittest
+import httpx
+from pydantic import BaseModel, ValidationError
+from agents.director_agent import DEFAULT_STAGE_TIMEOUT
+from tools.resilience import DEFAULT_POLICIES, CircuitOpenError, Resilience, is_failure, is_retryable, retry_after
+from tools.tracing import metrics
+
+
+def http_error(status: int, headers=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://api.example.com")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class TestResilience(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.layer = Resilience()
+        self.layer.configure("api", timeout=0.2, max_attempts=3, base_delay=0.001, max_delay=0.05,
+                             failure_threshold=3, reset_timeout=0.05)
+
+    async def test_retries_transient_errors(self):
+        """Test that 5xx responses and timeouts are retried until success"""
+        outcomes = [http_error(503), asyncio.TimeoutError(), "ok"]
+
+        async def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        self.assertEqual(await self.layer.call("api", call), "ok")
+        self.assertEqual(outcomes, [])
+
+    async def test_client_errors_are_not_retried(self):
+        """Test that a 4xx fails immediately and does not trip the breaker"""
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise http_error(404)
+
+        for _ in range(5):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await self.layer.call("api", call)
+
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(self.layer.breaker("api").state, "closed")
+
+    async def test_non_idempotent_calls_skip_ambiguous_retries(self):
+        """Test that a timed-out write is not repeated but a refused one is"""
+        self.assertFalse(is_retryable(asyncio.TimeoutError(), idempotent=False))
+        self.assertFalse(is_retryable(http_error(502), idempotent=False))
+        self.assertTrue(is_retryable(http_error(429), idempotent=False))
+        self.assertTrue(is_retryable(httpx.ConnectError("refused"), idempotent=False))
+
+        calls = []
+
+        async def slow_write():
+            calls.append(1)
+            await asyncio.sleep(1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.layer.call("api", slow_write, idempotent=False)
+        self.assertEqual(len(calls), 1)
+
+    async def test_retry_after_is_respected(self):
+        """Test that the server's Retry-After delay is used and long ones give up"""
+        self.assertEqual(retry_after(http_error(429, {"Retry-After": "0.03"})), 0.03)
+        outcomes = [http_error(429, {"Retry-After": "0.03"}), "ok"]
+
+        async def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        started = asyncio.get_running_loop().time()
+        self.assertEqual(await self.layer.call("api", call), "ok")
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - started, 0.03)
+
+        async def throttled():
+            raise http_error(429, {"Retry-After": "120"})
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.layer.call("api", throttled)
+
+    async def test_breaker_fails_fast_and_recovers(self):
+        """Test that the breaker opens, rejects calls, then closes after a probe"""
+        self.layer.configure("api", max_attempts=1, failure_threshold=2, reset_timeout=0.05)
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            raise ConnectionError("down")
+
+        async def healthy():
+            return "ok"
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await self.layer.call("api", failing)
+        with self.assertRaises(CircuitOpenError):
+            await self.layer.call("api", failing)
+        self.assertEqual(len(calls), 2)
+        self.assertIn('circuit_breaker_state{endpoint="api"} 2', metrics.render())
+
+        await asyncio.sleep(0.06)
+        self.assertEqual(await self.layer.call("api", healthy), "ok")
+        self.assertEqual(self.layer.breaker("api").state, "closed")
+        self.assertIn('circuit_breaker_state{endpoint="api"} 0', metrics.render())
+
+    async def test_invalid_output_and_bugs_leave_the_breaker_closed(self):
+        """Test that validation and programming errors are raised without tripping the breaker"""
+        class Outline(BaseModel):
+            title: str
+
+        async def invalid():
+            Outline()
+
+        async def buggy():
+            raise KeyError("title")
+
+        for _ in range(5):
+            with self.assertRaises(ValidationError):
+                await self.layer.call("api", invalid)
+            with self.assertRaises(KeyError):
+                await self.layer.call("api", buggy)
+
+        self.assertEqual(self.layer.breaker("api").state, "closed")
+        self.assertTrue(is_failure(httpx.ReadTimeout("slow")))
+        self.assertTrue(is_failure(http_error(429)))
+        self.assertFalse(is_failure(http_error(400)))
+
+    async def test_model_attempts_fit_in_a_stage(self):
+        """Test that every model attempt and pause fits within the stage timeout"""
+        policy = DEFAULT_POLICIES["openai"]
+
+        self.assertGreaterEqual(policy.max_attempts, 2)
+        self.assertLessEqual(policy.worst_case, DEFAULT_STAGE_TIMEOUT)
+
+    async def test_hedged_request_returns_the_faster_answer(self):
+        """Test that a slow first request is raced by a second one"""
+        self.layer.configure("search", timeout=1.0, hedge_after=0.02)
+        delays = [0.5, 0.01]
+        cancelled = []
+
+        async def search():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        started = asyncio.get_running_loop().time()
+        self.assertEqual(await self.layer.call("search", search, hedge=True), 0.01)
+        self.assertLess(asyncio.get_running_loop().time() - started, 0.2)
+        await asyncio.sleep(0)
+        self.assertEqual(cancelled, [0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit tests for the search result cache
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from agents.cache import MemoryCache, SQLiteCache
+from tools.search_cache import SearchCache, normalize_query
+
+
+class TestSearchCache(unittest.IsolatedAsyncioTestCase):
+    def test_normalize_query(self):
+        """Test that only case, punctuation and whitespace are normalized"""
+        self.assertEqual(normalize_query("AI in Healthcare"), normalize_query("  ai, in  HEALTHCARE! "))
+        self.assertNotEqual(normalize_query("AI in Healthcare"), normalize_query("AI in Finance"))
+        self.assertNotEqual(normalize_query("dog bites man"), normalize_query("man bites dog"))
+        self.assertNotEqual(normalize_query("python python tutorial"), normalize_query("python tutorial"))
+
+    async def test_concurrent_queries_share_one_request(self):
+        """Test single-flight coalescing and subsequent cache hits"""
+        cache = SearchCache([MemoryCache()])
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"results": [{"url": "https://example.com"}]}
+
+        results = await asyncio.gather(*(cache.get_or_fetch("AI healthcare", fetch) for _ in range(10)))
+        await cache.get_or_fetch("ai, Healthcare", fetch)
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(cache.stats["quota_saved"], 10)
+        self.assertAlmostEqual(cache.stats["hit_rate"], 10 / 11)
+
+    async def test_errors_are_not_cached(self):
+        """Test that error responses trigger a new request next time"""
+        cache = SearchCache([MemoryCache()])
+        responses = [{"status": "error", "error": "429"}, {"results": []}]
+
+        async def fetch():
+            return responses.pop(0)
+
+        self.assertEqual((await cache.get_or_fetch("q", fetch))["status"], "error")
+        self.assertEqual(await cache.get_or_fetch("q", fetch), {"results": []})
+
+    async def test_disk_tier_survives_restart(self):
+        """Test that a new process is served from the on-disk tier"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.sqlite")
+
+            async def fetch():
+                return {"results": ["a"]}
+
+            await SearchCache([MemoryCache(), SQLiteCache(path, table="search_cache")]).get_or_fetch("q", fetch)
+
+            restarted = SearchCache([MemoryCache(), SQLiteCache(path, table="search_cache")])
+
+            async def unreachable():
+                raise AssertionError("should be cached")
+
+            self.assertEqual(await restarted.get_or_fetch("q", unreachable), {"results": ["a"]})
+            self.assertEqual(restarted.stats["hits"], 1)
+
+    async def test_disk_tier_runs_off_the_event_loop(self):
+        """Test that blocking tiers are read and written in a worker thread"""
+        threads = []
+
+        class RecordingTier(MemoryCache):
+            blocking = True
+
+            def get(self, key, max_age=None):
+                threads.append(threading.current_thread())
+                return super().get(key, max_age)
+
+            def set(self, key, value):
+                threads.append(threading.current_thread())
+                super().set(key, value)
+
+        cache = SearchCache([MemoryCache(), RecordingTier()])
+
+        async def fetch():
+            return {"results": []}
+
+        await cache.get_or_fetch("q", fetch)
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Unit tests for section-parallel drafting
+"""
+import time
+import unittest
+from unittest.mock import patch
+from agents.cache import AgentCache, MemoryCache, build_cache, set_agent_cache
+from agents.content_drafter_agent import (
+    ContentDraft, DraftRequest, create_draft, create_section_draft, drafts_by_section, stream_draft
+)
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from agents.sections import extract_headings, section_budgets
+from agents.token_budget import TokenBudget, set_token_budget
+
+SECTIONS = [{"heading": f"Part {i}", "description": f"Covers point {i}"} for i in range(1, 5)]
+BRIEF = {"title": "AI in Healthcare", "sections": SECTIONS, "style_guide": {"tone": "friendly"}}
+
+
+class TestSectionDrafting(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.model = FakeModel(latency=0.1, jitter=0)
+        set_model_backend(self.model)
+        set_model_router(ModelRouter())
+        set_agent_cache(build_cache("none", "", 0, None))
+        set_token_budget(TokenBudget())
+
+    def tearDown(self):
+        set_model_backend(None)
+
+    async def test_sections_are_drafted_concurrently_in_order(self):
+        """Test that each section is one concurrent call and the article keeps the brief's order"""
+        started = time.monotonic()
+        draft = await create_section_draft(DraftRequest(brief=BRIEF, word_count=2000))
+
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertEqual(self.model.calls, 4)
+        self.assertEqual(extract_headings(draft.content), ["AI in Healthcare", "Part 1", "Part 2", "Part 3", "Part 4"])
+        self.assertEqual(draft.title, "AI in Healthcare")
+
+    async def test_shared_context_budgets_and_placeholders(self):
+        """Test that sections get the shared context and their budgets, and placeholders are merged"""
+        seen = []
+
+        async def draft_section(brief, section, word_count, placeholder_format="[PLACEHOLDER]"):
+            seen.append((section["heading"], word_count, brief["style_guide"]["tone"]))
+            return ContentDraft(
+                title=brief["title"],
+                content=f"Text for {section['heading']}",
+                placeholders=["[statistic]", f"[quote {section['heading']}]"],
+                word_count=3
+            )
+
+        sections = [dict(SECTIONS[0], word_count="1000")] + SECTIONS[1:]
+        with patch("agents.content_drafter_agent.draft_section", draft_section):
+            draft = await create_section_draft(DraftRequest(brief={**BRIEF, "sections": sections}, word_count=2500))
+
+        self.assertEqual(sorted(seen), [("Part 1", 1000, "friendly")] + [(f"Part {i}", 500, "friendly") for i in (2, 3, 4)])
+        self.assertEqual(draft.placeholders, ["[statistic]"] + [f"[quote Part {i}]" for i in range(1, 5)])
+        self.assertIn("## Part 2\n\nText for Part 2", draft.content)
+
+    async def test_stream_grows_section_by_section(self):
+        """Test that long briefs stream one partial draft per finished section"""
+        request = DraftRequest(brief=BRIEF, word_count=2000)
+        self.assertTrue(drafts_by_section(request))
+        self.assertFalse(drafts_by_section(DraftRequest(brief=BRIEF, word_count=800)))
+
+        partials = [draft async for draft in stream_draft(request)]
+
+        self.assertEqual([len(extract_headings(p.content)) for p in partials], [2, 3, 4, 5])
+        self.assertEqual(partials[-1].word_count, len(partials[-1].content.split()))
+
+    async def test_create_draft_follows_the_section_flag(self):
+        """Test that create_draft drafts by section when asked and the flag stays out of the cache key"""
+        draft = await create_draft(DraftRequest(brief=BRIEF, word_count=800, by_section=True))
+        self.assertEqual(self.model.calls, 4)
+        self.assertEqual(len(extract_headings(draft.content)), 5)
+
+        set_agent_cache(AgentCache(MemoryCache()))
+        single = await create_draft(DraftRequest(brief=BRIEF, word_count=800, by_section=False))
+        cached = await create_draft(DraftRequest(brief=BRIEF, word_count=800))
+
+        self.assertIsInstance(single, ContentDraft)
+        self.assertEqual(cached, single)
+        self.assertEqual(self.model.calls, 5)
+
+    def test_budgets_split_what_explicit_sections_leave(self):
+        """Test that sections without their own word count share the remainder"""
+        self.assertEqual(section_budgets([{}, {}, {}, {}], 2000), [500] * 4)
+        self.assertEqual(section_budgets([{"word_count": "800"}, {}, {"word_count": "x"}], 2000), [800, 600, 600])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for section-level diffing and incremental regeneration
+"""
+import unittest
+from agents.cache import build_cache, set_agent_cache
+from agents.content_drafter_agent import ContentDraft, DraftRevisionRequest, revise_draft
+from agents.content_writer_agent import FinalContent, FinalContentRevisionRequest, revise_final_content
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from agents.sections import count_words, extract_headings, plan_revision, split_sections
+
+SECTIONS = [{"heading": f"Part {i}", "description": f"Covers point {i}"} for i in range(1, 9)]
+
+
+def document(sections, intro="# AI in Healthcare\n\nWhy it matters.\n\n"):
+    return intro + "\n\n".join(f"## {s['heading']}\n\nText about {s['description'].lower()}." for s in sections) + "\n"
+
+
+class TestSections(unittest.TestCase):
+    def test_split_keeps_subheadings_inside_sections(self):
+        """Test that the document title and deeper headings do not start new sections"""
+        text = "# Title\n\nIntro\n\n## One\n\nA\n\n### Detail\n\nB\n\n## Two\n\nC\n"
+
+        preamble, chunks = split_sections(text)
+
+        self.assertEqual(preamble, "# Title\n\nIntro\n\n")
+        self.assertEqual(len(chunks), 2)
+        self.assertIn("### Detail", chunks[0])
+        self.assertEqual(extract_headings(text), ["Title", "One", "Detail", "Two"])
+        self.assertEqual(count_words("## One\n\nA b  c"), 5)
+
+    def test_plan_reuses_only_unchanged_sections(self):
+        """Test that edited, added and reordered sections are diffed by heading"""
+        previous = [(s["heading"], s) for s in SECTIONS[:3]]
+        edited = dict(SECTIONS[1], description="Covers something new")
+        current = [(s["heading"], s) for s in (SECTIONS[2], edited, SECTIONS[0], SECTIONS[3])]
+
+        plan = plan_revision(previous, current, document(SECTIONS[:3]))
+
+        self.assertEqual(plan.changed, [1, 3])
+        self.assertTrue(plan.chunks[0].startswith("## Part 3"))
+        self.assertTrue(plan.chunks[2].startswith("## Part 1"))
+        self.assertTrue(plan.preamble.startswith("# AI in Healthcare"))
+
+    def test_unstructured_document_is_regenerated(self):
+        """Test that a document without section headings is not kept alongside new sections"""
+        plan = plan_revision([("Part 1", SECTIONS[0])], [("Part 1", SECTIONS[0])], "One long paragraph.")
+
+        self.assertEqual((plan.preamble, plan.changed), ("", [0]))
+
+
+class TestIncrementalRegeneration(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.model = FakeModel(latency=0, jitter=0)
+        set_model_backend(self.model)
+        set_model_router(ModelRouter())
+        set_agent_cache(build_cache("none", "", 0, None))
+        self.brief = {"title": "AI in Healthcare", "sections": SECTIONS, "style_guide": {"tone": "friendly"}}
+        self.draft = ContentDraft(
+            title="AI in Healthcare",
+            content=document(SECTIONS),
+            placeholders=["[PLACEHOLDER]statistic[PLACEHOLDER]"],
+            word_count=0
+        )
+
+    def tearDown(self):
+        set_model_backend(None)
+
+    async def test_one_edited_section_costs_one_call(self):
+        """Test that editing one of eight brief sections redrafts only that section"""
+        sections = list(SECTIONS)
+        sections[4] = dict(sections[4], description="Covers regulation")
+
+        draft = await revise_draft(DraftRevisionRequest(
+            brief={**self.brief, "sections": sections},
+            previous_brief=self.brief,
+            previous_draft=self.draft,
+            word_count=800
+        ))
+
+        self.assertEqual(self.model.calls, 1)
+        _, chunks = split_sections(draft.content)
+        self.assertEqual(len(chunks), 8)
+        self.assertTrue(chunks[4].startswith("## Part 5"))
+        self.assertNotIn("covers point 5", chunks[4])
+        self.assertEqual(chunks[3], split_sections(self.draft.content)[1][3])
+        self.assertEqual(draft.word_count, count_words(draft.content))
+        self.assertEqual(draft.placeholders[0], "[PLACEHOLDER]statistic[PLACEHOLDER]")
+
+    async def test_unchanged_brief_makes_no_calls(self):
+        """Test that an identical brief reuses the whole draft"""
+        draft = await revise_draft(DraftRevisionRequest(
+            brief=self.brief, previous_brief=self.brief, previous_draft=self.draft
+        ))
+
+        self.assertEqual(self.model.calls, 0)
+        self.assertEqual(split_sections(draft.content), split_sections(self.draft.content))
+
+    async def test_final_content_polishes_changed_sections_only(self):
+        """Test that final content is updated section by section with local headings and counts"""
+        revised = self.draft.content.replace("Text about covers point 2.", "Text about new findings.")
+        previous_final = FinalContent(
+            title="AI in Healthcare: A Guide",
+            content=document(SECTIONS),
+            meta_description="How AI is changing care",
+            headings=[],
+            word_count=0,
+            seo_score=80.0
+        )
+
+        final = await revise_final_content(FinalContentRevisionRequest(
+            draft={"content": revised},
+            previous_draft=self.draft.dict(),
+            previous_final=previous_final,
+            seo_requirements={"keywords": ["AI"]},
+            style_guide={}
+        ))
+
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(final.headings, ["AI in Healthcare"] + [s["heading"] for s in SECTIONS])
+        self.assertEqual(final.word_count, count_words(final.content))
+        self.assertEqual((final.title, final.seo_score), ("AI in Healthcare: A Guide", 80.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for the user settings cache
+"""
+import asyncio
+import unittest
+from tools.settings_cache import UserSettingsCache
+
+
+class TestUserSettingsCache(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_misses_share_one_fetch(self):
+        """Test that fifty lookups for one user fetch once"""
+        cache = UserSettingsCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"tone": "casual"}
+
+        results = await asyncio.gather(*(cache.get(("url", "u1"), fetch) for _ in range(50)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == {"tone": "casual"} for result in results))
+
+    async def test_failures_are_not_cached(self):
+        """Test that a failed fetch is retried on the next lookup"""
+        cache = UserSettingsCache()
+
+        async def failing():
+            raise ConnectionError("down")
+
+        async def working():
+            return {"tone": "formal"}
+
+        with self.assertRaises(ConnectionError):
+            await cache.get("u1", failing)
+        self.assertEqual(await cache.get("u1", working), {"tone": "formal"})
+
+    async def test_ttl_lru_and_invalidation(self):
+        """Test expiry, eviction and explicit invalidation"""
+        cache = UserSettingsCache(ttl=0.01, max_entries=2)
+        cache.put("a", {"n": 1})
+        cache.put("b", {"n": 2})
+        cache.put("c", {"n": 3})
+        self.assertIsNone(cache._lookup("a"))
+
+        await asyncio.sleep(0.02)
+        self.assertIsNone(cache._lookup("c"))
+
+        cache.ttl = 60
+        cache.put("d", {"n": 4})
+        cache.invalidate("d")
+        self.assertIsNone(cache._lookup("d"))
+
+    async def test_prefetch_loads_missing_users_in_one_call(self):
+        """Test that prefetch issues one bulk fetch and caches absent users"""
+        cache = UserSettingsCache()
+        cache.put("u1", {"n": 1})
+        batches = []
+
+        async def fetch_many(keys):
+            batches.append(keys)
+            return {"u2": {"n": 2}}
+
+        await cache.prefetch(["u1", "u2", "u2", "u3"], fetch_many)
+
+        self.assertEqual(batches, [["u2", "u3"]])
+        self.assertEqual(cache._lookup("u2"), {"n": 2})
+        self.assertEqual(cache._lookup("u3"), {})
+
+    async def test_pinned_keys_neither_expire_nor_get_evicted(self):
+        """Test that a pinned batch keeps its entries until the pin is released"""
+        cache = UserSettingsCache(ttl=0.01, max_entries=2)
+        with cache.pin(["a", "b"]):
+            cache.put("a", {"n": 1})
+            cache.put("b", {"n": 2})
+            cache.put("c", {"n": 3})
+            await asyncio.sleep(0.02)
+            self.assertEqual(cache._lookup("a"), {"n": 1})
+            self.assertEqual(cache._lookup("b"), {"n": 2})
+            self.assertIsNone(cache._lookup("c"))
+
+        self.assertIsNone(cache._lookup("a"))
+        self.assertEqual(cache.pins, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
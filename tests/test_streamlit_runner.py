@@ -0,0 +1,239 @@
+"""
+Unit tests for the Streamlit background runner
+"""
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock
+from pydantic import BaseModel
+from agents.cache import AgentCache, MemoryCache, build_cache, set_agent_cache
+from agents.checkpoints import set_checkpoint_store
+from agents.director_agent import BlogRequest, DirectorDependencies
+from agents.model_backends import FakeModel, set_model_backend
+from agents.model_routing import ModelRouter, set_model_router
+from streamlit_runner import BackgroundRunner, ResultStore, agent_task, blog_post_task
+
+
+class TestBackgroundRunner(unittest.TestCase):
+    def setUp(self):
+        self.runner = BackgroundRunner()
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def wait(self, handle, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not handle.done() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_submit_returns_immediately_and_reports_progress(self):
+        """Test that a submitted coroutine runs in the background and exposes progress"""
+        release = threading.Event()
+
+        async def generate(handle):
+            handle.update(stage="draft", draft="Hello")
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            return {"content": "Hello world"}
+
+        handle = self.runner.submit(generate, name="AI")
+        deadline = time.monotonic() + 2
+        while "draft" not in handle.progress and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(handle.status, "running")
+        self.assertEqual(handle.progress, {"stage": "draft", "draft": "Hello"})
+        release.set()
+        self.assertEqual(handle.result(timeout=2), {"content": "Hello world"})
+        self.assertEqual(handle.status, "succeeded")
+        self.assertIsNotNone(handle.finished)
+
+    def test_all_submissions_share_one_loop(self):
+        """Test that work from separate reruns runs concurrently on the same loop"""
+        async def loop_id(handle):
+            await asyncio.sleep(0.05)
+            return id(asyncio.get_running_loop())
+
+        started = time.monotonic()
+        handles = [self.runner.submit(loop_id) for _ in range(3)]
+        loops = {handle.result(timeout=2) for handle in handles}
+
+        self.assertEqual(len(loops), 1)
+        self.assertLess(time.monotonic() - started, 0.14)
+
+    def test_failures_and_cancellation(self):
+        """Test that errors are kept on the handle and cancelled work stops"""
+        async def fail(handle):
+            raise ValueError("boom")
+
+        async def forever(handle):
+            await asyncio.sleep(60)
+
+        failed = self.runner.submit(fail)
+        self.wait(failed)
+        self.assertEqual(failed.status, "failed")
+        self.assertIsInstance(failed.error(), ValueError)
+
+        stuck = self.runner.submit(forever)
+        stuck.cancel()
+        self.wait(stuck)
+        self.assertEqual(stuck.status, "cancelled")
+        self.assertIsNone(stuck.error())
+
+    def test_shutdown_runs_cleanup_on_the_loop(self):
+        """Test that cleanup runs on the runner's loop before it stops"""
+        seen = []
+
+        async def cleanup():
+            seen.append(asyncio.get_running_loop())
+
+        loop = self.runner.loop
+        self.runner.shutdown(cleanup)
+
+        self.assertEqual(seen, [loop])
+        self.assertFalse(self.runner.thread.is_alive())
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.runner = BackgroundRunner()
+        self.calls = []
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def make(self, value, fail=False):
+        async def run(handle):
+            self.calls.append(value)
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError("model error")
+            return value
+        return run
+
+    def test_runs_are_shared_per_topic(self):
+        """Test that reruns and sessions asking for the same topic reuse one run"""
+        store = ResultStore(self.runner)
+
+        first = store.get_or_submit("outline", "AI in Healthcare", self.make("a"))
+        second = store.get_or_submit("outline", "  ai in healthcare ", self.make("b"))
+        other = store.get_or_submit("draft", "AI in Healthcare", self.make("c"))
+
+        self.assertIs(first, second)
+        self.assertEqual(first.result(timeout=2), "a")
+        self.assertEqual(other.result(timeout=2), "c")
+        self.assertEqual(sorted(self.calls), ["a", "c"])
+        self.assertEqual((store.hits, store.misses), (1, 2))
+
+    def test_regenerate_and_failures_submit_again(self):
+        """Test that invalidated and failed runs are replaced on the next request"""
+        store = ResultStore(self.runner)
+
+        failed = store.get_or_submit("outline", "AI", self.make("a", fail=True))
+        with self.assertRaises(RuntimeError):
+            failed.result(timeout=2)
+        retried = store.get_or_submit("outline", "AI", self.make("b"))
+        self.assertEqual(retried.result(timeout=2), "b")
+
+        store.invalidate("outline", "AI")
+        regenerated = store.get_or_submit("outline", "AI", self.make("c"))
+        self.assertEqual(regenerated.result(timeout=2), "c")
+        self.assertEqual(self.calls, ["a", "b", "c"])
+
+    def test_memory_is_bounded(self):
+        """Test that the least recently used runs are evicted and expired runs replaced"""
+        store = ResultStore(self.runner, max_entries=2)
+        for topic in ("one", "two"):
+            store.get_or_submit("outline", topic, self.make(topic)).result(timeout=2)
+        store.get_or_submit("outline", "one", self.make("one again"))
+        store.get_or_submit("outline", "three", self.make("three")).result(timeout=2)
+
+        self.assertEqual(len(store), 2)
+        self.assertNotIn(ResultStore.key("outline", "two"), store.handles)
+
+        expiring = ResultStore(self.runner, ttl=0.01)
+        expiring.get_or_submit("outline", "AI", self.make("old")).result(timeout=2)
+        time.sleep(0.02)
+        self.assertEqual(expiring.get_or_submit("outline", "AI", self.make("new")).result(timeout=2), "new")
+
+
+class Outline(BaseModel):
+    title: str
+
+
+class TestAgentTask(unittest.TestCase):
+    def setUp(self):
+        self.runner = BackgroundRunner()
+        set_model_backend(None)
+        set_model_router(ModelRouter())
+        set_agent_cache(AgentCache(MemoryCache()))
+        self.agent = AsyncMock()
+        self.agent.model = "openai:gpt-4"
+        self.agent._system_prompts = ()
+        self.agent.result_type = Outline
+        self.agent.run.return_value.data = Outline(title="AI")
+
+    def tearDown(self):
+        self.runner.shutdown()
+        set_agent_cache(build_cache("none", "", 0, None))
+
+    def test_regenerate_calls_the_model_again(self):
+        """Test that a regenerated run skips the response cache while a plain resubmit does not"""
+        store = ResultStore(self.runner)
+
+        first = store.get_or_submit("outline", "AI", agent_task(self.agent, "Create outline for: AI"))
+        self.assertEqual(first.result(timeout=2), {"title": "AI"})
+        store.invalidate("outline", "AI")
+        cached = store.get_or_submit("outline", "AI", agent_task(self.agent, "Create outline for: AI"))
+        self.assertEqual(cached.result(timeout=2), {"title": "AI"})
+        self.assertEqual(self.agent.run.await_count, 1)
+
+        store.invalidate("outline", "AI")
+        self.agent.run.return_value.data = Outline(title="AI, again")
+        regenerated = store.get_or_submit("outline", "AI", agent_task(self.agent, "Create outline for: AI", fresh=True))
+
+        self.assertEqual(regenerated.result(timeout=2), {"title": "AI, again"})
+        self.assertEqual(self.agent.run.await_count, 2)
+
+
+class RecordingHandle:
+    def __init__(self):
+        self.progress = {}
+        self.updates = []
+
+    def update(self, **progress):
+        self.progress.update(progress)
+        self.updates.append(dict(self.progress))
+
+
+class TestBlogPostTask(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        set_model_backend(FakeModel(latency=0.05, jitter=0, stream_steps=5))
+        set_model_router(ModelRouter())
+        set_agent_cache(build_cache("none", "", 0, None))
+        set_checkpoint_store(None)
+
+    def tearDown(self):
+        set_model_backend(None)
+
+    async def test_outline_text_streams_into_the_handle(self):
+        """Test that partial outline text reaches the handle before the outline stage finishes"""
+        request = BlogRequest(user_id="u1", topic="AI in Healthcare", keywords=["AI"], content_type="blog post", publish=False)
+        deps = DirectorDependencies(supabase_url="test_url", supabase_key="test_key", execution_mode="llm")
+        handle = RecordingHandle()
+
+        result = await blog_post_task(request, deps)(handle)
+
+        streamed = [
+            u["content"] for u in handle.updates
+            if "content" in u and u["stages"].get("outline") == "running"
+        ]
+        self.assertGreater(len(set(streamed)), 1)
+        self.assertTrue(all(len(a) <= len(b) for a, b in zip(streamed, streamed[1:])))
+        self.assertEqual(handle.progress["stages"]["outline"], "success")
+        self.assertEqual(result["status"], "success")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Unit tests for the shared Supabase client pool
+"""
+import threading
+import time
+import unittest
+from tools.supabase_pool import SupabaseClientPool
+
+
+class TestSupabaseClientPool(unittest.TestCase):
+    def test_one_client_per_credentials(self):
+        """Test that clients are built once per url and key"""
+        calls = []
+
+        def factory(url, key):
+            calls.append((url, key))
+            return object()
+
+        pool = SupabaseClientPool(factory=factory)
+        first = pool.get("url", "key")
+
+        self.assertIs(pool.get("url", "key"), first)
+        self.assertIsNot(pool.get("url", "other_key"), first)
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_first_use_builds_once(self):
+        """Test that racing threads share a single client"""
+        calls = []
+
+        def slow_factory(url, key):
+            calls.append(url)
+            time.sleep(0.01)
+            return object()
+
+        pool = SupabaseClientPool(factory=slow_factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pool.get("url", "key"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(client is results[0] for client in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,38 +1,77 @@
 """
-    Integration tests for Supabase Tools
-    """
-    import unittest
-    from unittest.mock import AsyncMock, patch
-    from tools.supabase_tools import save_blog_post, BlogPost
-    from pydantic_ai import RunContext
-
-    class TestSupabaseTools(unittest.IsolatedAsyncioTestCase):
-        async def test_save_blog_post(self):
-            """Test saving blog post to Supabase"""
-            test_post = BlogPost(
-                title="Test Post",
-                content="Test content",
-                author="Test Author",
-                tags=["test"]
-            )
-
-            test_deps = RunContext(deps={
-                "url": "test_url",
-                "key": "test_key"
-            })
-
-            # Mock Supabase client
-            with patch('supabase.create_client', new_callable=AsyncMock) as mock_client:
-                mock_instance = AsyncMock()
-                mock_instance.table().insert().execute.return_value = {
-                    "data": [{"id": "test_id"}]
-                }
-                mock_client.return_value = mock_instance
-
-                result = await save_blog_post(test_deps, test_post)
-
-                self.assertEqual(result["status"], "success")
-                self.assertIn("id", result)
-
-    if __name__ == "__main__":
-        unittest.main()
+Integration tests for Supabase Tools
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+from agents.director_agent import ToolContext
+from tools.supabase_pool import supabase_pool
+from tools.supabase_tools import save_blog_post, BlogPost, SupabaseDeps
+from tools.vector_index import VectorIndex, set_vector_index
+
+class TestSupabaseTools(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        set_vector_index(None)
+        supabase_pool.clear()
+
+    def tearDown(self):
+        set_vector_index(None)
+        supabase_pool.clear()
+
+    async def test_save_blog_post(self):
+        """Test saving blog post to Supabase"""
+        test_post = BlogPost(
+            title="Test Post",
+            content="Test content",
+            author="Test Author",
+            tags=["test"]
+        )
+
+        test_deps = ToolContext(deps=SupabaseDeps(
+            url="test_url",
+            key="test_key"
+        ))
+
+        # Mock Supabase client
+        mock_instance = MagicMock()
+
+        def upsert(rows, on_conflict=None):
+            query = MagicMock()
+            query.execute.return_value.data = [{"id": "test_id", "created_at": "now", **row} for row in rows]
+            return query
+
+        mock_instance.table.return_value.upsert.side_effect = upsert
+        with patch.object(supabase_pool, 'factory', return_value=mock_instance):
+            result = await save_blog_post(test_deps, test_post)
+
+            self.assertEqual(result["status"], "success")
+            self.assertIn("id", result)
+
+    async def test_resaving_a_post_is_not_its_own_duplicate(self):
+        """Test that only other stored posts are reported as duplicates"""
+        set_vector_index(VectorIndex())
+        ids = {}
+        mock_instance = MagicMock()
+
+        def upsert(rows, on_conflict=None):
+            query = MagicMock()
+            query.execute.return_value.data = [
+                {"id": ids.setdefault(row[on_conflict], len(ids) + 1), "created_at": "now", **row} for row in rows
+            ]
+            return query
+
+        mock_instance.table.return_value.upsert.side_effect = upsert
+        deps = ToolContext(deps=SupabaseDeps(url="test_url", key="test_key"))
+        post = BlogPost(title="AI in Healthcare", content="AI reads scans faster.", author="A", tags=["ai"])
+        copy = BlogPost(title="AI in Healthcare", content="AI reads scans faster.", author="B", tags=["ai"])
+
+        with patch.object(supabase_pool, 'factory', return_value=mock_instance):
+            first = await save_blog_post(deps, post)
+            again = await save_blog_post(deps, post)
+            other = await save_blog_post(deps, copy)
+
+        self.assertEqual(again["id"], first["id"])
+        self.assertEqual(again["duplicates"], [])
+        self.assertEqual([d["id"] for d in other["duplicates"]], [first["id"]])
+
+if __name__ == "__main__":
+    unittest.main()
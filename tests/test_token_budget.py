@@ -0,0 +1,97 @@
+"""
+Unit tests for prompt token budgets and compaction
+"""
+import unittest
+from agents.token_budget import (
+    StagePolicy, TokenBudget, build_token_budget, count_tokens, prune, summarize_text
+)
+from tools.tracing import metrics
+
+
+def brave_response(count: int) -> dict:
+    results = [
+        {
+            "url": f"https://example.com/{i % (count // 2)}",
+            "title": f"Source {i % (count // 2)}",
+            "description": "Remote work is growing. " * 30,
+            "page_age": "2024-01-01",
+            "profile": {"name": "Example", "img": "https://example.com/favicon.png"},
+            "thumbnail": {"src": "https://example.com/thumb.png", "original": "https://example.com/big.png"},
+        }
+        for i in range(count)
+    ]
+    return {"type": "search", "query": {"original": "remote work"}, "web": {"results": results}}
+
+
+class TestTokenBudget(unittest.TestCase):
+    def test_search_responses_are_reduced_to_sources(self):
+        """Test that raw search results keep title, URL and description and are deduped by URL"""
+        sources = prune(brave_response(10))
+
+        self.assertEqual(len(sources), 5)
+        self.assertEqual(set(sources[0]), {"title", "url", "description"})
+
+    def test_unused_fields_are_stripped(self):
+        """Test that brief fields the drafter does not use are not forwarded"""
+        budget = TokenBudget()
+        brief = {
+            "title": "Remote Work",
+            "sections": [{"heading": "Intro", "summary": "Why now"}],
+            "keywords": ["remote", "remote", "hybrid"],
+            "references": ["https://example.com/a"] * 3,
+            "style_guide": {"tone": "friendly"},
+        }
+
+        params = budget.compact("draft", {"brief": brief, "word_count": 800})
+
+        self.assertEqual(params["word_count"], 800)
+        self.assertNotIn("references", params["brief"])
+        self.assertEqual(params["brief"]["keywords"], ["remote", "hybrid"])
+
+    def test_research_is_trimmed_to_the_budget(self):
+        """Test that oversized research is summarized until it fits and the savings are reported"""
+        budget = build_token_budget("brief=400")
+        research = {
+            "topic": "remote work",
+            "sources": brave_response(80),
+            "key_points": ["Productivity rose. " * 40, "Productivity rose. " * 40, "Hiring widened."],
+            "competitor_analysis": {"top_competitors": [], "content_gaps": []},
+        }
+        params = {"research_data": research, "content_type": "blog", "target_audience": "managers"}
+
+        compacted = budget.compact("brief", params)
+
+        self.assertLessEqual(count_tokens(compacted), 400)
+        self.assertNotIn("competitor_analysis", compacted["research_data"])
+        self.assertEqual(compacted["target_audience"], "managers")
+        report = budget.report()["brief"]
+        self.assertEqual(report["calls"], 1)
+        self.assertGreater(report["tokens_saved"], count_tokens(params) // 2)
+        self.assertIn('prompt_tokens_saved_total{stage="brief"}', metrics.render())
+
+    def test_protected_fields_are_never_shortened(self):
+        """Test that the draft text reaches the writer intact even over budget"""
+        budget = TokenBudget({"final": StagePolicy("draft", ("title", "content"), ("content",), budget=10)})
+        content = "# Title\n\n" + "A long paragraph. " * 200
+
+        params = budget.compact("final", {"draft": {"title": "T", "content": content, "word_count": 600}})
+
+        self.assertEqual(params["draft"], {"title": "T", "content": content.strip()})
+
+    def test_summaries_keep_leading_sentences(self):
+        """Test that summaries keep whole distinct sentences within the limit"""
+        text = "First point. First point. Second point! Third point is longer than the rest."
+
+        self.assertEqual(summarize_text(text, 30), "First point. Second point!")
+        self.assertTrue(summarize_text("word " * 50, 20).endswith("…"))
+
+    def test_invalid_budget_spec(self):
+        """Test that unknown stages and non-numeric budgets are rejected"""
+        with self.assertRaises(ValueError):
+            build_token_budget("research=100")
+        with self.assertRaises(ValueError):
+            build_token_budget("brief=lots")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for tracing and metrics
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from agents.pipeline import Pipeline, Stage
+from tools.resilience import Resilience
+from tools.tracing import NOOP_SPAN, JSONLSink, MetricsRegistry, Sink, Tracer, configure_tracing, current_span, tracer
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span):
+        self.spans.append(span)
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        configure_tracing([])
+
+    async def test_disabled_tracer_returns_noop_span(self):
+        """Test that spans cost nothing until a sink is configured"""
+        disabled = Tracer()
+        with disabled.span("anything", tokens=1) as span:
+            span.set(cache_hit=True)
+            span.fail("ignored")
+        self.assertIs(span, NOOP_SPAN)
+
+    async def test_metrics_registry_counts_spans(self):
+        """Test histograms, status counters and accumulated attributes"""
+        registry = MetricsRegistry()
+        local = Tracer([registry])
+
+        with local.span("agent.run", input_tokens=10, output_tokens=5, cache_hit=True):
+            pass
+        with self.assertRaises(ValueError):
+            with local.span("agent.run"):
+                raise ValueError("boom")
+        with local.span("tool.search_web") as span:
+            span.fail("quota exceeded")
+
+        text = registry.render()
+        self.assertIn('spans_total{span="agent.run",status="ok"} 1.0', text)
+        self.assertIn('spans_total{span="agent.run",status="error"} 1.0', text)
+        self.assertIn('spans_total{span="tool.search_web",status="error"} 1.0', text)
+        self.assertIn('input_tokens_total{span="agent.run"} 10.0', text)
+        self.assertIn('cache_hits_total{span="agent.run"} 1.0', text)
+        self.assertIn('span_duration_seconds_count{span="agent.run"} 2', text)
+
+        table = registry.summary_table()
+        self.assertIn("agent.run", table)
+        self.assertIn("tool.search_web", table)
+
+    async def test_jsonl_sink_writes_one_line_per_span(self):
+        """Test that finished spans are appended as JSON"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces", "spans.jsonl")
+            sink = JSONLSink(path)
+            local = Tracer([sink])
+            with local.span("stage.research", rows=3):
+                pass
+            sink.close()
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["name"], "stage.research")
+        self.assertEqual(records[0]["status"], "ok")
+        self.assertEqual(records[0]["attributes"], {"rows": 3})
+
+    async def test_pipeline_emits_stage_spans(self):
+        """Test that each pipeline stage is traced under its own name"""
+        registry = MetricsRegistry()
+        configure_tracing([registry])
+
+        async def work(inputs):
+            await asyncio.sleep(0.01)
+            return "done"
+
+        await Pipeline([Stage("outline", work), Stage("save", work, depends_on=("outline",))]).run()
+
+        self.assertEqual(set(registry.histograms), {"stage.outline", "stage.save"})
+
+    async def test_spans_link_to_their_parent_across_tasks(self):
+        """Test that nested spans, also in stage tasks, share the root's trace id"""
+        sink = ListSink()
+        configure_tracing([sink])
+
+        async def work(inputs):
+            with tracer.span("agent.run"):
+                return "done"
+
+        with tracer.span("blog.create") as root:
+            await Pipeline([Stage("outline", work)]).run()
+        with tracer.span("blog.create") as other:
+            pass
+
+        spans = {span.name: span for span in sink.spans if span is not other}
+        self.assertEqual({span.trace_id for span in spans.values()}, {root.trace_id})
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(spans["stage.outline"].parent_id, root.span_id)
+        self.assertEqual(spans["agent.run"].parent_id, spans["stage.outline"].span_id)
+        self.assertNotEqual(other.trace_id, root.trace_id)
+        self.assertIs(current_span(), NOOP_SPAN)
+
+    async def test_retries_are_recorded_on_the_active_span(self):
+        """Test that resilience.call adds its retries to the span it runs in"""
+        registry = MetricsRegistry()
+        local = Tracer([registry])
+        layer = Resilience()
+        layer.configure("api", max_attempts=3, base_delay=0.001, max_delay=0.01)
+        outcomes = [ConnectionError("reset"), ConnectionError("reset"), "ok"]
+
+        async def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        with local.span("tool.search_web") as span:
+            await layer.call("api", call)
+
+        self.assertEqual(span.attributes["retries"], 2)
+        self.assertIn('retries_total{span="tool.search_web"} 2.0', registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
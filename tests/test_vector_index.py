@@ -0,0 +1,203 @@
+"""
+Unit tests for the local vector index
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+import numpy as np
+from agents.research_manager_agent import ResearchDependencies, ResearchRequest, conduct_research
+from tools.vector_index import (
+    ENTRY_FILE, POST, TOPIC, VECTOR_FILE, VectorIndex, find_duplicate_posts, index_post, set_vector_index
+)
+
+# Rewordings of one topic, scoring at least the 0.95 reuse threshold
+NEAR_DUPLICATES = [
+    ("AI in Healthcare", "Healthcare AI trends"),
+    ("AI in Healthcare", "The future of AI in healthcare"),
+    ("Remote work tips", "Tips for remote work"),
+    ("Electric cars", "Electric car trends"),
+]
+
+# Topics differing in a word that names the subject, scoring below it
+NEAR_MISSES = [
+    ("Benefits of remote work", "Drawbacks of remote work"),
+    ("Python for beginners", "Python for experts"),
+    ("Best laptops 2024", "Best laptops 2025"),
+    ("AI in Healthcare", "AI in healthcare 2024"),
+    ("Electric cars", "Electric bikes"),
+]
+
+
+class TestVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "index")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_near_duplicates_rank_above_other_topics(self):
+        """Test that reworded topics score high and unrelated ones low"""
+        index = VectorIndex()
+        index.add("topic:1", "AI in Healthcare", TOPIC)
+        index.add("topic:2", "AI in Finance", TOPIC)
+        index.add("post:1", "AI in Healthcare", POST)
+
+        matches = index.search("Healthcare AI", k=5, kind=TOPIC)
+
+        self.assertEqual([m.id for m in matches], ["topic:1", "topic:2"])
+        self.assertGreaterEqual(matches[0].score, index.reuse_threshold)
+        self.assertLess(matches[1].score, 0.75)
+
+    def test_reworded_topics_reach_reuse_threshold(self):
+        """Test that rewordings of a topic, including the framing word "trends", count as the same topic"""
+        for earlier, later in NEAR_DUPLICATES:
+            index = VectorIndex()
+            index.add("topic:1", earlier, TOPIC)
+            with self.subTest(earlier=earlier, later=later):
+                self.assertEqual(len(index.search(later, kind=TOPIC, threshold=index.reuse_threshold)), 1)
+
+    def test_synonyms_are_not_matched(self):
+        """Test the embedder's documented limit: only shared words count"""
+        index = VectorIndex()
+        index.add("topic:1", "AI in Healthcare", TOPIC)
+
+        self.assertLess(index.search("Artificial intelligence in medicine", kind=TOPIC, threshold=-1.0)[0].score, 0.2)
+
+    def test_near_miss_topics_stay_below_reuse_threshold(self):
+        """Test that topics differing in one meaningful word are not treated as the same topic"""
+        for earlier, later in NEAR_MISSES:
+            index = VectorIndex()
+            index.add("topic:1", earlier, TOPIC)
+            with self.subTest(earlier=earlier, later=later):
+                self.assertEqual(index.search(later, kind=TOPIC, threshold=index.reuse_threshold), [])
+
+    def test_saved_index_reloads_memory_mapped(self):
+        """Test that saved entries survive a reload, are memory-mapped and upserts replace them"""
+        index = VectorIndex(self.directory)
+        index.add("topic:1", "AI in Healthcare", TOPIC, {"topic": "AI in Healthcare"})
+        index.save()
+
+        reloaded = VectorIndex(self.directory)
+        self.assertEqual(len(reloaded), 1)
+        self.assertIsInstance(reloaded.vectors, np.memmap)
+        self.assertEqual(reloaded.search("AI in Healthcare")[0].metadata, {"topic": "AI in Healthcare"})
+
+        reloaded.add("topic:1", "Remote work", TOPIC)
+        reloaded.save()
+        latest = VectorIndex(self.directory)
+        self.assertEqual(len(latest), 1)
+        self.assertEqual([m.text for m in latest.search("AI in Healthcare Remote work", k=5)], ["Remote work"])
+
+    def test_saves_append_in_batches(self):
+        """Test that entries are buffered and each flush appends only its own rows"""
+        index = VectorIndex(self.directory, flush_every=2)
+        index.add("post:1", "First post", POST)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, VECTOR_FILE)))
+        index.add("post:2", "Second post", POST)
+        index.add("post:3", "Third post", POST)
+
+        row_bytes = index.dim * 4
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, VECTOR_FILE)), 2 * row_bytes)
+        self.assertEqual(index.search("Third post", k=1)[0].id, "post:3")
+        index.save()
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, VECTOR_FILE)), 3 * row_bytes)
+
+    def test_workers_sharing_a_directory_keep_each_others_entries(self):
+        """Test that separate index instances append instead of overwriting one another"""
+        first, second = VectorIndex(self.directory), VectorIndex(self.directory)
+        first.add("post:1", "AI in Healthcare", POST)
+        second.add("post:2", "Remote work", POST)
+        first.save()
+        second.save()
+
+        self.assertEqual(first.search("Remote work", k=1)[0].id, "post:2")
+        self.assertEqual(len(VectorIndex(self.directory)), 2)
+
+    def test_partial_write_is_ignored_and_repaired(self):
+        """Test that a line left by a crashed writer is skipped and overwritten by the next save"""
+        index = VectorIndex(self.directory)
+        index.add("post:1", "AI in Healthcare", POST)
+        index.save()
+        with open(os.path.join(self.directory, ENTRY_FILE), "ab") as f:
+            f.write(b'{"id": "post:9", "ki')
+
+        reopened = VectorIndex(self.directory)
+        self.assertEqual(len(reopened), 1)
+        reopened.add("post:2", "Remote work", POST)
+        reopened.save()
+        self.assertEqual(len(VectorIndex(self.directory)), 2)
+
+    def test_lsh_finds_the_nearest_entry(self):
+        """Test that LSH candidate selection still returns the exact match"""
+        index = VectorIndex(self.directory, lsh_bits=8, lsh_tables=4, flush_every=500)
+        for i in range(2100):
+            index.add(f"post:{i}", f"Post number {i} about subject {i * 7}", POST)
+        index.save()
+
+        matches = VectorIndex(self.directory, lsh_bits=8, lsh_tables=4).search("Post number 1234 about subject 8638", k=1)
+
+        self.assertEqual(matches[0].id, "post:1234")
+
+    def test_duplicate_posts_are_flagged(self):
+        """Test that only posts above the duplicate threshold are reported"""
+        index = VectorIndex(duplicate_threshold=0.9)
+        content = "AI helps doctors read scans faster and spot disease earlier."
+        index_post(index, 42, "AI in Healthcare", content)
+
+        self.assertEqual(find_duplicate_posts(index, "AI in Healthcare", content)[0].metadata["post_id"], 42)
+        self.assertEqual(find_duplicate_posts(index, "Remote work", "Teams collaborate across time zones."), [])
+
+
+class TestResearchPriorWork(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.index = VectorIndex()
+        set_vector_index(self.index)
+        self.deps = ResearchDependencies(web_search_api_key="key", supabase_url="https://db.example", supabase_key="key")
+        self.sources = AsyncMock(return_value=["https://example.com/ai-diagnostics"])
+
+    def tearDown(self):
+        set_vector_index(None)
+
+    async def research(self, topic, keywords=("AI", "health"), **kwargs):
+        with patch("agents.research_manager_agent.gather_sources", self.sources), \
+                patch("agents.research_manager_agent.keyword_analysis", AsyncMock(return_value={})), \
+                patch("agents.research_manager_agent.competitor_analysis", AsyncMock(return_value={})):
+            return await conduct_research(ResearchRequest(topic=topic, keywords=list(keywords)), self.deps, **kwargs)
+
+    async def test_similar_topic_is_surfaced_next_to_fresh_research(self):
+        """Test that by default prior work is only listed and research runs again"""
+        await self.research("AI in Healthcare")
+        result = await self.research("Healthcare AI")
+
+        self.assertEqual(self.sources.await_count, 2)
+        self.assertEqual(result.topic, "Healthcare AI")
+        self.assertIsNone(result.reused_from)
+        self.assertEqual([p["topic"] for p in result.prior_work], ["AI in Healthcare"])
+        self.assertNotIn("result", result.prior_work[0])
+        self.assertEqual({m.kind for m in self.index.search("Key point 1 based on research", k=10)}, {TOPIC})
+
+    async def test_reuse_is_opt_in_and_requires_matching_keywords(self):
+        """Test that reuse returns the earlier research unchanged and only for the same keywords"""
+        first = await self.research("AI in Healthcare")
+        reused = await self.research("Healthcare AI", reuse=True)
+        other_keywords = await self.research("Healthcare AI", keywords=("AI", "hospitals"), reuse=True)
+
+        self.assertEqual((reused.topic, reused.reused_from), ("AI in Healthcare", "AI in Healthcare"))
+        self.assertEqual(reused.sources, first.sources)
+        self.assertIsNone(other_keywords.reused_from)
+        self.assertEqual(self.sources.await_count, 2)
+
+    async def test_near_miss_topics_get_their_own_research(self):
+        """Test that topics differing in one meaningful word are neither reused nor surfaced"""
+        for earlier, later in NEAR_MISSES:
+            await self.research(earlier, keywords=("guide",))
+            result = await self.research(later, keywords=("guide",), reuse=True)
+            with self.subTest(earlier=earlier, later=later):
+                self.assertIsNone(result.reused_from)
+                self.assertEqual(result.prior_work, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit tests for the WordPress token cache
+"""
+import asyncio
+import base64
+import json
+import time
+import unittest
+from tools.wordpress_auth import WordPressTokenCache, authorized_request, token_expiry
+
+
+def jwt(exp: float, nonce: int = 0) -> str:
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": exp, "n": nonce}).encode()).decode().rstrip("=")
+    return f"header.{claims}.signature"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+class TestWordPressTokenCache(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_publishers_share_one_auth_call(self):
+        """Test that fifty concurrent lookups authenticate once"""
+        cache = WordPressTokenCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return jwt(time.time() + 3600)
+
+        tokens = await asyncio.gather(*(cache.get("https://blog.example", "admin", fetch) for _ in range(50)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(tokens)), 1)
+        self.assertEqual(await cache.get("https://blog.example/", "admin", fetch), tokens[0])
+        self.assertEqual(len(calls), 1)
+
+    async def test_expiry_is_read_from_the_token(self):
+        """Test that expired tokens are replaced and exp claims are parsed"""
+        self.assertEqual(token_expiry(jwt(1234.0)), 1234.0)
+        self.assertIsNone(token_expiry("opaque-token"))
+
+        cache = WordPressTokenCache(refresh_margin=0)
+        issued = [jwt(time.time() - 1, 1), jwt(time.time() + 3600, 2)]
+
+        async def fetch():
+            return issued.pop(0)
+
+        first = await cache.get("https://blog.example", "admin", fetch)
+        second = await cache.get("https://blog.example", "admin", fetch)
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(issued, [])
+
+    async def test_refreshes_ahead_of_expiry(self):
+        """Test that a token near expiry is still served while a new one is fetched"""
+        cache = WordPressTokenCache(refresh_margin=300)
+        old, new = jwt(time.time() + 60, 1), jwt(time.time() + 3600, 2)
+        issued = [old, new]
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return issued.pop(0)
+
+        self.assertEqual(await cache.get("https://blog.example", "admin", fetch), old)
+        self.assertEqual(await cache.get("https://blog.example", "admin", fetch), old)
+        await asyncio.gather(*cache.refreshes)
+
+        self.assertEqual(await cache.get("https://blog.example", "admin", fetch), new)
+        self.assertEqual(cache.fetches, 2)
+
+    async def test_reauthenticates_once_on_401(self):
+        """Test that a rejected token is replaced and the request sent again"""
+        cache = WordPressTokenCache()
+        issued = [jwt(time.time() + 3600, 1), jwt(time.time() + 3600, 2), jwt(time.time() + 3600, 3)]
+        sent = []
+
+        async def fetch():
+            return issued.pop(0)
+
+        async def send(token):
+            sent.append(token)
+            return FakeResponse(401)
+
+        response = await authorized_request("https://blog.example", "admin", fetch, send, tokens=cache)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(sent), 2)
+        self.assertNotEqual(sent[0], sent[1])
+        self.assertEqual(len(issued), 1)
+
+    async def test_invalidate_keeps_a_newer_token(self):
+        """Test that invalidating a stale token does not evict its replacement"""
+        cache = WordPressTokenCache()
+        cache.tokens[("https://blog.example", "admin")] = ("fresh", time.time() + 3600)
+
+        cache.invalidate("https://blog.example", "admin", token="stale")
+        self.assertIn(("https://blog.example", "admin"), cache.tokens)
+
+        cache.invalidate("https://blog.example", "admin", token="fresh")
+        self.assertNotIn(("https://blog.example", "admin"), cache.tokens)
+
+
+if __name__ == "__main__":
+    unittest.main()
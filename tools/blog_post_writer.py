@@ -0,0 +1,233 @@
+"""
+Blog Post Writer - Write-behind batching of blog_posts upserts
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tools.rate_limits import rate_limiter
+from tools.resilience import resilience
+from tools.supabase_pool import get_supabase_client
+from tools.tracing import detached_task, metrics, tracer
+
+DEFAULT_SPILL_PATH = ".cache/blog_posts_spill.jsonl"
+
+# Unique column on blog_posts that makes a repeated write of the same row a no-op
+IDEMPOTENCY_KEY = "idempotency_key"
+
+
+def idempotency_key(row: Dict[str, Any]) -> str:
+    """Stable key for a row's content, so a retried or replayed save updates instead of duplicating"""
+    content = {k: v for k, v in row.items() if k != IDEMPOTENCY_KEY}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def with_idempotency_key(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**row, IDEMPOTENCY_KEY: row.get(IDEMPOTENCY_KEY) or idempotency_key(row)}
+
+
+def unique_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One row per idempotency key, first occurrence kept.
+
+    Postgres rejects an upsert that touches the same conflict key twice,
+    so identical saves in one batch are sent once.
+    """
+    unique: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        unique.setdefault(row[IDEMPOTENCY_KEY], row)
+    return list(unique.values())
+
+
+class BlogPostWriter:
+    """
+    Buffers blog_posts rows and upserts them as one multi-row request.
+
+    A batch is flushed when it reaches `max_batch` rows or `max_delay_ms`
+    after its first row arrives. Each caller awaits its own stored row.
+    Every row carries an `idempotency_key` derived from its content, so
+    writes can be retried and replayed safely; identical rows in a batch
+    are sent once and their callers share the stored record. A batch that
+    still fails after retries is appended to `spill_path` and raised to
+    its callers. Rows still buffered at interpreter exit, or when their
+    loop closes, are spilled too. `replay_spilled` writes the spill on
+    the next start.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        table: str = "blog_posts",
+        max_batch: int = 50,
+        max_delay_ms: float = 200,
+        spill_path: str = DEFAULT_SPILL_PATH,
+    ):
+        self.client_factory = client_factory
+        self.table = table
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.spill_path = spill_path
+        self.buffer: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self.timer: Optional[asyncio.Task] = None
+        self.flushes: List[asyncio.Task] = []
+        _live_writers.add(self)
+
+    async def save(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a row and wait for the stored record"""
+        future = asyncio.get_running_loop().create_future()
+        row = with_idempotency_key(row)
+        self.buffer.append((row, future))
+        if len(self.buffer) >= self.max_batch:
+            self._start_flush()
+        elif self.timer is None:
+            self.timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self.timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.buffer = self.buffer, []
+        if batch:
+            # Rows of many posts: the batch gets its own trace rather than the first caller's
+            task = detached_task(self._write(batch))
+            self.flushes.append(task)
+            task.add_done_callback(self.flushes.remove)
+
+    async def _upsert(self, rows: List[Dict[str, Any]]) -> Any:
+        await rate_limiter.acquire("supabase_writes")
+        return await resilience.call(
+            "supabase",
+            lambda: asyncio.to_thread(
+                lambda: self.client_factory().table(self.table).upsert(rows, on_conflict=IDEMPOTENCY_KEY).execute()
+            ),
+            idempotent=True,
+        )
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        rows = unique_rows([row for row, _ in batch])
+        try:
+            with tracer.span("supabase.upsert_batch", table=self.table, rows=len(rows)):
+                result = await self._upsert(rows)
+                stored = {record.get(IDEMPOTENCY_KEY): record for record in result.data}
+                missing = [row for row in rows if row[IDEMPOTENCY_KEY] not in stored]
+                if missing:
+                    raise RuntimeError(f"Stored {len(rows) - len(missing)} of {len(rows)} rows")
+        except Exception as e:
+            # Replayed on the next start; callers that retry meanwhile upsert the same rows
+            self._spill(rows)
+            metrics.inc("blog_post_spilled_rows_total", len(rows))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for row, future in batch:
+            if not future.done():
+                future.set_result(stored[row[IDEMPOTENCY_KEY]])
+
+    async def flush(self) -> None:
+        """Write everything buffered now and wait for in-flight batches"""
+        self._start_flush()
+        if self.flushes:
+            await asyncio.gather(*self.flushes, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self.flush()
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as spill:
+            for row in rows:
+                spill.write(json.dumps({"table": self.table, "row": row}, default=str) + "\n")
+
+    def _spill_buffer(self) -> None:
+        if self.buffer:
+            self._spill([row for row, _ in self.buffer])
+            self.buffer = []
+
+    async def replay_spilled(self) -> int:
+        """Write previously spilled rows for this table; returns how many were written"""
+        # Claim the file by renaming it, so concurrent workers never replay it twice
+        # and rows spilled meanwhile go to a fresh file
+        claimed = f"{self.spill_path}.{os.getpid()}.replay"
+        try:
+            os.replace(self.spill_path, claimed)
+        except FileNotFoundError:
+            return 0
+        with open(claimed, encoding="utf-8") as spill:
+            entries = [json.loads(line) for line in spill if line.strip()]
+        rows = unique_rows([with_idempotency_key(entry["row"]) for entry in entries if entry["table"] == self.table])
+        others = [entry for entry in entries if entry["table"] != self.table]
+        try:
+            if rows:
+                with tracer.span("supabase.replay_spilled", table=self.table, rows=len(rows)):
+                    for start in range(0, len(rows), self.max_batch):
+                        await self._upsert(rows[start:start + self.max_batch])
+        except BaseException:
+            # Put everything back; rows already written are upserted again harmlessly
+            others = entries
+            raise
+        finally:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                for entry in others:
+                    spill.write(json.dumps(entry) + "\n")
+            os.remove(claimed)
+        return len(rows)
+
+
+# Every writer not yet garbage collected, spilled by a single exit hook
+_live_writers: "weakref.WeakSet[BlogPostWriter]" = weakref.WeakSet()
+
+# Writers per event loop; a loop's writers are dropped once it is closed or collected
+_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], BlogPostWriter]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@atexit.register
+def _spill_all_writers() -> None:
+    for writer in list(_live_writers):
+        writer._spill_buffer()
+
+
+def _drop_closed_loops() -> None:
+    for loop in [loop for loop in _writers if loop.is_closed()]:
+        for writer in _writers.pop(loop).values():
+            writer._spill_buffer()
+
+
+def get_blog_post_writer(url: str, key: str) -> BlogPostWriter:
+    """Return the shared writer for these credentials on the running loop"""
+    _drop_closed_loops()
+    writers = _writers.setdefault(asyncio.get_running_loop(), {})
+    writer = writers.get((url, key))
+    if writer is None:
+        writer = BlogPostWriter(lambda: get_supabase_client(url, key))
+        writers[(url, key)] = writer
+    return writer
+
+
+async def replay_blog_post_spill(url: str, key: str) -> int:
+    """Startup hook: write rows spilled by an earlier process; failures are left for the next start"""
+    try:
+        return await get_blog_post_writer(url, key).replay_spilled()
+    except Exception:
+        metrics.inc("blog_post_replay_failures_total")
+        return 0
+
+
+async def shutdown_blog_post_writers() -> None:
+    """Shutdown hook: flush the writers that belong to the running loop"""
+    for writer in _writers.pop(asyncio.get_running_loop(), {}).values():
+        await writer.aclose()
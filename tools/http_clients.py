@@ -0,0 +1,68 @@
+"""
+HTTP Clients - Process-wide pooled httpx clients for the integration tools
+"""
+import asyncio
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HTTPClientRegistry:
+    """
+    Hands out long-lived AsyncClients so connections are kept alive and reused.
+
+    Clients are named per backend ("brave", "wordpress", ...) and created
+    lazily. httpx clients are bound to the event loop they were first used
+    on, so each loop gets its own set.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        http2: Optional[bool] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        """Return the pooled client for `name` on the running event loop"""
+        loop = asyncio.get_running_loop()
+        key = (name, id(loop))
+        entry = self.clients.get(key)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+            self.clients[key] = (loop, client)
+            return client
+        return entry[1]
+
+    async def aclose(self) -> None:
+        """Close the clients of the running loop and forget those of finished loops"""
+        loop = asyncio.get_running_loop()
+        for key, (client_loop, client) in list(self.clients.items()):
+            if client_loop is loop:
+                await client.aclose()
+                del self.clients[key]
+            elif client_loop.is_closed():
+                del self.clients[key]
+
+
+# Shared registry used when deps do not provide one
+http_clients = HTTPClientRegistry()
+
+
+async def shutdown_http_clients() -> None:
+    """Shutdown hook for entry points: closes the shared pooled clients"""
+    await http_clients.aclose()
@@ -0,0 +1,462 @@
+"""
+Job Queue - Durable queue of generation jobs with leases and retries
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tools.tracing import tracer
+
+# Job states; "queued" jobs become "running" while leased by a worker
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED)
+
+# Recorded on jobs whose worker died during their last allowed attempt
+LEASE_EXHAUSTED = "Lease expired on the final attempt; the worker stopped or crashed"
+
+
+def retry_delay(attempts: int, base: float = 5.0, cap: float = 300.0) -> float:
+    """Exponential backoff with full jitter for the next attempt"""
+    return random.uniform(0, min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+@dataclass
+class Job:
+    """A unit of work and its delivery state"""
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    available_at: float = 0.0
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobQueue(ABC):
+    """
+    Interface of a durable job queue.
+
+    A worker `claim`s jobs, which leases them for `lease_seconds`; while it
+    works it renews the lease with `heartbeat`. A job whose lease expires
+    (its worker crashed or stalled) becomes visible to other workers again,
+    unless that was its last attempt: then it is marked failed, so a job
+    that kills its worker is not leased forever. `fail` schedules a retry
+    with backoff until `max_attempts` is reached.
+    Methods block, so async callers run them with `asyncio.to_thread`.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: Dict[str, Any], kind: str = "blog", max_attempts: int = 3, delay: float = 0.0) -> str:
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1, kind: Optional[str] = None) -> List[Job]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False means the lease was lost to another worker"""
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[Job]:
+        """Record a failed attempt; the job is retried later or marked failed"""
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        ...
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        ...
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue in a local SQLite file.
+
+    Claims run in an immediate transaction, so any number of worker
+    processes on the same machine can share one database file.
+    """
+
+    def __init__(self, path: str, table: str = "jobs", retry_base: float = 5.0, retry_cap: float = 300.0):
+        self.path = path
+        self.table = table
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL, max_attempts INTEGER NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, available_at REAL NOT NULL, "
+            "lease_owner TEXT, lease_expires_at REAL)"
+        )
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ready ON {table} (status, available_at)")
+
+    def _job(self, row: sqlite3.Row) -> Job:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return Job(**job)
+
+    def enqueue(self, payload: Dict[str, Any], kind: str = "blog", max_attempts: int = 3, delay: float = 0.0) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                f"INSERT INTO {self.table} (id, kind, payload, status, attempts, max_attempts, "
+                "created_at, updated_at, available_at) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, default=str), QUEUED, max_attempts, now, now, now + delay),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1, kind: Optional[str] = None) -> List[Job]:
+        now = time.time()
+        kind_filter = "AND kind = ?" if kind else ""
+        params: tuple = (QUEUED, now, RUNNING, now) + ((kind,) if kind else ()) + (limit,)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases with no attempts left will not be retried
+                self.conn.execute(
+                    f"UPDATE {self.table} SET status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL, "
+                    "updated_at = ? WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                    (FAILED, LEASE_EXHAUSTED, now, RUNNING, now),
+                )
+                # Ready jobs plus running jobs whose lease has expired
+                rows = self.conn.execute(
+                    f"SELECT id FROM {self.table} WHERE "
+                    f"((status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?)) {kind_filter} "
+                    "ORDER BY available_at LIMIT ?",
+                    params,
+                ).fetchall()
+                ids = [row["id"] for row in rows]
+                self.conn.executemany(
+                    f"UPDATE {self.table} SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                    "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    [(RUNNING, worker_id, now + lease_seconds, now, job_id) for job_id in ids],
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            if not ids:
+                return []
+            placeholders = ",".join("?" * len(ids))
+            rows = self.conn.execute(
+                f"SELECT * FROM {self.table} WHERE id IN ({placeholders}) ORDER BY available_at", ids
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                f"UPDATE {self.table} SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + lease_seconds, now, job_id, RUNNING, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                f"UPDATE {self.table} SET status = ?, result = ?, error = NULL, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (SUCCEEDED, json.dumps(result, default=str), time.time(), job_id, RUNNING, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[Job]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT attempts, max_attempts FROM {self.table} WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, RUNNING, worker_id),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at = FAILED, now
+            else:
+                status, available_at = QUEUED, now + retry_delay(row["attempts"], self.retry_base, self.retry_cap)
+            self.conn.execute(
+                f"UPDATE {self.table} SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (status, error, available_at, now, job_id, worker_id),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            row = self.conn.execute(f"SELECT * FROM {self.table} WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        where, params = ("WHERE status = ?", (status, limit)) if status else ("", (limit,))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM {self.table} {where} ORDER BY created_at DESC LIMIT ?", params
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute(f"SELECT status, COUNT(*) FROM {self.table} GROUP BY status").fetchall()
+        return {**{status: 0 for status in STATUSES}, **{row[0]: row[1] for row in rows}}
+
+
+class SupabaseJobQueue(JobQueue):
+    """
+    Job queue in a Supabase (Postgres) table, shared by workers on any machine.
+
+    Claims are compare-and-swap updates conditioned on the row's status and
+    attempt count, so two workers can never lease the same job. The table
+    needs the columns of `Job`, with payload and result as jsonb.
+    """
+
+    def __init__(self, url: str, key: str, table: str = "blog_jobs", retry_base: float = 5.0, retry_cap: float = 300.0):
+        from tools.supabase_pool import get_supabase_client
+        self.client = get_supabase_client(url, key)
+        self.table = table
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+
+    def _rows(self):
+        return self.client.table(self.table)
+
+    def enqueue(self, payload: Dict[str, Any], kind: str = "blog", max_attempts: int = 3, delay: float = 0.0) -> str:
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex, kind=kind, payload=json.loads(json.dumps(payload, default=str)),
+            max_attempts=max_attempts, created_at=now, updated_at=now, available_at=now + delay,
+        )
+        self._rows().insert(job.to_dict()).execute()
+        return job.id
+
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1, kind: Optional[str] = None) -> List[Job]:
+        now = time.time()
+        query = self._rows().select("*").or_(
+            f"and(status.eq.{QUEUED},available_at.lte.{now}),and(status.eq.{RUNNING},lease_expires_at.lt.{now})"
+        )
+        if kind:
+            query = query.eq("kind", kind)
+        # Over-fetch so that losing a few races still fills the request
+        candidates = query.order("available_at").limit(limit * 3).execute().data
+
+        claimed: List[Job] = []
+        for row in candidates:
+            if len(claimed) == limit:
+                break
+            if row["status"] == RUNNING and row["attempts"] >= row["max_attempts"]:
+                # Expired lease with no attempts left: fail it instead of leasing it again
+                self._rows().update({
+                    "status": FAILED,
+                    "error": LEASE_EXHAUSTED,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                }).eq("id", row["id"]).eq("status", RUNNING).eq("attempts", row["attempts"]).execute()
+                continue
+            result = self._rows().update({
+                "status": RUNNING,
+                "attempts": row["attempts"] + 1,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + lease_seconds,
+                "updated_at": now,
+            }).eq("id", row["id"]).eq("status", row["status"]).eq("attempts", row["attempts"]).execute()
+            if result.data:
+                claimed.append(Job(**result.data[0]))
+        return claimed
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        result = self._rows().update({"lease_expires_at": now + lease_seconds, "updated_at": now}) \
+            .eq("id", job_id).eq("status", RUNNING).eq("lease_owner", worker_id).execute()
+        return bool(result.data)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        updated = self._rows().update({
+            "status": SUCCEEDED,
+            "result": json.loads(json.dumps(result, default=str)),
+            "error": None,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": time.time(),
+        }).eq("id", job_id).eq("status", RUNNING).eq("lease_owner", worker_id).execute()
+        return bool(updated.data)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status != RUNNING or job.lease_owner != worker_id:
+            return None
+        now = time.time()
+        if job.attempts >= job.max_attempts:
+            status, available_at = FAILED, now
+        else:
+            status, available_at = QUEUED, now + retry_delay(job.attempts, self.retry_base, self.retry_cap)
+        updated = self._rows().update({
+            "status": status,
+            "error": error,
+            "available_at": available_at,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }).eq("id", job_id).eq("lease_owner", worker_id).execute()
+        return Job(**updated.data[0]) if updated.data else None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._rows().select("*").eq("id", job_id).execute().data
+        return Job(**rows[0]) if rows else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        query = self._rows().select("*")
+        if status:
+            query = query.eq("status", status)
+        return [Job(**row) for row in query.order("created_at", desc=True).limit(limit).execute().data]
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            status: self._rows().select("id", count="exact").eq("status", status).limit(1).execute().count or 0
+            for status in STATUSES
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobWorker:
+    """
+    Runs queued jobs through `handler` with bounded concurrency.
+
+    Each claimed job is leased for `lease_seconds` and the lease is renewed
+    every third of that while the job runs. If renewal fails, another worker
+    has taken the job over and this attempt is cancelled.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: int = 2,
+        lease_seconds: float = 300.0,
+        poll_interval: float = 1.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.processed = 0
+
+    async def run(self, stop: Optional[asyncio.Event] = None, max_jobs: Optional[int] = None) -> int:
+        """Process jobs until `stop` is set or `max_jobs` have finished; returns the count"""
+        stop = stop or asyncio.Event()
+        started = 0
+
+        async def slot() -> None:
+            nonlocal started
+            while not stop.is_set():
+                if max_jobs is not None and started >= max_jobs:
+                    break
+                jobs = await asyncio.to_thread(self.queue.claim, self.worker_id, self.lease_seconds)
+                if not jobs:
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                started += 1
+                await self.process(jobs[0])
+                self.processed += 1
+
+        await asyncio.gather(*(slot() for _ in range(self.concurrency)))
+        return self.processed
+
+    async def process(self, job: Job) -> None:
+        """Run one leased job and record its outcome"""
+        with tracer.span("job.run", kind=job.kind, attempt=job.attempts) as span:
+            work = asyncio.create_task(self.handler(job))
+            heartbeat = asyncio.create_task(self._keep_lease(job, work))
+            try:
+                result = await work
+            except asyncio.CancelledError:
+                if heartbeat.done():
+                    # Lease lost; the job belongs to another worker now
+                    span.fail("lease lost")
+                    return
+                work.cancel()
+                raise
+            except Exception as e:
+                span.fail(repr(e))
+                await asyncio.to_thread(self.queue.fail, job.id, self.worker_id, repr(e))
+                return
+            finally:
+                heartbeat.cancel()
+            await asyncio.to_thread(self.queue.complete, job.id, self.worker_id, result)
+
+    async def _keep_lease(self, job: Job, work: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.queue.heartbeat, job.id, self.worker_id, self.lease_seconds):
+                work.cancel()
+                return
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue built from settings on first use"""
+    global _job_queue
+    if _job_queue is None:
+        from config import settings
+        if settings.job_queue_backend == "supabase":
+            _job_queue = SupabaseJobQueue(settings.supabase_url, settings.supabase_key)
+        elif settings.job_queue_backend == "sqlite":
+            _job_queue = SQLiteJobQueue(settings.job_queue_path)
+        else:
+            raise ValueError(f"Unknown job queue backend '{settings.job_queue_backend}'")
+    return _job_queue
+
+
+def set_job_queue(queue: Optional[JobQueue]) -> None:
+    """Replace the process-wide queue"""
+    global _job_queue
+    _job_queue = queue
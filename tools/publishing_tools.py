@@ -1,60 +1,284 @@
 """
-    Publishing Tools - Demonstrates WordPress integration with error handling
+Publishing Tools - Demonstrates WordPress integration with error handling
+"""
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from pydantic import BaseModel, Field
+from pydantic_ai import RunContext
+from tools.http_clients import HTTPClientRegistry, http_clients
+from tools.rate_limits import rate_limiter
+from tools.resilience import resilience
+from tools.tracing import tracer
+from tools.wordpress_auth import authorized_request
+
+class WordPressDeps(BaseModel):
+    url: str
+    username: str
+    password: str
+    http_clients: Optional[HTTPClientRegistry] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+class PublishResult(BaseModel):
+    status: str
+    url: Optional[str] = None
+    error: Optional[str] = None
+    post_id: Optional[int] = None
+    slug: Optional[str] = None
+    media_ids: Dict[str, int] = Field(default_factory=dict)
+
+class PublishItem(BaseModel):
+    """One post for bulk publishing"""
+    content: Dict[str, Any] = Field(description="FinalContent fields or WordPress post fields")
+    slug: Optional[str] = Field(None, description="Post slug; derived from the title when missing")
+    remote_id: Optional[int] = Field(None, description="WordPress post id stored by an earlier run")
+    featured_image: Optional[str] = Field(None, description="URL or path of the featured image")
+    media: List[str] = Field(default_factory=list, description="URLs or paths of inline media used in the body")
+    status: str = Field("publish", description="WordPress post status")
+
+async def fetch_wordpress_token(client: Any, deps: WordPressDeps) -> str:
+    """Request a new JWT token from the site's jwt-auth endpoint"""
+    async def authenticate():
+        response = await client.post(
+            f"{deps.url}/wp-json/jwt-auth/v1/token",
+            data={
+                "username": deps.username,
+                "password": deps.password
+            }
+        )
+        response.raise_for_status()
+        return response
+
+    response = await resilience.call("wordpress", authenticate)
+    return response.json()["token"]
+
+async def wordpress_request(
+    client: Any,
+    deps: WordPressDeps,
+    method: str,
+    path: str,
+    idempotent: bool = True,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any
+) -> Any:
+    """
+    Authorized call to the site's REST API.
+
+    The token is cached per site and user and renewed once on a 401.
+    Non-idempotent calls are only retried when the server refused them
+    outright, so a retry cannot create a duplicate post or upload.
+    """
+    async def send(token: str):
+        async def call():
+            response = await client.request(
+                method,
+                f"{deps.url}/wp-json{path}",
+                headers={**(headers or {}), "Authorization": f"Bearer {token}"},
+                **kwargs
+            )
+            if response.status_code != 401:
+                response.raise_for_status()
+            return response
+
+        return await resilience.call("wordpress", call, idempotent=idempotent)
+
+    response = await authorized_request(deps.url, deps.username, lambda: fetch_wordpress_token(client, deps), send)
+    response.raise_for_status()
+    return response
+
+async def publish_to_wordpress(ctx: RunContext[WordPressDeps], content: Dict[str, Any]) -> PublishResult:
+    """
+    Publish content to WordPress.
+
+    Args:
+        ctx: RunContext containing WordPress credentials
+        content: Content to publish
+
+    Returns:
+        PublishResult containing operation status
     """
-    from typing import Dict
-    from pydantic import BaseModel
-    from pydantic_ai import RunContext, tool
-    import httpx
-
-    class WordPressDeps(BaseModel):
-        url: str
-        username: str
-        password: str
-
-    class PublishResult(BaseModel):
-        status: str
-        url: Optional[str]
-        error: Optional[str]
-
-    @tool
-    async def publish_to_wordpress(ctx: RunContext[WordPressDeps], content: Dict[str, Any]) -> PublishResult:
-        """
-        Publish content to WordPress.
-
-        Args:
-            ctx: RunContext containing WordPress credentials
-            content: Content to publish
-
-        Returns:
-            PublishResult containing operation status
-        """
+    payload_bytes = len(json.dumps(content, default=str))
+    with tracer.span("tool.publish_wordpress", payload_bytes=payload_bytes) as span:
+        await rate_limiter.acquire("wordpress_posts")
         try:
-            async with httpx.AsyncClient() as client:
-                # First authenticate
-                auth_response = await client.post(
-                    f"{ctx.deps.url}/wp-json/jwt-auth/v1/token",
-                    data={
-                        "username": ctx.deps.username,
-                        "password": ctx.deps.password
-                    }
-                )
-                auth_response.raise_for_status()
-                token = auth_response.json()["token"]
-
-                # Then publish
-                publish_response = await client.post(
-                    f"{ctx.deps.url}/wp-json/wp/v2/posts",
-                    json=content,
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-                publish_response.raise_for_status()
+            client = (ctx.deps.http_clients or http_clients).get("wordpress")
+            publish_response = await wordpress_request(
+                client, ctx.deps, "POST", "/wp/v2/posts", idempotent=False, json=content
+            )
 
-                return PublishResult(
-                    status="success",
-                    url=publish_response.json()["link"]
-                )
+            return PublishResult(
+                status="success",
+                url=publish_response.json()["link"],
+                post_id=publish_response.json().get("id")
+            )
         except Exception as e:
+            span.fail(str(e))
             return PublishResult(
                 status="error",
                 error=str(e)
             )
+
+def slugify(text: str) -> str:
+    """WordPress-style slug: lowercase words joined by hyphens"""
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:190]
+
+def media_slug(source: str) -> str:
+    """Stable slug for a media source so a retry finds the earlier upload"""
+    stem = os.path.splitext(os.path.basename(urlparse(source).path))[0] or "media"
+    return f"{slugify(stem)}-{hashlib.sha1(source.encode()).hexdigest()[:10]}"
+
+def to_wordpress_post(content: Dict[str, Any]) -> Dict[str, Any]:
+    """Map FinalContent fields onto the WordPress post schema"""
+    post = {
+        "title": content.get("title", ""),
+        "content": content.get("content", ""),
+    }
+    if content.get("meta_description") or content.get("excerpt"):
+        post["excerpt"] = content.get("excerpt") or content["meta_description"]
+    return post
+
+async def find_existing_post(client: Any, deps: WordPressDeps, item: PublishItem, slug: str) -> Optional[Dict[str, Any]]:
+    """The post created by an earlier attempt, by stored remote id or by slug"""
+    if item.remote_id is not None:
+        try:
+            response = await wordpress_request(client, deps, "GET", f"/wp/v2/posts/{item.remote_id}", params={"context": "edit"})
+            return response.json()
+        except Exception as e:
+            if getattr(getattr(e, "response", None), "status_code", None) != 404:
+                raise
+    response = await wordpress_request(
+        client, deps, "GET", "/wp/v2/posts", params={"slug": slug, "status": "any", "context": "edit"}
+    )
+    posts = response.json()
+    return posts[0] if posts else None
+
+async def read_media(client: Any, source: str) -> bytes:
+    if urlparse(source).scheme in ("http", "https"):
+        async def download():
+            response = await client.get(source)
+            response.raise_for_status()
+            return response
+
+        return (await resilience.call("media_download", download)).content
+
+    def read() -> bytes:
+        with open(source, "rb") as f:
+            return f.read()
+
+    return await asyncio.to_thread(read)
+
+async def upload_media(client: Any, deps: WordPressDeps, source: str) -> Dict[str, Any]:
+    """Upload one media file, reusing an earlier upload of the same source"""
+    slug = media_slug(source)
+    existing = (await wordpress_request(client, deps, "GET", "/wp/v2/media", params={"slug": slug})).json()
+    if existing:
+        return existing[0]
+
+    data = await read_media(client, source)
+    filename = os.path.basename(urlparse(source).path) or slug
+    response = await wordpress_request(
+        client,
+        deps,
+        "POST",
+        "/wp/v2/media",
+        idempotent=False,
+        params={"slug": slug},
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        },
+        content=data
+    )
+    return response.json()
+
+async def publish_item(
+    client: Any,
+    deps: WordPressDeps,
+    item: PublishItem,
+    upload: Callable[[str], Awaitable[Dict[str, Any]]]
+) -> PublishResult:
+    """Publish one post with its media; an existing post is returned instead of duplicated"""
+    post = to_wordpress_post(item.content)
+    slug = item.slug or slugify(post["title"])
+    sources = list(dict.fromkeys(([item.featured_image] if item.featured_image else []) + item.media))
+
+    with tracer.span("wordpress.publish_item", media=len(sources)) as span:
+        try:
+            existing = await find_existing_post(client, deps, item, slug)
+            if existing is not None:
+                span.set(existing=True)
+                return PublishResult(
+                    status="exists",
+                    url=existing.get("link"),
+                    post_id=existing["id"],
+                    slug=existing.get("slug", slug)
+                )
+
+            # Media goes up concurrently and before the body that references it
+            uploaded = dict(zip(sources, await asyncio.gather(*(upload(source) for source in sources))))
+            for source in item.media:
+                post["content"] = post["content"].replace(source, uploaded[source].get("source_url", source))
+            if item.featured_image:
+                post["featured_media"] = uploaded[item.featured_image]["id"]
+
+            await rate_limiter.acquire("wordpress_posts")
+            response = await wordpress_request(
+                client, deps, "POST", "/wp/v2/posts", idempotent=False,
+                json={**post, "slug": slug, "status": item.status}
+            )
+            created = response.json()
+            return PublishResult(
+                status="success",
+                url=created.get("link"),
+                post_id=created.get("id"),
+                slug=created.get("slug", slug),
+                media_ids={source: media["id"] for source, media in uploaded.items()}
+            )
+        except Exception as e:
+            span.fail(str(e))
+            return PublishResult(status="error", error=str(e), slug=slug)
+
+async def publish_many(
+    deps: WordPressDeps,
+    items: Iterable[Any],
+    max_concurrency: int = 5,
+    max_media_concurrency: int = 8
+) -> List[PublishResult]:
+    """
+    Publish many posts with bounded concurrency over the pooled client.
+
+    Items are PublishItems, or FinalContent models / dicts published as-is.
+
+    Results are returned in input order and a failed item does not stop the
+    batch. Rerunning a batch is safe: posts found by remote id or slug and
+    media found by their source are reused rather than created again. Store
+    each result's post_id as the item's remote_id for the strongest check.
+    """
+    client = (deps.http_clients or http_clients).get("wordpress")
+    posts = asyncio.Semaphore(max_concurrency)
+    media_limit = asyncio.Semaphore(max_media_concurrency)
+    uploads: Dict[str, asyncio.Future] = {}
+
+    async def upload(source: str) -> Dict[str, Any]:
+        # Posts sharing an image upload it once
+        if source not in uploads:
+            async def run() -> Dict[str, Any]:
+                async with media_limit:
+                    return await upload_media(client, deps, source)
+            uploads[source] = asyncio.ensure_future(run())
+        return await asyncio.shield(uploads[source])
+
+    async def publish(item: Any) -> PublishResult:
+        async with posts:
+            if not isinstance(item, PublishItem):
+                item = PublishItem(content=item.dict() if hasattr(item, "dict") else item)
+            return await publish_item(client, deps, item, upload)
+
+    return await asyncio.gather(*(publish(item) for item in items))
@@ -0,0 +1,91 @@
+"""
+Rate Limits - Shared token-bucket limiters for external providers
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+# Requests (or tokens) allowed per minute for each backend
+DEFAULT_LIMITS: Dict[str, float] = {
+    "openai_requests": 500,
+    "openai_tokens": 80_000,
+    "brave_search": 60,
+    "supabase_writes": 600,
+    "wordpress_posts": 30,
+}
+
+# Completion tokens reserved for each OpenAI request on top of the prompt
+COMPLETION_TOKEN_ALLOWANCE = 1_000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    `capacity` bounds the burst size and defaults to one minute of budget.
+    No lock is held across awaits, so a bucket can be shared by tasks on
+    different event loops (e.g. one asyncio.run per Streamlit click).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens, waiting until they have accrued; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        self._refill()
+        # Reserve immediately; a negative balance queues later callers behind this one
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+
+class RateLimiter:
+    """Named token buckets shared by every caller of a backend"""
+
+    def __init__(self, limits_per_minute: Optional[Dict[str, float]] = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits_per_minute or {})}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.waited: Dict[str, float] = {}
+
+    def bucket(self, name: str) -> TokenBucket:
+        if name not in self.buckets:
+            if name not in self.limits:
+                raise KeyError(f"No rate limit configured for '{name}'")
+            self.buckets[name] = TokenBucket(self.limits[name])
+        return self.buckets[name]
+
+    async def acquire(self, name: str, amount: float = 1.0) -> None:
+        waited = await self.bucket(name).acquire(amount)
+        self.waited[name] = self.waited.get(name, 0.0) + waited
+
+    async def acquire_openai(self, prompt: str) -> None:
+        """Reserve one request and the estimated token usage for an OpenAI call"""
+        await self.acquire("openai_requests")
+        await self.acquire("openai_tokens", estimate_tokens(prompt) + COMPLETION_TOKEN_ALLOWANCE)
+
+    def configure(self, limits_per_minute: Dict[str, float]) -> None:
+        """Override limits; buckets are rebuilt on next use"""
+        self.limits.update(limits_per_minute)
+        for name in limits_per_minute:
+            self.buckets.pop(name, None)
+
+
+# Process-wide limiter shared by all tools and agents
+rate_limiter = RateLimiter()
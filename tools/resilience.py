@@ -0,0 +1,268 @@
+"""
+Resilience - Timeouts, retries, hedging and circuit breakers for external calls
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from tools.tracing import current_span, metrics
+
+try:
+    from openai import APIConnectionError as OpenAIConnectionError
+except ImportError:  # pragma: no cover - the OpenAI SDK ships with pydantic-ai
+    OpenAIConnectionError = ConnectionError
+
+# Responses worth retrying; non-idempotent calls only retry the ones that
+# guarantee the request was not processed
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+REJECTED_STATUS = {429, 503}
+
+# Errors raised when an endpoint could not be reached or did not answer in time.
+# Anything else without an HTTP status (validation errors, bugs) says nothing
+# about the endpoint's health.
+TRANSPORT_ERRORS = (asyncio.TimeoutError, httpx.TransportError, ConnectionError, OpenAIConnectionError)
+
+# Breaker states as exported on the circuit_breaker_state gauge
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+@dataclass
+class Policy:
+    """Timeout, retry, hedging and breaker settings for one endpoint"""
+    timeout: float = 30.0
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    # Start a second identical request if the first is slower than this
+    hedge_after: Optional[float] = None
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+    @property
+    def worst_case(self) -> float:
+        """Longest a call can take: every attempt times out after the longest allowed pause"""
+        return self.max_attempts * self.timeout + (self.max_attempts - 1) * self.max_delay
+
+
+DEFAULT_POLICIES: Dict[str, Policy] = {
+    # Per attempt; two attempts and a backoff (at most 2 * 45 + 15 = 105s) fit in
+    # the director's 120s stage timeout, so a third attempt would only be cut off
+    "openai": Policy(timeout=45.0, max_attempts=2, base_delay=1.0, max_delay=15.0),
+    "brave_search": Policy(timeout=10.0, max_attempts=3, hedge_after=1.5),
+    "supabase": Policy(timeout=15.0, max_attempts=3),
+    "wordpress": Policy(timeout=30.0, max_attempts=3, base_delay=1.0),
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while its breaker is open"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit for '{endpoint}' is open; retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the error's response"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+    """Whether another attempt can succeed without risking a duplicate side effect"""
+    status = status_code(error)
+    if status is not None:
+        return status in (RETRYABLE_STATUS if idempotent else REJECTED_STATUS)
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, ConnectionRefusedError)):
+        # The request never reached the server
+        return True
+    return idempotent and isinstance(error, TRANSPORT_ERRORS)
+
+
+def is_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the endpoint is unhealthy: transport errors,
+    timeouts, 429 and 5xx. Client errors, invalid model output and
+    programming errors do not count against the breaker.
+    """
+    status = status_code(error)
+    if status is not None:
+        return status >= 500 or status == 429
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` one probe call is let through (half-open); its
+    outcome closes the circuit again or reopens it.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._export()
+
+    def _export(self) -> None:
+        metrics.set_gauge("circuit_breaker_state", STATE_VALUES[self.state], endpoint=self.endpoint)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            self._export()
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == OPEN:
+            waited = time.monotonic() - self.opened_at
+            if waited < self.reset_timeout:
+                metrics.inc("circuit_rejections_total", endpoint=self.endpoint)
+                raise CircuitOpenError(self.endpoint, self.reset_timeout - waited)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probing:
+                metrics.inc("circuit_rejections_total", endpoint=self.endpoint)
+                raise CircuitOpenError(self.endpoint, 0.0)
+            self.probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        self._transition(CLOSED)
+
+    def release(self) -> None:
+        """Give up a probe slot without an outcome (the call was cancelled)"""
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.probing = False
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                metrics.inc("circuit_opened_total", endpoint=self.endpoint)
+            self._transition(OPEN)
+
+
+class Resilience:
+    """Per-endpoint policies and breakers shared by every caller"""
+
+    def __init__(self, policies: Optional[Dict[str, Policy]] = None):
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def policy(self, endpoint: str) -> Policy:
+        return self.policies.get(endpoint) or Policy()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.breakers:
+            policy = self.policy(endpoint)
+            self.breakers[endpoint] = CircuitBreaker(endpoint, policy.failure_threshold, policy.reset_timeout)
+        return self.breakers[endpoint]
+
+    def configure(self, endpoint: str, **overrides: Any) -> None:
+        """Override policy fields for an endpoint; its breaker is rebuilt on next use"""
+        self.policies[endpoint] = replace(self.policy(endpoint), **overrides)
+        self.breakers.pop(endpoint, None)
+
+    async def call(
+        self,
+        endpoint: str,
+        func: Callable[[], Awaitable[Any]],
+        *,
+        idempotent: bool = True,
+        hedge: bool = False
+    ) -> Any:
+        """
+        Call `func` with the endpoint's timeout, retries and breaker.
+
+        Set `idempotent=False` for calls with side effects: they are only
+        retried when the server provably rejected the request. `hedge` races
+        a second request against a slow first one (idempotent calls only).
+        """
+        policy = self.policy(endpoint)
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.allow()
+            try:
+                if hedge and idempotent and policy.hedge_after is not None:
+                    result = await asyncio.wait_for(self._hedged(endpoint, func, policy.hedge_after), policy.timeout)
+                else:
+                    result = await asyncio.wait_for(func(), policy.timeout)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    metrics.inc("call_timeouts_total", endpoint=endpoint)
+                if is_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if attempt >= policy.max_attempts or not is_retryable(e, idempotent) or breaker.state == OPEN:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    # Full jitter spreads out retries from concurrent callers
+                    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1)))
+                elif delay > policy.max_delay:
+                    # The server asked for a longer pause than this call can afford
+                    raise
+                metrics.inc("call_retries_total", endpoint=endpoint)
+                current_span().add(retries=1)
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    async def _hedged(self, endpoint: str, func: Callable[[], Awaitable[Any]], hedge_after: float) -> Any:
+        tasks = {asyncio.ensure_future(func())}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                metrics.inc("hedged_requests_total", endpoint=endpoint)
+                tasks.add(asyncio.ensure_future(func()))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# Process-wide layer shared by all tools and agents
+resilience = Resilience()
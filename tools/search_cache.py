@@ -0,0 +1,109 @@
+"""
+Search Cache - Normalized-query result cache with single-flight requests
+"""
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agents.cache import CacheBackend, MemoryCache, SQLiteCache
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace; word order is kept, as it can change the results"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+async def _call(tier: CacheBackend, method: Callable[..., Any], *args: Any) -> Any:
+    """Run a tier operation, in a worker thread if the tier does blocking IO"""
+    if tier.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+class SearchCache:
+    """
+    Caches successful search responses across one or more backend tiers.
+
+    Tiers are checked in order (typically memory, then disk) and a hit in a
+    later tier is copied into the earlier ones; disk tiers are read and
+    written in a worker thread. Concurrent lookups for the same normalized
+    query share a single in-flight lookup and request.
+    """
+
+    def __init__(self, tiers: List[CacheBackend]):
+        self.tiers = tiers
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        for index, tier in enumerate(self.tiers):
+            raw = await _call(tier, tier.get, key)
+            if raw is not None:
+                for earlier in self.tiers[:index]:
+                    await _call(earlier, earlier.set, key, raw)
+                return json.loads(raw)
+        return None
+
+    async def get_or_fetch(self, query: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        key = normalize_query(query)
+        if key in self.inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self.inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await self._lookup(key)
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                result = await fetch()
+                if result.get("status") != "error":
+                    raw = json.dumps(result)
+                    for tier in self.tiers:
+                        await _call(tier, tier.set, key, raw)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            # Every hit or coalesced lookup is one API request not spent
+            "quota_saved": self.hits + self.coalesced,
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache (memory in front of SQLite) built from settings"""
+    global _search_cache
+    if _search_cache is None:
+        from config import settings
+        _search_cache = SearchCache([
+            MemoryCache(max_entries=1000, ttl=settings.search_cache_ttl),
+            SQLiteCache(settings.search_cache_path, ttl=settings.search_cache_ttl, table="search_cache"),
+        ])
+    return _search_cache
+
+
+def set_search_cache(cache: SearchCache) -> None:
+    """Replace the process-wide search cache"""
+    global _search_cache
+    _search_cache = cache
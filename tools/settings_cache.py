@@ -0,0 +1,107 @@
+"""
+Settings Cache - Read-through TTL cache for user settings
+"""
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+
+class UserSettingsCache:
+    """
+    Caches settings per (project, user) with a TTL and LRU eviction.
+
+    Concurrent misses for the same user share one fetch, so a batch of posts
+    for one user costs a single query. Writers must call `invalidate`.
+    Pinned keys neither expire nor get evicted until every pin is released.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.pins: Counter = Counter()
+        self.hits = 0
+        self.fetches = 0
+
+    def _lookup(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, settings = entry
+        if time.monotonic() > expires and key not in self.pins:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return settings
+
+    def put(self, key: Hashable, settings: Dict[str, Any]) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, settings)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            oldest = next((k for k in self.entries if k not in self.pins), None)
+            if oldest is None:
+                break
+            del self.entries[oldest]
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return cached settings or fetch them once for all concurrent callers"""
+        settings = self._lookup(key)
+        if settings is not None:
+            self.hits += 1
+            return settings
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            self.fetches += 1
+            settings = await fetch()
+            self.put(key, settings)
+            future.set_result(settings)
+            return settings
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not reported as lost
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def prefetch(
+        self,
+        keys: Iterable[Hashable],
+        fetch_many: Callable[[list], Awaitable[Dict[Hashable, Dict[str, Any]]]],
+    ) -> None:
+        """Load every missing key with one bulk fetch; absent keys are cached as empty"""
+        missing = [key for key in dict.fromkeys(keys) if self._lookup(key) is None]
+        if not missing:
+            return
+        self.fetches += 1
+        found = await fetch_many(missing)
+        for key in missing:
+            self.put(key, found.get(key, {}))
+
+    @contextmanager
+    def pin(self, keys: Iterable[Hashable]) -> Iterator[None]:
+        """Keep these keys cached for the duration of the block"""
+        keys = list(dict.fromkeys(keys))
+        self.pins.update(keys)
+        try:
+            yield
+        finally:
+            self.pins.subtract(keys)
+            self.pins += Counter()
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or everything when no key is given"""
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+
+settings_cache = UserSettingsCache()
@@ -0,0 +1,44 @@
+"""
+Supabase Pool - Shared Supabase clients keyed on project URL and key
+"""
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from supabase import create_client
+
+
+class SupabaseClientPool:
+    """
+    Creates each Supabase client once and hands the same instance to every caller.
+
+    Construction happens lazily under a lock, so concurrent threads or tasks
+    asking for the same credentials never build two clients. Client creation
+    does not await, which makes the lock safe to use from coroutines too.
+    """
+
+    def __init__(self, factory: Callable[[str, str], Any] = create_client):
+        self.factory = factory
+        self.clients: Dict[Tuple[str, str], Any] = {}
+        self.lock = threading.Lock()
+
+    def get(self, url: str, key: str) -> Any:
+        client = self.clients.get((url, key))
+        if client is None:
+            with self.lock:
+                client = self.clients.get((url, key))
+                if client is None:
+                    client = self.factory(url, key)
+                    self.clients[(url, key)] = client
+        return client
+
+    def clear(self) -> None:
+        with self.lock:
+            self.clients.clear()
+
+
+supabase_pool = SupabaseClientPool()
+
+
+def get_supabase_client(url: str, key: str) -> Any:
+    """Return the shared client for these credentials"""
+    return supabase_pool.get(url, key)
@@ -1,66 +1,158 @@
 """
-    Supabase Tools - Demonstrates PydanticAI's Function Tools with Supabase integration
+Supabase Tools - Demonstrates PydanticAI's Function Tools with Supabase integration
+"""
+import asyncio
+from typing import Optional, ContextManager, Dict, Any, List
+from pydantic import BaseModel
+from pydantic_ai import RunContext
+from tools.supabase_pool import get_supabase_client
+from tools.blog_post_writer import get_blog_post_writer, with_idempotency_key, IDEMPOTENCY_KEY
+from tools.settings_cache import settings_cache
+from tools.resilience import CircuitOpenError, TRANSPORT_ERRORS, resilience
+from tools.tracing import tracer
+from tools.vector_index import find_duplicate_posts, get_vector_index, index_post
+
+try:
+    from postgrest.exceptions import APIError as PostgrestAPIError
+except ImportError:  # pragma: no cover - postgrest ships with supabase
+    PostgrestAPIError = RuntimeError
+
+try:
+    from supabase import SupabaseException
+except ImportError:  # pragma: no cover - older clients raise plain exceptions
+    SupabaseException = RuntimeError
+
+# What building a client or running a query through resilience.call can raise
+SUPABASE_ERRORS = (*TRANSPORT_ERRORS, CircuitOpenError, PostgrestAPIError, SupabaseException)
+
+class SupabaseDeps(BaseModel):
+    url: str
+    key: str
+
+class BlogPost(BaseModel):
+    """Represents a blog post structure"""
+    title: str
+    content: str
+    author: str
+    tags: list[str]
+
+async def save_blog_post(ctx: RunContext[SupabaseDeps], post: BlogPost) -> Dict[str, Any]:
+    """
+    Save a blog post to Supabase.
+
+    Args:
+        ctx: RunContext containing Supabase credentials
+        post: BlogPost to save
+
+    Returns:
+        Dictionary containing operation status, post ID and any stored
+        posts the new one near-duplicates
     """
-    from typing import Optional, Dict, Any
-    from pydantic import BaseModel
-    from pydantic_ai import RunContext, tool
-    from supabase import create_client
-
-    class SupabaseDeps(BaseModel):
-        url: str
-        key: str
-
-    class BlogPost(BaseModel):
-        """Represents a blog post structure"""
-        title: str
-        content: str
-        author: str
-        tags: list[str]
-
-    @tool
-    async def save_blog_post(ctx: RunContext[SupabaseDeps], post: BlogPost) -> Dict[str, Any]:
-        """
-        Save a blog post to Supabase.
-
-        Args:
-            ctx: RunContext containing Supabase credentials
-            post: BlogPost to save
-
-        Returns:
-            Dictionary containing operation status and post ID
-        """
-        supabase = create_client(ctx.deps.url, ctx.deps.key)
+    writer = get_blog_post_writer(ctx.deps.url, ctx.deps.key)
+    index = get_vector_index()
+    with tracer.span("tool.save_blog_post") as span:
         try:
-            result = supabase.table("blog_posts").insert(post.dict()).execute()
+            row = with_idempotency_key(post.dict())
+            duplicates = []
+            if index is not None:
+                # A re-save of this same post must not count as its own duplicate
+                matches = await asyncio.to_thread(
+                    find_duplicate_posts, index, post.title, post.content, exclude_key=row[IDEMPOTENCY_KEY]
+                )
+                duplicates = [
+                    {"id": m.metadata.get("post_id"), "title": m.metadata.get("title"), "score": round(m.score, 3)}
+                    for m in matches
+                ]
+            # Batched with other concurrent saves into a single upsert
+            record = await writer.save(row)
+            if index is not None:
+                duplicates = [d for d in duplicates if d["id"] != record["id"]]
+                span.set(duplicates=len(duplicates))
+                await asyncio.to_thread(
+                    index_post, index, record["id"], post.title, post.content, row[IDEMPOTENCY_KEY]
+                )
             return {
                 "status": "success",
-                "id": result.data[0]["id"],
-                "created_at": result.data[0]["created_at"]
+                "id": record["id"],
+                "created_at": record["created_at"],
+                "duplicates": duplicates
             }
         except Exception as e:
+            span.fail(str(e))
             return {
                 "status": "error",
                 "error": str(e)
             }
 
-    @tool
-    async def get_user_settings(ctx: RunContext[SupabaseDeps], user_id: str) -> Dict[str, Any]:
-        """
-        Retrieve user settings from Supabase.
+async def get_user_settings(ctx: RunContext[SupabaseDeps], user_id: str) -> Dict[str, Any]:
+    """
+    Retrieve user settings from Supabase.
 
-        Args:
-            ctx: RunContext containing Supabase credentials
-            user_id: ID of the user to retrieve settings for
+    Args:
+        ctx: RunContext containing Supabase credentials
+        user_id: ID of the user to retrieve settings for
 
-        Returns:
-            Dictionary containing user settings
-        """
-        supabase = create_client(ctx.deps.url, ctx.deps.key)
-        try:
-            result = supabase.table("user_settings").select("*").eq("user_id", user_id).execute()
+    Returns:
+        Dictionary containing user settings
+    """
+    with tracer.span("tool.get_user_settings", cache_hit=True) as span:
+        async def fetch() -> Dict[str, Any]:
+            span.set(cache_hit=False)
+            supabase = get_supabase_client(ctx.deps.url, ctx.deps.key)
+            result = await resilience.call("supabase", lambda: asyncio.to_thread(
+                supabase.table("user_settings").select("*").eq("user_id", user_id).execute
+            ))
             return result.data[0] if result.data else {}
+
+        try:
+            return await settings_cache.get((ctx.deps.url, user_id), fetch)
         except Exception as e:
+            span.fail(str(e))
             return {
                 "status": "error",
                 "error": str(e)
             }
+
+async def save_user_settings(ctx: RunContext[SupabaseDeps], user_id: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create or update user settings in Supabase.
+
+    Args:
+        ctx: RunContext containing Supabase credentials
+        user_id: ID of the user the settings belong to
+        settings: Settings to store
+
+    Returns:
+        Dictionary containing operation status
+    """
+    supabase = get_supabase_client(ctx.deps.url, ctx.deps.key)
+    try:
+        await resilience.call("supabase", lambda: asyncio.to_thread(
+            supabase.table("user_settings").upsert({**settings, "user_id": user_id}).execute
+        ))
+        return {"status": "success"}
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+    finally:
+        settings_cache.invalidate((ctx.deps.url, user_id))
+
+async def prefetch_user_settings(deps: SupabaseDeps, user_ids: List[str]) -> None:
+    """Load settings for every user in a batch with a single query"""
+    async def fetch_many(keys: list) -> Dict[Any, Dict[str, Any]]:
+        # Built here so a bad URL or key surfaces as one of SUPABASE_ERRORS
+        supabase = get_supabase_client(deps.url, deps.key)
+        ids = [user_id for _, user_id in keys]
+        result = await resilience.call("supabase", lambda: asyncio.to_thread(
+            supabase.table("user_settings").select("*").in_("user_id", ids).execute
+        ))
+        return {(deps.url, row["user_id"]): row for row in result.data}
+
+    with tracer.span("tool.prefetch_user_settings", users=len(user_ids)):
+        await settings_cache.prefetch([(deps.url, user_id) for user_id in user_ids], fetch_many)
+
+def pin_user_settings(deps: SupabaseDeps, user_ids: List[str]) -> ContextManager[None]:
+    """Keep these users' cached settings from expiring or being evicted, e.g. for one batch"""
+    return settings_cache.pin((deps.url, user_id) for user_id in user_ids)
@@ -0,0 +1,330 @@
+"""
+Tracing - Spans and metrics for the agent pipeline and tools
+"""
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Recent durations kept per span for percentiles in the summary table
+SUMMARY_SAMPLES = 10_000
+
+# Numeric span attributes that are also accumulated as counters
+COUNTED_ATTRIBUTES = ("input_tokens", "output_tokens", "retries", "payload_bytes", "rows")
+
+
+class Span:
+    """
+    A timed operation with attributes such as tokens, retries and cache hits.
+
+    While open, a span is the current span of its context: spans opened
+    inside it, including in tasks it starts, become its children and share
+    its `trace_id`, so one blog run can be read back as a single trace.
+    """
+
+    __slots__ = (
+        "tracer", "name", "attributes", "status", "error", "start_ns", "started", "duration",
+        "trace_id", "span_id", "parent_id", "_token"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_ns = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self.trace_id = ""
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id: Optional[str] = None
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, **counts: float) -> None:
+        """Increment numeric attributes, e.g. a retry count"""
+        for name, value in counts.items():
+            self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def fail(self, error: str) -> None:
+        """Mark the span failed for errors that are handled rather than raised"""
+        self.status = "error"
+        self.error = error
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        if parent is not None:
+            self.trace_id, self.parent_id = parent.trace_id, parent.span_id
+        else:
+            self.trace_id = uuid.uuid4().hex
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self.started
+        if exc is not None:
+            self.status = "error"
+            self.error = repr(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from another context, e.g. an async generator finalized elsewhere
+            pass
+        self.tracer.emit(self)
+        return False
+
+    @property
+    def end_ns(self) -> int:
+        return self.start_ns + int(self.duration * 1e9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_ns / 1e9,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled; every operation is a no-op"""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, **counts: float) -> None:
+        pass
+
+    def fail(self, error: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """The innermost open span of this context, or the no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def detached_task(coro: Any) -> asyncio.Task:
+    """Start a task outside the current trace, for work shared by several callers"""
+    return contextvars.Context().run(asyncio.create_task, coro)
+
+
+class Sink(ABC):
+    """Receives finished spans"""
+
+    @abstractmethod
+    def emit(self, span: Span) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class JSONLSink(Sink):
+    """Appends one JSON object per span to a file"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def emit(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MetricsRegistry(Sink):
+    """
+    In-process Prometheus-style counters, gauges and duration histograms.
+
+    `render` produces the Prometheus text exposition format and
+    `summary_table` a per-span overview for printing after a batch.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self.gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self.histograms: Dict[str, List[float]] = {}
+        self.durations: Dict[str, deque] = defaultdict(lambda: deque(maxlen=SUMMARY_SAMPLES))
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, metric: str, value: float = 1.0, **labels: Any) -> None:
+        with self.lock:
+            self.counters[(metric, self._labels(labels))] += value
+
+    def set_gauge(self, metric: str, value: float, **labels: Any) -> None:
+        with self.lock:
+            self.gauges[(metric, self._labels(labels))] = value
+
+    def emit(self, span: Span) -> None:
+        with self.lock:
+            self.durations[span.name].append(span.duration)
+            # Bucket counts, then sum and count
+            histogram = self.histograms.setdefault(span.name, [0.0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += span.duration
+            histogram[-1] += 1
+            self.counters[("spans_total", self._labels({"span": span.name, "status": span.status}))] += 1
+            if span.attributes.get("cache_hit"):
+                self.counters[("cache_hits_total", self._labels({"span": span.name}))] += 1
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)) and value:
+                    self.counters[(f"{attribute}_total", self._labels({"span": span.name}))] += value
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric"""
+        def fmt(name, labels, value):
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(fmt(name, labels, value))
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(fmt(name, labels, value))
+            for span_name, histogram in sorted(self.histograms.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram):
+                    lines.append(fmt("span_duration_seconds_bucket", (("le", str(bound)), ("span", span_name)), count))
+                lines.append(fmt("span_duration_seconds_bucket", (("le", "+Inf"), ("span", span_name)), histogram[-1]))
+                lines.append(fmt("span_duration_seconds_sum", (("span", span_name),), histogram[-2]))
+                lines.append(fmt("span_duration_seconds_count", (("span", span_name),), histogram[-1]))
+        return "\n".join(lines) + "\n"
+
+    def summary_table(self) -> str:
+        """Per-span count, total, p50/p95 duration, errors, cache hits and tokens"""
+        def counter(metric, span_name, **extra):
+            return self.counters.get((metric, self._labels({"span": span_name, **extra})), 0)
+
+        header = f"{'span':<32}{'count':>7}{'total s':>10}{'p50 s':>9}{'p95 s':>9}{'errors':>8}{'cache':>7}{'tokens':>10}"
+        rows = [header, "-" * len(header)]
+        with self.lock:
+            for span_name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1][-2]):
+                ordered = sorted(self.durations[span_name])
+                tokens = counter("input_tokens_total", span_name) + counter("output_tokens_total", span_name)
+                rows.append(
+                    f"{span_name:<32}{int(histogram[-1]):>7}{histogram[-2]:>10.2f}"
+                    f"{ordered[len(ordered) // 2]:>9.3f}{ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:>9.3f}"
+                    f"{int(counter('spans_total', span_name, status='error')):>8}"
+                    f"{int(counter('cache_hits_total', span_name)):>7}{int(tokens):>10}"
+                )
+        return "\n".join(rows)
+
+
+class OpenTelemetrySink(Sink):
+    """Forwards spans to OpenTelemetry; requires the opentelemetry-api package"""
+
+    def __init__(self, tracer_name: str = "auto-blogger"):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("OpenTelemetrySink requires `pip install opentelemetry-api opentelemetry-sdk`") from e
+        self.trace = trace
+        self.otel_tracer = trace.get_tracer(tracer_name)
+
+    def emit(self, span: Span) -> None:
+        attributes = {
+            k: v if isinstance(v, (str, bool, int, float)) else str(v)
+            for k, v in span.attributes.items() if v is not None
+        }
+        # Spans are forwarded once finished, children first, so the linkage travels as attributes
+        attributes.update({"trace_id": span.trace_id, "span_id": span.span_id})
+        if span.parent_id is not None:
+            attributes["parent_id"] = span.parent_id
+        otel_span = self.otel_tracer.start_span(span.name, start_time=span.start_ns, attributes=attributes)
+        if span.status == "error":
+            otel_span.set_status(self.trace.Status(self.trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_ns)
+
+
+class Tracer:
+    """Creates spans and fans them out to the configured sinks"""
+
+    def __init__(self, sinks: Optional[List[Sink]] = None):
+        self.sinks: List[Sink] = list(sinks or [])
+
+    def span(self, name: str, **attributes: Any):
+        if not self.sinks:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def emit(self, span: Span) -> None:
+        for sink in self.sinks:
+            sink.emit(span)
+
+
+# Shared tracer (disabled until configured) and metrics registry
+tracer = Tracer()
+metrics = MetricsRegistry()
+
+
+def configure_tracing(sinks: List[Sink]) -> None:
+    """Replace the tracer's sinks; an empty list disables tracing"""
+    for sink in tracer.sinks:
+        if sink not in sinks:
+            sink.close()
+    tracer.sinks = list(sinks)
+
+
+def configure_tracing_from_settings(settings: Any) -> None:
+    """Enable the sinks named in `settings.tracing` ("jsonl", "metrics", "otel")"""
+    names = [name.strip() for name in settings.tracing.split(",") if name.strip()]
+    sinks: List[Sink] = []
+    for name in names:
+        if name == "jsonl":
+            existing = next((s for s in tracer.sinks if isinstance(s, JSONLSink)), None)
+            sinks.append(existing or JSONLSink(settings.tracing_path))
+        elif name == "metrics":
+            sinks.append(metrics)
+        elif name == "otel":
+            existing = next((s for s in tracer.sinks if isinstance(s, OpenTelemetrySink)), None)
+            sinks.append(existing or OpenTelemetrySink())
+        else:
+            raise ValueError(f"Unknown tracing sink '{name}'")
+    configure_tracing(sinks)
@@ -0,0 +1,366 @@
+"""
+Vector Index - Local embedding index for near-duplicate topics, research and posts
+
+Vectors live in an append-only float32 file opened with a memory map, so
+opening a large index is cheap and pages are shared between processes;
+metadata is appended next to it as JSON lines. New entries are buffered
+and appended in batches under a lock file, so several workers can share
+one index without overwriting each other's entries. Search is brute-force
+cosine similarity in numpy, optionally narrowed by random-hyperplane LSH
+buckets for large indexes.
+"""
+import atexit
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single writer per directory
+    fcntl = None
+
+# Index kinds
+TOPIC, POST = "topic", "post"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "the", "to", "what", "why", "with", "your",
+}
+
+# Words that frame a topic rather than name it ("Healthcare AI trends", "A guide
+# to remote work"); they count little and get no trigrams
+GENERIC_WORDS = {
+    "best", "complete", "future", "guide", "idea", "insight", "intro", "introduction", "latest",
+    "modern", "new", "overview", "practice", "strategy", "tip", "today", "top", "trend", "ultimate",
+}
+GENERIC_WEIGHT = 0.3
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Below this many stored vectors LSH is skipped; a full scan is already fast
+LSH_MIN_VECTORS = 2000
+
+VECTOR_FILE, ENTRY_FILE, LOCK_FILE = "vectors.f32", "entries.jsonl", "index.lock"
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-features embeddings with no model or network.
+
+    Words (minus stopwords, with a plural "s" dropped) and their character
+    trigrams are hashed into `dim` signed buckets with sublinear term
+    weights, then L2-normalized. Framing words such as "trends" or "guide"
+    count little, so "Healthcare AI trends" scores 0.98 against "AI in
+    Healthcare", while topics differing in a word that names the subject
+    ("Benefits"/"Drawbacks of remote work", "Best laptops 2024"/"2025")
+    stay below 0.81. Only shared words count: synonyms such as "AI in
+    Healthcare" and "Artificial intelligence in medicine" score about 0.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            return word[:-1]
+        return word
+
+    def _features(self, text: str) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+        for word in WORD.findall(text.lower()):
+            if word in STOPWORDS:
+                continue
+            word = self._stem(word)
+            if word in GENERIC_WORDS:
+                features[word] = features.get(word, 0.0) + GENERIC_WEIGHT
+                continue
+            features[word] = features.get(word, 0.0) + 1.0
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                gram = "#" + padded[i:i + 3]
+                features[gram] = features.get(gram, 0.0) + 0.25
+        return features
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign * (1.0 + math.log(count) if count >= 1 else count)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+
+@dataclass
+class Match:
+    """One search hit; `score` is the cosine similarity in [-1, 1]"""
+    id: str
+    score: float
+    kind: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorIndex:
+    """
+    Persistent cosine-similarity index over short texts.
+
+    `add` upserts by id into an in-memory buffer that grows geometrically;
+    every `flush_every` entries (and on `save`) the buffer is appended to
+    the files under an exclusive lock, after first reading what other
+    processes appended. Replaced entries stay on disk but are skipped by
+    search. Set `lsh_bits` (e.g. 12) to build `lsh_tables` random-hyperplane
+    tables that pre-select stored candidates once the index is large; a
+    search with too few candidates falls back to the full scan. The
+    thresholds are the similarities above which an earlier topic counts as
+    the same topic and a post is flagged as a duplicate.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        embedder: Optional[HashingEmbedder] = None,
+        lsh_bits: int = 0,
+        lsh_tables: int = 4,
+        seed: int = 0,
+        reuse_threshold: float = 0.95,
+        duplicate_threshold: float = 0.9,
+        flush_every: int = 16
+    ):
+        self.directory = directory
+        self.reuse_threshold = reuse_threshold
+        self.duplicate_threshold = duplicate_threshold
+        self.flush_every = flush_every
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.lsh_bits = lsh_bits
+        self.lock = threading.RLock()
+        # Rows already in the vector file, memory-mapped, and their entries
+        self.vectors: np.ndarray = np.zeros((0, self.dim), dtype=np.float32)
+        self.entries: List[Dict[str, Any]] = []
+        self.offset = 0
+        # Rows added since the last flush
+        self.pending = np.zeros((8, self.dim), dtype=np.float32)
+        self.pending_entries: List[Dict[str, Any]] = []
+        # Latest entry per id; older versions of an id are skipped by search
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.planes: Optional[np.ndarray] = None
+        self.buckets: List[Dict[int, List[int]]] = []
+        if lsh_bits:
+            rng = np.random.default_rng(seed)
+            self.planes = rng.standard_normal((lsh_tables, self.dim, lsh_bits)).astype(np.float32)
+            self.buckets = [{} for _ in range(lsh_tables)]
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.refresh()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Lock shared by every process using the directory"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """One integer bucket per (vector, table)"""
+        bits = np.einsum("nd,tdb->ntb", vectors, self.planes) > 0
+        return (bits * (1 << np.arange(self.lsh_bits))).sum(axis=2)
+
+    def _read_new(self) -> None:
+        """Map entries other processes (or earlier flushes) appended past `offset`"""
+        entry_path = self._path(ENTRY_FILE)
+        if not os.path.exists(entry_path):
+            return
+        with open(entry_path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A line without its newline is a write still in progress (or a crashed one)
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            return
+        start = len(self.entries)
+        new = [json.loads(line) for line in complete.splitlines()]
+        rows = start + len(new)
+        vector_path = self._path(VECTOR_FILE)
+        if not os.path.exists(vector_path) or os.path.getsize(vector_path) < rows * self.dim * 4:
+            raise ValueError(f"Vector index at {self.directory} does not match its entries or dimension")
+        self.vectors = np.memmap(vector_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        self.entries.extend(new)
+        self.offset += len(complete)
+        # A local, not yet flushed update of the same id is newer
+        unflushed = {entry["id"] for entry in self.pending_entries}
+        for entry in new:
+            if entry["id"] not in unflushed:
+                self.latest[entry["id"]] = entry
+        if self.planes is not None:
+            for row, signature in enumerate(self._signatures(np.asarray(self.vectors[start:rows])), start):
+                for table, bucket in enumerate(signature):
+                    self.buckets[table].setdefault(int(bucket), []).append(row)
+
+    def refresh(self) -> None:
+        """Pick up entries appended by other processes"""
+        if not self.directory:
+            return
+        with self.lock:
+            entry_path = self._path(ENTRY_FILE)
+            if os.path.exists(entry_path) and os.path.getsize(entry_path) != self.offset:
+                with self._file_lock(exclusive=False):
+                    self._read_new()
+
+    def add(self, id: str, text: str, kind: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or replace the entry with this id; written out with the next flush"""
+        vector = self.embedder.embed([text])[0]
+        entry = {"id": id, "kind": kind, "text": text, "metadata": metadata or {}}
+        with self.lock:
+            rows = len(self.pending_entries)
+            if rows == len(self.pending):
+                grown = np.zeros((2 * len(self.pending), self.dim), dtype=np.float32)
+                grown[:rows] = self.pending[:rows]
+                self.pending = grown
+            self.pending[rows] = vector
+            self.pending_entries.append(entry)
+            self.latest[id] = entry
+            if self.directory and len(self.pending_entries) >= self.flush_every:
+                self.save()
+
+    def _candidates(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        if self.planes is None or len(self.entries) < LSH_MIN_VECTORS:
+            return None
+        rows: Set[int] = set()
+        for table, bucket in enumerate(self._signatures(query[None, :])[0]):
+            rows.update(self.buckets[table].get(int(bucket), ()))
+        return np.fromiter(rows, dtype=np.int64) if len(rows) >= k else None
+
+    def search(self, text: str, k: int = 5, kind: Optional[str] = None, threshold: float = 0.0) -> List[Match]:
+        """The `k` entries most similar to `text`, optionally of one kind and above a score"""
+        query = self.embedder.embed([text])[0]
+        self.refresh()
+        with self.lock:
+            rows = self._candidates(query, k)
+            stored = self.vectors if rows is None else self.vectors[rows]
+            entries = self.entries if rows is None else [self.entries[int(row)] for row in rows]
+            pending = len(self.pending_entries)
+            scores = np.concatenate([np.asarray(stored @ query), self.pending[:pending] @ query])
+            entries = entries + self.pending_entries
+            matches = []
+            for position in np.argsort(-scores):
+                entry = entries[int(position)]
+                score = float(scores[position])
+                if score < threshold:
+                    break
+                if self.latest.get(entry["id"]) is not entry:
+                    continue
+                if kind is None or entry["kind"] == kind:
+                    matches.append(Match(entry["id"], score, entry["kind"], entry["text"], entry["metadata"]))
+                    if len(matches) == k:
+                        break
+            return matches
+
+    def save(self) -> None:
+        """Append buffered entries to the files and map them from disk"""
+        if not self.directory:
+            return
+        with self.lock:
+            if not self.pending_entries:
+                return
+            count = len(self.pending_entries)
+            with self._file_lock(exclusive=True):
+                self._read_new()
+                rows = len(self.entries)
+                # Drop rows or a partial line left by a writer that crashed mid-append
+                with open(self._path(VECTOR_FILE), "ab") as f:
+                    f.truncate(rows * self.dim * 4)
+                    f.write(np.ascontiguousarray(self.pending[:count]).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._path(ENTRY_FILE), "ab") as f:
+                    f.truncate(self.offset)
+                    f.write("".join(json.dumps(e, default=str) + "\n" for e in self.pending_entries).encode())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.pending_entries = []
+                # Map the rows just written; they supersede earlier versions of their ids
+                self._read_new()
+
+    def __len__(self) -> int:
+        return len(self.latest)
+
+
+def post_text(title: str, content: str) -> str:
+    return f"{title}\n{content}"
+
+
+def find_duplicate_posts(
+    index: VectorIndex, title: str, content: str, k: int = 3, exclude_key: Optional[str] = None
+) -> List[Match]:
+    """
+    Stored posts similar enough to count as duplicates of this one.
+
+    `exclude_key` is the idempotency key of the post being saved, so saving
+    the same post again does not match its own earlier save.
+    """
+    matches = index.search(post_text(title, content), k=k + 1, kind=POST, threshold=index.duplicate_threshold)
+    return [m for m in matches if exclude_key is None or m.metadata.get("idempotency_key") != exclude_key][:k]
+
+
+def index_post(index: VectorIndex, post_id: Any, title: str, content: str, idempotency_key: Optional[str] = None) -> None:
+    """Add a stored post to the index; it is written out with the next batch"""
+    index.add(
+        f"{POST}:{post_id}",
+        post_text(title, content),
+        POST,
+        {"post_id": post_id, "title": title, "idempotency_key": idempotency_key}
+    )
+
+
+_vector_index: Optional[VectorIndex] = None
+_configured = False
+
+
+def get_vector_index() -> Optional[VectorIndex]:
+    """
+    Process-wide index built from settings on first use; None when disabled.
+
+    Buffered entries are written out when the process exits.
+    """
+    global _vector_index, _configured
+    if not _configured:
+        from config import settings
+        if settings.vector_index_dir:
+            _vector_index = VectorIndex(
+                settings.vector_index_dir,
+                lsh_bits=settings.vector_index_lsh_bits,
+                reuse_threshold=settings.topic_reuse_threshold,
+                duplicate_threshold=settings.duplicate_post_threshold,
+            )
+            atexit.register(_vector_index.save)
+        _configured = True
+    return _vector_index
+
+
+def set_vector_index(index: Optional[VectorIndex]) -> None:
+    """Replace the process-wide index; None disables near-duplicate checks"""
+    global _vector_index, _configured
+    _vector_index = index
+    _configured = True
@@ -1,50 +1,80 @@
 """
-    Web Search Tools - Demonstrates API integration with fallback
+Web Search Tools - Demonstrates API integration with fallback
+"""
+from typing import Any, Optional, Dict
+from pydantic import BaseModel
+from pydantic_ai import RunContext
+from tools.http_clients import HTTPClientRegistry, http_clients
+from tools.rate_limits import rate_limiter
+from tools.resilience import resilience
+from tools.search_cache import get_search_cache
+from tools.tracing import tracer
+
+class WebSearchDeps(BaseModel):
+    api_key: Optional[str]
+    http_clients: Optional[HTTPClientRegistry] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+async def search_brave(query: str, api_key: Optional[str], clients: Optional[HTTPClientRegistry] = None) -> Dict[str, Any]:
+    """
+    Query Brave Search through the shared result cache.
+
+    Identical (normalized) queries are answered from the cache or share a
+    request already in flight. Without an API key dummy data is returned.
+    """
+    if not api_key:
+        # Fallback to dummy data
+        return {
+            "status": "success",
+            "results": [
+                {
+                    "title": f"Dummy result for {query}",
+                    "url": "https://example.com",
+                    "description": "This is a dummy result because no API key was provided"
+                }
+            ]
+        }
+
+    with tracer.span("tool.search_web", cache_hit=True) as span:
+        async def fetch() -> Dict[str, Any]:
+            span.set(cache_hit=False)
+            client = (clients or http_clients).get("brave")
+
+            async def request():
+                await rate_limiter.acquire("brave_search")
+                response = await client.get(
+                    "https://api.search.brave.com/res/v1/web/search",
+                    params={"q": query},
+                    headers={"X-Subscription-Token": api_key}
+                )
+                response.raise_for_status()
+                return response
+
+            try:
+                # Retried, hedged when slow, and failing fast while Brave is down
+                response = await resilience.call("brave_search", request, hedge=True)
+                span.set(payload_bytes=len(response.content))
+                return response.json()
+            except Exception as e:
+                span.fail(str(e))
+                return {
+                    "status": "error",
+                    "error": str(e)
+                }
+
+        return await get_search_cache().get_or_fetch(query, fetch)
+
+async def search_web(ctx: RunContext[WebSearchDeps], query: str) -> Dict[str, Any]:
+    """
+    Search the web using Brave Search API with fallback to dummy data.
+
+    Args:
+        ctx: RunContext containing API key
+        query: Search query string
+
+    Returns:
+        Dictionary containing search results
     """
-    from typing import Optional, Dict
-    from pydantic import BaseModel
-    from pydantic_ai import RunContext, tool
-    import httpx
-
-    class WebSearchDeps(BaseModel):
-        api_key: Optional[str]
-
-    @tool
-    async def search_web(ctx: RunContext[WebSearchDeps], query: str) -> Dict[str, Any]:
-        """
-        Search the web using Brave Search API with fallback to dummy data.
-
-        Args:
-            ctx: RunContext containing API key
-            query: Search query string
-
-        Returns:
-            Dictionary containing search results
-        """
-        if ctx.deps.api_key:
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.get(
-                        "https://api.search.brave.com/res/v1/web/search",
-                        params={"q": query},
-                        headers={"X-Subscription-Token": ctx.deps.api_key}
-                    )
-                    response.raise_for_status()
-                    return response.json()
-                except Exception as e:
-                    return {
-                        "status": "error",
-                        "error": str(e)
-                    }
-        else:
-            # Fallback to dummy data
-            return {
-                "status": "success",
-                "results": [
-                    {
-                        "title": f"Dummy result for {query}",
-                        "url": "https://example.com",
-                        "description": "This is a dummy result because no API key was provided"
-                    }
-                ]
-            }
+    return await search_brave(query, ctx.deps.api_key, ctx.deps.http_clients)
@@ -0,0 +1,123 @@
+"""
+WordPress Auth - Shared JWT token cache for publishing
+"""
+import asyncio
+import base64
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+TokenFetch = Callable[[], Awaitable[str]]
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """The `exp` claim of a JWT as a Unix timestamp, if it can be read"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class WordPressTokenCache:
+    """
+    Caches JWT tokens per (site URL, username) until shortly before expiry.
+
+    Concurrent publishers that miss share one auth request. Within
+    `refresh_margin` seconds of expiry the current token is still handed out
+    while a single background request fetches its replacement. Tokens
+    without a readable `exp` claim are kept for `default_ttl` seconds.
+    """
+
+    def __init__(self, refresh_margin: float = 300.0, default_ttl: float = 3600.0):
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self.inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.refreshes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.fetches = 0
+
+    async def get(self, url: str, username: str, fetch: TokenFetch) -> str:
+        """Return a valid token for the site and user, fetching it at most once at a time"""
+        key = (url.rstrip("/"), username)
+        entry = self.tokens.get(key)
+        now = time.time()
+        if entry is not None:
+            token, expires = entry
+            if now < expires - self.refresh_margin:
+                self.hits += 1
+                return token
+            if now < expires:
+                # Still valid: hand it out and renew it in the background
+                self.hits += 1
+                if key not in self.inflight:
+                    task = asyncio.create_task(self._fetch(key, fetch))
+                    self.refreshes.add(task)
+                    task.add_done_callback(self._refresh_done)
+                return token
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+        return await self._fetch(key, fetch)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self.refreshes.discard(task)
+        if not task.cancelled():
+            # A failed background refresh is retried by the next caller
+            task.exception()
+
+    async def _fetch(self, key: Tuple[str, str], fetch: TokenFetch) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            self.fetches += 1
+            token = await fetch()
+            self.tokens[key] = (token, token_expiry(token) or time.time() + self.default_ttl)
+            future.set_result(token)
+            return token
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not reported as lost
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+    def invalidate(self, url: str, username: str, token: Optional[str] = None) -> None:
+        """
+        Forget the cached token, e.g. after the site rejected it with a 401.
+
+        When `token` is given, the entry is only dropped if it still holds
+        that token, so a replacement fetched concurrently is kept.
+        """
+        key = (url.rstrip("/"), username)
+        entry = self.tokens.get(key)
+        if entry is not None and (token is None or entry[0] == token):
+            del self.tokens[key]
+
+
+# Process-wide cache shared by every publisher
+wordpress_tokens = WordPressTokenCache()
+
+
+async def authorized_request(
+    url: str,
+    username: str,
+    fetch_token: TokenFetch,
+    send: Callable[[str], Awaitable[Any]],
+    tokens: Optional[WordPressTokenCache] = None,
+) -> Any:
+    """
+    Call `send(token)` with a cached token, re-authenticating once on a 401.
+
+    `send` must return the response without raising for its status.
+    """
+    tokens = tokens or wordpress_tokens
+    token = await tokens.get(url, username, fetch_token)
+    response = await send(token)
+    if getattr(response, "status_code", None) == 401:
+        tokens.invalidate(url, username, token)
+        token = await tokens.get(url, username, fetch_token)
+        response = await send(token)
+    return response